@@ -1,3 +1,4 @@
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -22,6 +23,21 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Monthly partitions of movie_ratings are managed by scripts.rating_partitions, not by migrations
+PARTITION_TABLE = re.compile(r"^movie_ratings_(\d{4}_\d{2}|default)$")
+
+# Indexes that only exist where the database supports them (see the migration that creates them),
+# so they are not declared on the models and autogenerate must not propose dropping them
+MIGRATION_ONLY_INDEXES = {"ix_movies_title_trgm"}
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not PARTITION_TABLE.match(name)
+    if type_ == "index":
+        return name not in MIGRATION_ONLY_INDEXES
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -43,6 +59,7 @@ def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
+        include_name=include_name,
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
@@ -67,7 +84,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
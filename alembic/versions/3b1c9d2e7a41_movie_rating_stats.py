@@ -0,0 +1,45 @@
+"""movie_rating_stats
+
+Revision ID: 3b1c9d2e7a41
+Revises: 8f9ee06cc8ad
+Create Date: 2026-01-12 10:04:51.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b1c9d2e7a41'
+down_revision: Union[str, Sequence[str], None] = '8f9ee06cc8ad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movie_rating_stats',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('ratings_sum', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('ratings_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('histogram', postgresql.ARRAY(sa.Integer()), server_default=sa.text('array_fill(0, ARRAY[10])'), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('movie_id')
+    )
+
+    # Backfill from existing ratings
+    histogram = ", ".join(f"COUNT(id) FILTER (WHERE score = {score})" for score in range(1, 11))
+    op.execute(f"""
+        INSERT INTO movie_rating_stats (movie_id, ratings_sum, ratings_count, histogram)
+        SELECT movie_id, SUM(score), COUNT(id), ARRAY[{histogram}]
+        FROM movie_ratings
+        GROUP BY movie_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('movie_rating_stats')
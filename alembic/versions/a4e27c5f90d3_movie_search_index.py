@@ -0,0 +1,83 @@
+"""movie_search_index
+
+Revision ID: a4e27c5f90d3
+Revises: 3b1c9d2e7a41
+Create Date: 2026-01-19 15:32:07.640219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e27c5f90d3'
+down_revision: Union[str, Sequence[str], None] = '3b1c9d2e7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('movies', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Title weighs most, then director and cast, then the description
+    op.execute("""
+        CREATE FUNCTION movies_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce((SELECT name FROM directors WHERE id = NEW.director_id), '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW."cast", '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER movies_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, "cast", description, director_id ON movies
+        FOR EACH ROW EXECUTE FUNCTION movies_search_vector_update()
+    """)
+
+    # Renaming a director re-indexes their movies
+    op.execute("""
+        CREATE FUNCTION directors_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE movies SET director_id = director_id WHERE director_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER directors_search_vector_trigger
+        AFTER UPDATE OF name ON directors
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+        EXECUTE FUNCTION directors_search_vector_update()
+    """)
+
+    # Backfill through the trigger
+    op.execute("UPDATE movies SET director_id = director_id")
+    op.create_index('ix_movies_search_vector', 'movies', ['search_vector'], unique=False, postgresql_using='gin')
+
+    # Trigram index so the title ILIKE '%...%' filter stops scanning the table.
+    # pg_trgm ships with the official postgres images; skip it where the contrib module is missing.
+    has_trgm = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if has_trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index('ix_movies_title_trgm', 'movies', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_movies_title_trgm")
+    op.drop_index('ix_movies_search_vector', table_name='movies', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS directors_search_vector_trigger ON directors")
+    op.execute("DROP FUNCTION IF EXISTS directors_search_vector_update()")
+    op.execute("DROP TRIGGER IF EXISTS movies_search_vector_trigger ON movies")
+    op.execute("DROP FUNCTION IF EXISTS movies_search_vector_update()")
+    op.drop_column('movies', 'search_vector')
@@ -0,0 +1,33 @@
+"""foreign_key_indexes
+
+Revision ID: b6d94e1a7c35
+Revises: f1a7d3c6e952
+Create Date: 2026-02-20 09:42:16.530871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d94e1a7c35'
+down_revision: Union[str, Sequence[str], None] = 'f1a7d3c6e952'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable during the build but cannot run in a transaction.
+    # A build that fails leaves an INVALID index behind: drop it and run the upgrade again.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_movies_director_id', 'movies', ['director_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_movie_genres_genre_id', 'movie_genres', ['genre_id', 'movie_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_movie_genres_genre_id', table_name='movie_genres', postgresql_concurrently=True)
+        op.drop_index('ix_movies_director_id', table_name='movies', postgresql_concurrently=True)
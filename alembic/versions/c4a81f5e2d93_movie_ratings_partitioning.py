@@ -0,0 +1,111 @@
+"""movie_ratings_partitioning
+
+Revision ID: c4a81f5e2d93
+Revises: b6d94e1a7c35
+Create Date: 2026-02-27 14:18:52.204617
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a81f5e2d93'
+down_revision: Union[str, Sequence[str], None] = 'b6d94e1a7c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created past the current month; scripts.rating_partitions keeps this up
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Takes the old table out of the way; its primary key and index names are reused below
+    op.rename_table('movie_ratings', 'movie_ratings_unpartitioned')
+    op.execute("ALTER TABLE movie_ratings_unpartitioned RENAME CONSTRAINT movie_ratings_pkey TO movie_ratings_unpartitioned_pkey")
+    op.drop_index('ix_movie_ratings_movie_id_rated_at', table_name='movie_ratings_unpartitioned')
+    op.drop_index('ix_movie_ratings_id', table_name='movie_ratings_unpartitioned')
+
+    op.create_table('movie_ratings',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('movie_ratings_id_seq'::regclass)"), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('rated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    postgresql_partition_by='RANGE (rated_at)',
+    )
+    # Ratings outside every monthly partition land here instead of failing the insert
+    op.execute("CREATE TABLE movie_ratings_default PARTITION OF movie_ratings DEFAULT")
+
+    # One partition per month from the oldest rating through MONTHS_AHEAD months from now
+    bind = op.get_bind()
+    oldest, current = bind.execute(sa.text(
+        "SELECT date_trunc('month', min(rated_at))::date, date_trunc('month', now())::date FROM movie_ratings_unpartitioned"
+    )).one()
+    month, last = oldest or current, _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE movie_ratings_{month.year:04d}_{month.month:02d} PARTITION OF movie_ratings "
+            f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+        )
+        month = _add_months(month, 1)
+
+    # Load first and build the keys afterwards: one pass per index instead of per-row maintenance
+    op.execute("""
+        INSERT INTO movie_ratings (id, score, rated_at, movie_id)
+        SELECT id, score, rated_at, movie_id FROM movie_ratings_unpartitioned
+    """)
+    op.create_primary_key('movie_ratings_pkey', 'movie_ratings', ['id', 'rated_at'])
+    op.create_index('ix_movie_ratings_movie_id_rated_at', 'movie_ratings', ['movie_id', 'rated_at', 'id'], unique=False)
+    op.create_foreign_key('movie_ratings_movie_id_fkey', 'movie_ratings', 'movies', ['movie_id'], ['id'], ondelete='CASCADE')
+    op.execute("ALTER SEQUENCE movie_ratings_id_seq OWNED BY movie_ratings.id")
+    op.drop_table('movie_ratings_unpartitioned')
+
+    op.create_table('movie_rating_monthly',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('ratings_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('ratings_sum', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('histogram', postgresql.ARRAY(sa.Integer()), server_default=sa.text('array_fill(0, ARRAY[10])'), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('movie_id', 'month')
+    )
+    op.create_table('movie_rating_rollup_months',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('rolled_up_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('movie_rating_rollup_months')
+    op.drop_table('movie_rating_monthly')
+
+    op.rename_table('movie_ratings', 'movie_ratings_partitioned')
+    op.create_table('movie_ratings',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('movie_ratings_id_seq'::regclass)"), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('rated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    )
+    op.execute("""
+        INSERT INTO movie_ratings (id, score, rated_at, movie_id)
+        SELECT id, score, rated_at, movie_id FROM movie_ratings_partitioned
+    """)
+    op.execute("ALTER SEQUENCE movie_ratings_id_seq OWNED BY movie_ratings.id")
+    # Dropping the parent drops every partition and frees the constraint names
+    op.drop_table('movie_ratings_partitioned')
+    op.create_primary_key('movie_ratings_pkey', 'movie_ratings', ['id'])
+    op.create_foreign_key('movie_ratings_movie_id_fkey', 'movie_ratings', 'movies', ['movie_id'], ['id'], ondelete='CASCADE')
+    op.create_index('ix_movie_ratings_id', 'movie_ratings', ['id'], unique=False)
+    op.create_index('ix_movie_ratings_movie_id_rated_at', 'movie_ratings', ['movie_id', 'rated_at', 'id'], unique=False)
@@ -0,0 +1,42 @@
+"""genre_rating_daily
+
+Revision ID: d2e85b0c7f16
+Revises: c4a81f5e2d93
+Create Date: 2026-03-06 11:27:40.918253
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e85b0c7f16'
+down_revision: Union[str, Sequence[str], None] = 'c4a81f5e2d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('genre_rating_daily',
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('ratings_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('ratings_sum', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('genre_id', 'day')
+    )
+    # Backfill from the per-movie rollup; later days are filled by scripts.compact_genre_trends
+    op.execute("""
+        INSERT INTO genre_rating_daily (genre_id, day, ratings_count, ratings_sum)
+        SELECT mg.genre_id, d.day, sum(d.ratings_count), sum(d.ratings_sum)
+        FROM movie_rating_daily d JOIN movie_genres mg ON mg.movie_id = d.movie_id
+        GROUP BY mg.genre_id, d.day
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('genre_rating_daily')
@@ -0,0 +1,33 @@
+"""movie_ratings_movie_rated_at_index
+
+Revision ID: d7f3a91c4e28
+Revises: c81f3a6d2b57
+Create Date: 2026-02-04 11:20:41.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f3a91c4e28'
+down_revision: Union[str, Sequence[str], None] = 'c81f3a6d2b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # movie_ratings takes every new rating: build without blocking writes. CONCURRENTLY cannot
+    # run in a transaction; a build that fails leaves an INVALID index, drop it and upgrade again.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_movie_ratings_movie_id_rated_at', 'movie_ratings', ['movie_id', 'rated_at', 'id'], unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_movie_ratings_movie_id_rated_at', table_name='movie_ratings', postgresql_concurrently=True)
@@ -0,0 +1,56 @@
+"""movie_rating_rollups
+
+Revision ID: e5c2b8d17a94
+Revises: d7f3a91c4e28
+Create Date: 2026-02-09 15:32:08.640217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c2b8d17a94'
+down_revision: Union[str, Sequence[str], None] = 'd7f3a91c4e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Unrated movies sort as 0.0, the value the API reports for them, and keyset cursors never see NULL.
+    # Adding a stored generated column rewrites the table, so it gets its final definition here, once.
+    op.add_column('movie_rating_stats', sa.Column(
+        'average_rating', sa.Float(),
+        sa.Computed('COALESCE(ratings_sum::float8 / NULLIF(ratings_count, 0), 0)', persisted=True),
+        nullable=False,
+    ))
+    op.create_index('ix_movie_rating_stats_average_rating', 'movie_rating_stats', ['average_rating', 'movie_id'], unique=False)
+
+    op.create_table('movie_rating_daily',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('ratings_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('ratings_sum', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('movie_id', 'day')
+    )
+
+    # Backfill from existing ratings
+    op.execute("""
+        INSERT INTO movie_rating_daily (movie_id, day, ratings_count, ratings_sum)
+        SELECT movie_id, rated_at::date, COUNT(id), SUM(score)
+        FROM movie_ratings
+        GROUP BY movie_id, rated_at::date
+    """)
+    op.create_index('ix_movie_rating_daily_day', 'movie_rating_daily', ['day', 'movie_id', 'ratings_count'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movie_rating_daily_day', table_name='movie_rating_daily')
+    op.drop_table('movie_rating_daily')
+    op.drop_index('ix_movie_rating_stats_average_rating', table_name='movie_rating_stats')
+    op.drop_column('movie_rating_stats', 'average_rating')
@@ -0,0 +1,38 @@
+"""movie_similarities
+
+Revision ID: e91c4f7a2b58
+Revises: d2e85b0c7f16
+Create Date: 2026-03-13 16:05:22.471390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91c4f7a2b58'
+down_revision: Union[str, Sequence[str], None] = 'd2e85b0c7f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movie_similarities',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.SmallInteger(), nullable=False),
+    sa.Column('similar_movie_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.REAL(), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['similar_movie_id'], ['movies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('movie_id', 'rank')
+    )
+    op.create_index('ix_movie_similarities_similar_movie_id', 'movie_similarities', ['similar_movie_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movie_similarities_similar_movie_id', table_name='movie_similarities')
+    op.drop_table('movie_similarities')
@@ -0,0 +1,62 @@
+"""movie_sort_indexes
+
+Revision ID: f1a7d3c6e952
+Revises: e5c2b8d17a94
+Create Date: 2026-02-13 10:05:37.902164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a7d3c6e952'
+down_revision: Union[str, Sequence[str], None] = 'e5c2b8d17a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every movie gets a stats row, so lists can be ordered by an inner join on indexed aggregates
+    op.execute("""
+        CREATE FUNCTION movies_rating_stats_init() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO movie_rating_stats (movie_id) VALUES (NEW.id) ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER movies_rating_stats_init_trigger
+        AFTER INSERT ON movies
+        FOR EACH ROW EXECUTE FUNCTION movies_rating_stats_init()
+    """)
+    op.execute("""
+        INSERT INTO movie_rating_stats (movie_id)
+        SELECT id FROM movies
+        ON CONFLICT DO NOTHING
+    """)
+
+    # average_rating and its (average_rating, movie_id) index already have their final form (e5c2b8d17a94).
+    # CONCURRENTLY keeps the tables writable during the builds but cannot run in a transaction.
+    # A build that fails leaves an INVALID index behind: drop it and run the upgrade again.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_movie_rating_stats_ratings_count', 'movie_rating_stats', ['ratings_count', 'movie_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_movies_title_id', 'movies', ['title', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_movies_release_year_id', 'movies', ['release_year', 'id'], unique=False, postgresql_concurrently=True)
+        # Dropped once its replacement is in place, so title lookups always have an index
+        op.drop_index('ix_movies_title', table_name='movies', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_movies_title', 'movies', ['title'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_movies_release_year_id', table_name='movies', postgresql_concurrently=True)
+        op.drop_index('ix_movies_title_id', table_name='movies', postgresql_concurrently=True)
+        op.drop_index('ix_movie_rating_stats_ratings_count', table_name='movie_rating_stats', postgresql_concurrently=True)
+
+    op.execute("DROP TRIGGER IF EXISTS movies_rating_stats_init_trigger ON movies")
+    op.execute("DROP FUNCTION IF EXISTS movies_rating_stats_init()")
@@ -0,0 +1,19 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from app.controllers.movie_controller import MovieServiceType, get_read_service
+from app.core.responses import ModelResponse
+from app.schemas.schemas import DataResponse, RatingTrend
+
+router = APIRouter()
+
+@router.get("/{genre_id}/ratings/trends", response_model=DataResponse[RatingTrend])
+async def get_genre_rating_trend(
+    genre_id: int,
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    start: date = Query(None, description="First day, default 30 buckets before end"),
+    end: date = Query(None, description="Last day, default today"),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """Ratings count and average per day, week or month over a genre's movies (compacted, see README)"""
+    data = await service.get_genre_rating_trend(genre_id, bucket, start, end)
+    return ModelResponse(DataResponse[RatingTrend](data=data))
@@ -0,0 +1,43 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from app.controllers.movie_controller import MovieServiceType, get_read_service
+from app.core.responses import ModelResponse
+from app.schemas.schemas import DataResponse, LeaderboardEntry
+
+router = APIRouter()
+
+@router.get("/top-rated", response_model=DataResponse[List[LeaderboardEntry]])
+async def top_rated(
+    min_votes: int = Query(10, ge=1, description="Only movies with at least this many ratings"),
+    genre: str = Query(None),
+    release_year: int = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """Highest average rating"""
+    data = await service.get_leaderboard("top_rated", limit, min_votes=min_votes, genre=genre, release_year=release_year)
+    return ModelResponse(DataResponse[List[LeaderboardEntry]](data=data))
+
+@router.get("/weighted", response_model=DataResponse[List[LeaderboardEntry]])
+async def weighted(
+    min_votes: int = Query(25, ge=1, description="Minimum ratings, also the weight of the global mean"),
+    genre: str = Query(None),
+    release_year: int = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """Highest Bayesian average: movies with few ratings are pulled towards the global mean"""
+    data = await service.get_leaderboard("weighted", limit, min_votes=min_votes, genre=genre, release_year=release_year)
+    return ModelResponse(DataResponse[List[LeaderboardEntry]](data=data))
+
+@router.get("/trending", response_model=DataResponse[List[LeaderboardEntry]])
+async def trending(
+    days: int = Query(7, ge=1, le=90, description="Window size, today included"),
+    genre: str = Query(None),
+    release_year: int = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """Most ratings per day over the recent window"""
+    data = await service.get_leaderboard("trending", limit, days=days, genre=genre, release_year=release_year)
+    return ModelResponse(DataResponse[List[LeaderboardEntry]](data=data))
@@ -1,81 +1,235 @@
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
-from app.services.movie_service import MovieService
-from app.schemas.schemas import MovieResponse, MovieCreate, MovieUpdate, RatingCreate, RatingResponse, ResponseBase
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Union
+from app.core.config import settings
+from app.core.etag import etag_matches
+from app.core.responses import ModelResponse
+from app.core.streaming import iter_body_lines
+from app.db.session import get_db, get_async_db, get_read_db, get_async_read_db, open_read_session
+from app.services.movie_service import MovieService, ratings_etag
+from app.services.async_movie_service import AsyncMovieService, ThreadedMovieService
+from app.services.import_service import MovieImportService
+from app.services.export_service import MovieExportService, EXPORT_MEDIA_TYPES
+from app.schemas.schemas import (
+    DataResponse, ImportResult, Message, MovieCreate, MovieFacets, MovieResponse, MovieUpdate, PageResponse, RatingResponse, RatingTrend,
+    SimilarMovie,
+)
 
 router = APIRouter()
 
-def get_service(db: Session = Depends(get_db)) -> MovieService:
+def get_sync_service(db: Session = Depends(get_db)) -> MovieService:
     return MovieService(db)
 
-@router.get("/", response_model=dict)
-def list_movies(
+def get_threaded_service(service: MovieService = Depends(get_sync_service)) -> ThreadedMovieService:
+    return ThreadedMovieService(service)
+
+def get_async_service(db: AsyncSession = Depends(get_async_db)) -> AsyncMovieService:
+    return AsyncMovieService(db)
+
+# DB_ASYNC switches every endpoint between asyncpg and the threadpool-backed sync stack
+get_service = get_async_service if settings.DB_ASYNC else get_threaded_service
+MovieServiceType = Union[AsyncMovieService, ThreadedMovieService]
+
+def get_sync_read_service(db: Session = Depends(get_read_db)) -> MovieService:
+    return MovieService(db)
+
+def get_threaded_read_service(service: MovieService = Depends(get_sync_read_service)) -> ThreadedMovieService:
+    return ThreadedMovieService(service)
+
+def get_async_read_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncMovieService:
+    return AsyncMovieService(db)
+
+# Read-only endpoints go to a replica when DATABASE_REPLICA_URLS is set (X-Consistency: strong opts out)
+get_read_service = get_async_read_service if settings.DB_ASYNC else get_threaded_read_service
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@router.get("/", response_model=PageResponse[MovieResponse])
+async def list_movies(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    title: str = Query(None),
+    release_year: int = Query(None),
+    genre: str = Query(None),
+    sort: str = Query(
+        None,
+        pattern="^-?(average_rating|ratings_count|release_year|title)$",
+        description="Sort field, prefixed with - for descending; ties are broken by id. Defaults to id.",
+    ),
+    cursor: str = Query(None, description="Keyset pagination: pass an empty value to start, then the returned next_cursor"),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """List movies with pagination, filtering, sorting and aggregated ratings"""
+    if cursor is not None:
+        data, next_cursor = await service.get_movies_after(cursor, page_size, title=title, release_year=release_year, genre=genre, sort=sort)
+        return ModelResponse(PageResponse[MovieResponse](data=data, next_cursor=next_cursor))
+
+    data = await service.get_movies(page, page_size, title=title, release_year=release_year, genre=genre, sort=sort)
+
+    return ModelResponse(PageResponse[MovieResponse](data=data))
+
+@router.get("/search", response_model=DataResponse[List[MovieResponse]])
+async def search_movies(
+    q: str = Query(..., min_length=1, max_length=200),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """Search title, director, cast and description, ordered by relevance"""
+    data = await service.search_movies(q, page, page_size)
+    return ModelResponse(DataResponse[List[MovieResponse]](data=data))
+
+@router.get("/facets", response_model=DataResponse[MovieFacets])
+async def movie_facets(
     title: str = Query(None),
     release_year: int = Query(None),
     genre: str = Query(None),
-    service: MovieService = Depends(get_service)
+    director_limit: int = Query(50, ge=1, le=500),
+    service: MovieServiceType = Depends(get_read_service)
 ):
-    """List movies with pagination, filtering and aggregated ratings"""
-    data = service.get_movies(page, page_size, title=title, release_year=release_year, genre=genre)
+    """Movie counts per genre, director and decade; each facet ignores its own filter"""
+    data = await service.get_facets(director_limit, title=title, release_year=release_year, genre=genre)
+    return ModelResponse(DataResponse[MovieFacets](data=data))
 
-    return {"status": "success", "data": data}
+@router.get("/export")
+def export_movies(
+    request: Request,
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    title: str = Query(None),
+    release_year: int = Query(None),
+    genre: str = Query(None),
+):
+    """Stream the whole catalog (or a filtered subset) with director, genres and rating stats"""
+    exporter = MovieExportService(session_factory=lambda: open_read_session(request))
+    return StreamingResponse(
+        exporter.iter_export(fmt, title=title, release_year=release_year, genre=genre),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="movies.{fmt}"'},
+    )
 
-@router.get("/{movie_id}", response_model=dict)
-def get_movie(
+@router.get("/{movie_id}", response_model=DataResponse[MovieResponse])
+async def get_movie(
     movie_id: int,
-    service: MovieService = Depends(get_service)
+    if_none_match: str = Header(None),
+    service: MovieServiceType = Depends(get_read_service)
 ):
-    """Get detailed movie info"""
-    data = service.get_movie_detail(movie_id)
-    return {"status": "success", "data": data}
+    """Get detailed movie info (supports If-None-Match)"""
+    etag = await service.get_movie_etag(movie_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # A cached body is only served under its own version, so the ETag may move on from the one checked above
+    data, etag = await service.get_movie_detail(movie_id, etag)
+    return ModelResponse(DataResponse[MovieResponse](data=data), headers={"ETag": etag, "Cache-Control": "no-cache"})
 
-@router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-def create_movie(
+@router.post("/", response_model=DataResponse[MovieResponse], status_code=status.HTTP_201_CREATED)
+async def create_movie(
     movie: MovieCreate,
-    service: MovieService = Depends(get_service)
+    service: MovieServiceType = Depends(get_service)
 ):
     """Create a new movie"""
-    data = service.create_movie(movie)
-    return {"status": "success", "data": data}
+    data = await service.create_movie(movie)
+    return ModelResponse(DataResponse[MovieResponse](data=data), status_code=status.HTTP_201_CREATED)
+
+@router.post("/import", response_model=DataResponse[ImportResult])
+async def import_movies(
+    request: Request,
+    fmt: str = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """Bulk import movies from a streamed NDJSON or CSV body; reports per-row errors"""
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    importer = MovieImportService(db, batch_size=batch_size)
+    # The importer runs on the sync engine in a worker thread and pulls the body chunk by chunk
+    report = await run_in_threadpool(importer.import_lines, iter_body_lines(request), fmt)
+    return ModelResponse(DataResponse[ImportResult](data=report.to_dict()))
 
-@router.put("/{movie_id}", response_model=dict)
-def update_movie(
+@router.put("/{movie_id}", response_model=DataResponse[MovieResponse])
+async def update_movie(
     movie_id: int,
     movie_update: MovieUpdate,
-    service: MovieService = Depends(get_service)
+    service: MovieServiceType = Depends(get_service)
 ):
     """Update a movie"""
-    data = service.update_movie(movie_id, movie_update)
-    return {"status": "success", "data": data}
+    data = await service.update_movie(movie_id, movie_update)
+    return ModelResponse(DataResponse[MovieResponse](data=data))
 
 @router.delete("/{movie_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_movie(
+async def delete_movie(
     movie_id: int,
-    service: MovieService = Depends(get_service)
+    service: MovieServiceType = Depends(get_service)
 ):
     """Delete a movie"""
-    service.delete_movie(movie_id)
+    await service.delete_movie(movie_id)
     return
 
-@router.post("/{movie_id}/ratings", response_model=dict, status_code=status.HTTP_201_CREATED)
-def rate_movie(
+@router.post("/{movie_id}/ratings", response_model=DataResponse[Message], status_code=status.HTTP_201_CREATED)
+async def rate_movie(
     movie_id: int,
     score: int = Query(..., ge=1, le=10),
-    service: MovieService = Depends(get_service)
+    service: MovieServiceType = Depends(get_service)
 ):
-    """Rate a movie"""
-    service.rate_movie(movie_id, score)
-    return {"status": "success", "data": {"message": "Rating added"}}
+    """Rate a movie (202 when the rating is queued by the write-behind buffer)"""
+    rating = await service.rate_movie(movie_id, score)
+    if rating is None:
+        return ModelResponse(DataResponse[Message](data=Message(message="Rating accepted")), status_code=status.HTTP_202_ACCEPTED)
+    return ModelResponse(DataResponse[Message](data=Message(message="Rating added")), status_code=status.HTTP_201_CREATED)
 
-@router.get("/{movie_id}/ratings", response_model=dict)
-def get_movie_ratings(
+@router.get("/{movie_id}/similar", response_model=DataResponse[List[SimilarMovie]])
+async def get_similar_movies(
     movie_id: int,
-    service: MovieService = Depends(get_service)
+    limit: int = Query(10, ge=1, le=50),
+    service: MovieServiceType = Depends(get_read_service)
 ):
-    """Get all ratings for a movie"""
-    data = service.get_movie_ratings(movie_id)
-    return {"status": "success", "data": data}
\ No newline at end of file
+    """Most similar movies by genres, director and rating profile, precomputed by scripts.build_similarities"""
+    data = await service.get_similar_movies(movie_id, limit)
+    return ModelResponse(DataResponse[List[SimilarMovie]](data=data))
+
+@router.get("/{movie_id}/ratings/trends", response_model=DataResponse[RatingTrend])
+async def get_movie_rating_trend(
+    movie_id: int,
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    start: date = Query(None, description="First day, default 30 buckets before end"),
+    end: date = Query(None, description="Last day, default today"),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """Ratings count and average per day, week or month, from the per-day rating rollup"""
+    data = await service.get_movie_rating_trend(movie_id, bucket, start, end)
+    return ModelResponse(DataResponse[RatingTrend](data=data))
+
+@router.get("/{movie_id}/ratings", response_model=PageResponse[RatingResponse])
+async def get_movie_ratings(
+    movie_id: int,
+    request: Request,
+    cursor: str = Query(None, description="Keyset pagination, newest first: pass an empty value to start, then the returned next_cursor"),
+    page_size: int = Query(100, ge=1, le=1000),
+    stream: bool = Query(False, description="Stream every rating as NDJSON instead of one JSON document"),
+    if_none_match: str = Header(None),
+    service: MovieServiceType = Depends(get_read_service)
+):
+    """Get a movie's ratings: all at once, page by page with a cursor, or streamed (supports If-None-Match)"""
+    etag = await service.get_ratings_etag(movie_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if stream:
+        # The stream has its own session, possibly on another replica: take the ETag from its snapshot
+        exporter = MovieExportService(session_factory=lambda: open_read_session(request))
+        version, chunks = await run_in_threadpool(exporter.open_ratings, movie_id)
+        headers["ETag"] = ratings_etag(movie_id, version)
+        return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES["ndjson"], headers=headers)
+
+    if cursor is not None:
+        data, next_cursor = await service.get_movie_ratings_after(movie_id, cursor, page_size)
+        return ModelResponse(PageResponse[RatingResponse](data=data, next_cursor=next_cursor), headers=headers)
+
+    data = await service.get_movie_ratings(movie_id)
+    return ModelResponse(PageResponse[RatingResponse](data=data), headers=headers)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, status
+from app.controllers.movie_controller import MovieServiceType, get_service
+from app.core.responses import ModelResponse
+from app.schemas.schemas import DataResponse, RatingBatchCreate, RatingBatchResult
+
+router = APIRouter()
+
+@router.post("/ratings:batch", response_model=DataResponse[RatingBatchResult])
+async def rate_movies_batch(
+    batch: RatingBatchCreate,
+    service: MovieServiceType = Depends(get_service)
+):
+    """Bulk rating ingestion for upstream aggregators (202 when queued by the write-behind buffer)"""
+    data = await service.rate_movies_batch(batch.ratings)
+    status_code = status.HTTP_202_ACCEPTED if data["queued"] else status.HTTP_200_OK
+    return ModelResponse(DataResponse[RatingBatchResult](data=data), status_code=status_code)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -13,7 +13,50 @@ class Settings:
         self.PROJECT_NAME: str = os.getenv("PROJECT_NAME", "Movie Rating System")
         self.API_V1_STR: str = os.getenv("API_V1_STR", "/api/v1")
         self.DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+        # Serve requests through asyncpg instead of the threadpool-backed sync engine
+        self.DB_ASYNC: bool = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+        # Connection pools (per engine, per worker process)
+        self.DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        # Seconds before a connection is replaced; -1 keeps connections forever
+        self.DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        # Seconds a request waits for a free pooled connection before failing
+        self.DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.DB_CONNECT_TIMEOUT: int = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+        # Read replicas for catalog reads (comma-separated URLs); empty sends everything to the primary
+        self.DATABASE_REPLICA_URLS: List[str] = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+        # A replica that fails to connect is skipped for this many seconds
+        self.REPLICA_RETRY_SECONDS: float = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+        # Expected worst-case replication lag; cache fills from replica reads ignore writes newer than this
+        self.REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
         
+        # In-process read cache for movie detail and list pages
+        self.CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+        self.CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+        # Leaderboards are recomputed from the rating rollups at most this often
+        self.LEADERBOARD_TTL_SECONDS: float = float(os.getenv("LEADERBOARD_TTL_SECONDS", "30"))
+
+        # Rating ingestion: "sync" writes each rating in its own transaction,
+        # "buffered" queues them in memory and writes them in batches (see README)
+        self.RATING_INGEST_MODE: str = os.getenv("RATING_INGEST_MODE", "sync").lower()
+        self.RATING_BUFFER_MAX_SIZE: int = int(os.getenv("RATING_BUFFER_MAX_SIZE", "100000"))
+        self.RATING_FLUSH_SIZE: int = int(os.getenv("RATING_FLUSH_SIZE", "1000"))
+        self.RATING_FLUSH_INTERVAL_MS: int = int(os.getenv("RATING_FLUSH_INTERVAL_MS", "200"))
+        self.RATING_SUBMIT_TIMEOUT_MS: int = int(os.getenv("RATING_SUBMIT_TIMEOUT_MS", "1000"))
+
+        # Per-request SQL checks: a request over any of these limits logs a warning
+        self.SQL_WARN_QUERIES: int = int(os.getenv("SQL_WARN_QUERIES", "30"))
+        self.SQL_WARN_DB_MS: float = float(os.getenv("SQL_WARN_DB_MS", "500"))
+        # The same statement (ignoring parameter values) this many times suggests an N+1
+        self.SQL_WARN_REPEATS: int = int(os.getenv("SQL_WARN_REPEATS", "5"))
+        self.SQL_SLOW_QUERY_MS: float = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+        # Adds X-DB-Queries / X-DB-Time-Ms (and X-DB-Warning) to responses; meant for dev and staging
+        self.SQL_STATS_HEADERS: bool = os.getenv("SQL_STATS_HEADERS", "false").lower() in ("1", "true", "yes")
+
         # Logging configuration
         self.LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
         self.SERVICE_NAME: str = os.getenv("SERVICE_NAME", "movie-rating-api")
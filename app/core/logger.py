@@ -1,10 +1,13 @@
+import atexit
+import json
 import logging
-import logging.config
+import logging.handlers
 import os
+import queue
+import random
 import sys
-from typing import Dict, Any
-from datetime import datetime
-import uuid
+import time
+from typing import Dict, List, Optional
 
 
 class RequestIdFilter(logging.Filter):
@@ -16,113 +19,238 @@ class RequestIdFilter(logging.Filter):
 
     def filter(self, record: logging.LogRecord) -> bool:
         if not hasattr(record, 'request_id'):
-            record.request_id = getattr(self, 'request_id', 'no-request-id')
+            record.request_id = self.request_id or 'no-request-id'
         return True
 
 
+class RouteSamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the request logs of chatty routes.
+    `rates` maps a path prefix to the share of records kept (0 drops them all); the longest
+    matching prefix wins. Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        path = getattr(record, 'path', None)
+        if path is None or record.levelno >= logging.WARNING:
+            return True
+        path = path.split("?", 1)[0]
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate > 0 and (rate >= 1 or random.random() < rate)
+        return True
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Parse LOG_SAMPLING, e.g. "/health=0,/cache/stats=0.1" """
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            prefix, rate = item.split("=", 1)
+            rates[prefix.strip()] = float(rate)
+    return rates
+
+
+class _Timestamps:
+    """UTC ISO-8601 timestamps from record.created, formatting the seconds part once per second"""
+
+    def __init__(self):
+        self._second = None
+        self._prefix = ""
+
+    def format(self, created: float) -> str:
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._prefix}.{int((created - second) * 1_000_000):06d}Z"
+
+
+# Request fields set through `extra=` by the middleware and exception handlers
+_EXTRA_FIELDS = ("method", "path", "status_code", "duration_ms", "extra")
+
+
 class StructuredFormatter(logging.Formatter):
     """Structured JSON-like formatter for logs"""
 
+    def __init__(self):
+        super().__init__()
+        self.service = os.getenv("SERVICE_NAME", "movie-rating-api")
+        self._timestamps = _Timestamps()
+
     def format(self, record: logging.LogRecord) -> str:
-        # Base log structure
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "level": record.levelname,
-            "service": os.getenv("SERVICE_NAME", "movie-rating-api"),
-            "request_id": getattr(record, 'request_id', 'no-request-id'),
-            "message": record.getMessage(),
-        }
-
-        # Add extra fields if present
-        if hasattr(record, 'method'):
-            log_entry["method"] = record.method
-        if hasattr(record, 'path'):
-            log_entry["path"] = record.path
+        # Records are formatted on the listener thread, so the time comes from the record
+        formatted = (
+            f"[{self._timestamps.format(record.created)}] {record.levelname} {self.service} "
+            f"{getattr(record, 'request_id', 'no-request-id')}"
+        )
+
+        if hasattr(record, 'method') and hasattr(record, 'path'):
+            formatted += f" {record.method} {record.path}"
+
         if hasattr(record, 'status_code'):
-            log_entry["status_code"] = record.status_code
+            formatted += f" {record.status_code}"
+
         if hasattr(record, 'duration_ms'):
-            log_entry["duration_ms"] = record.duration_ms
-        if hasattr(record, 'extra'):
-            log_entry["extra"] = record.extra
+            formatted += f" {record.duration_ms}ms"
+
+        formatted += f" - {record.getMessage()}"
 
-        # Add exception info if present
         if record.exc_info:
-            log_entry["exception"] = self.formatException(record.exc_info)
+            formatted += f"\n{self.formatException(record.exc_info)}"
 
-        # Format as readable string (not pure JSON for human readability)
-        formatted = f"[{log_entry['timestamp']}] {log_entry['level']} {log_entry['service']} {log_entry['request_id']}"
+        return formatted
 
-        if 'method' in log_entry and 'path' in log_entry:
-            formatted += f" {log_entry['method']} {log_entry['path']}"
 
-        if 'status_code' in log_entry:
-            formatted += f" {log_entry['status_code']}"
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
 
-        if 'duration_ms' in log_entry:
-            formatted += f" {log_entry['duration_ms']}ms"
+    def __init__(self):
+        super().__init__()
+        self.service = json.dumps(os.getenv("SERVICE_NAME", "movie-rating-api"))
+        self._timestamps = _Timestamps()
+        self._encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
 
-        formatted += f" - {log_entry['message']}"
+    def format(self, record: logging.LogRecord) -> str:
+        # The constant and already-safe parts are concatenated; only free text goes through the encoder
+        line = (
+            f'{{"timestamp":"{self._timestamps.format(record.created)}","level":"{record.levelname}",'
+            f'"service":{self.service},"logger":"{record.name}",'
+            f'"request_id":{self._encode(getattr(record, "request_id", "no-request-id"))},'
+            f'"message":{self._encode(record.getMessage())}'
+        )
+        for field in _EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                line += f',"{field}":{self._encode(value)}'
+        if record.exc_info:
+            line += f',"exception":{self._encode(self.formatException(record.exc_info))}'
+        return line + "}"
 
-        if 'exception' in log_entry:
-            formatted += f"\n{log_entry['exception']}"
 
-        return formatted
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread through a bounded queue. On a full queue the
+    record is dropped and counted (errors wait briefly first), and the count is logged
+    once there is room again, so a slow sink never stalls request handling.
+    """
+
+    ERROR_WAIT_SECONDS = 0.05
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the message arguments here; formatting happens on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if record.levelno >= logging.ERROR:
+                self.queue.put(record, timeout=self.ERROR_WAIT_SECONDS)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            return
+        if self._unreported:
+            count, self._unreported = self._unreported, 0
+            notice = logging.makeLogRecord({
+                "name": "app.logging",
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Log queue full, dropped {count} records",
+                "request_id": "no-request-id",
+            })
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                self._unreported += count
+
+
+def _build_handlers(level: int) -> List[logging.Handler]:
+    """The sinks: stdout plus an optional rotating file, written by the listener thread"""
+    formatter = JSONFormatter() if os.getenv("LOG_FORMAT", "text").lower() == "json" else StructuredFormatter()
+
+    console = logging.StreamHandler(sys.stdout)
+    handlers: List[logging.Handler] = [console]
+
+    filename = os.getenv("LOG_FILE", "app.log")
+    if filename:
+        backups = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+        when = os.getenv("LOG_ROTATE_WHEN", "")
+        max_bytes = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+        if when:
+            handlers.append(logging.handlers.TimedRotatingFileHandler(filename, when=when, backupCount=backups, utc=True))
+        elif max_bytes > 0:
+            handlers.append(logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backups))
+        else:
+            handlers.append(logging.FileHandler(filename))
 
+    for handler in handlers:
+        handler.setLevel(level)
+        handler.setFormatter(formatter)
+    return handlers
 
-def get_logger_config(log_level: str = "INFO") -> Dict[str, Any]:
-    """Get logging configuration dictionary"""
-
-    # Convert string log level to numeric
-    numeric_level = getattr(logging, log_level.upper(), logging.INFO)
-
-    return {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "structured": {
-                "()": StructuredFormatter,
-            },
-        },
-        "filters": {
-            "request_id": {
-                "()": RequestIdFilter,
-            },
-        },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "level": numeric_level,
-                "formatter": "structured",
-                "stream": sys.stdout,
-                "filters": ["request_id"],
-            },
-            "file": {
-                "class": "logging.FileHandler",
-                "level": numeric_level,
-                "formatter": "structured",
-                "filename": "app.log",
-                "filters": ["request_id"],
-            },
-        },
-        "root": {
-            "level": numeric_level,
-            "handlers": ["console", "file"],
-        },
-        "loggers": {
-            "app": {
-                "level": numeric_level,
-                "handlers": ["console", "file"],
-                "propagate": False,
-            },
-        },
-    }
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
 
 
 def setup_logging() -> None:
-    """Setup logging configuration"""
-    log_level = os.getenv("LOG_LEVEL", "INFO")
-    config = get_logger_config(log_level)
-    logging.config.dictConfig(config)
+    """
+    Setup logging configuration.
+    Loggers only enqueue records; a QueueListener thread formats them and does the I/O.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    log_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(RequestIdFilter())
+    _queue_handler.addFilter(RouteSamplingFilter(parse_sampling(os.getenv("LOG_SAMPLING", "/health=0,/metrics=0"))))
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level)
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = [_queue_handler]
+    app_logger.setLevel(level)
+    app_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *_build_handlers(level), respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and close the sinks"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def logging_stats() -> Dict[str, int]:
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
 
 
 def get_logger(name: str = "app") -> logging.Logger:
@@ -131,4 +259,4 @@ def get_logger(name: str = "app") -> logging.Logger:
 
 
 # Global logger instance
-logger = get_logger()
\ No newline at end of file
+logger = get_logger()
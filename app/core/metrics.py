@@ -0,0 +1,176 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; covers everything from a cached read to a slow export page
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """A gauge set directly, or read from `callback` (returning {label values: value}) at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback: Callable[[], Dict[Tuple, float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._callback = callback
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        if self._callback is not None:
+            values = list(self._callback().items())
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """Cumulative buckets are only computed at scrape time; observe() bumps one slot"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last slot is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines = self.header()
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Time until the last response body chunk was sent, by route template",
+    ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "Requests currently being handled"))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request, by route template",
+    ("method", "route"),
+))
+REQUEST_DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request, by route template",
+    ("method", "route"), buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200, 500),
+))
+POOL_CHECKOUTS = registry.register(Counter("db_pool_checkouts_total", "Connections handed out by the pool", ("pool",)))
+POOL_WAIT = registry.register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection", ("pool",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+))
+
+# Pools are registered by app.db.session; their gauges are read at scrape time
+_pools: Dict[str, object] = {}
+
+
+def _pool_gauge(read: Callable) -> Callable[[], Dict[Tuple, float]]:
+    return lambda: {(name,): read(pool) for name, pool in list(_pools.items())}
+
+
+registry.register(Gauge("db_pool_size", "Configured pool size", ("pool",), _pool_gauge(lambda pool: pool.size())))
+registry.register(Gauge("db_pool_checked_out", "Connections currently checked out", ("pool",), _pool_gauge(lambda pool: pool.checkedout())))
+registry.register(Gauge("db_pool_overflow", "Connections opened beyond the pool size", ("pool",), _pool_gauge(lambda pool: max(pool.overflow(), 0))))
+
+
+def register_pool(name: str, pool) -> None:
+    _pools[name] = pool
+
+
+def route_template(request) -> str:
+    """The path pattern of the matched route, so ids do not create a series each"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -1,48 +1,106 @@
 import time
 import uuid
-from fastapi import Request, Response
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core import metrics
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.db import instrumentation
 
 logger = get_logger("app.middleware")
 
 
-async def request_logging_middleware(request: Request, call_next):
-    """Middleware for logging HTTP requests and responses"""
+class RequestLoggingMiddleware:
+    """
+    Logs HTTP requests and responses and records request metrics. Plain ASGI rather than
+    an "http" middleware, so a request is timed until its last body message is sent:
+    streamed responses count their whole transfer, not just the time to the first byte.
+    """
 
-    # Generate request ID
-    request_id = str(uuid.uuid4())
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-    # Store request_id in request state for use in exception handlers
-    request.state.request_id = request_id
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    # Extract request info
-    method = request.method
-    path = request.url.path
-    query_string = request.url.query
-    if query_string:
-        path = f"{path}?{query_string}"
+        request = Request(scope)
 
-    # Log request start
-    logger.info(
-        f"Request started",
-        extra={
-            "request_id": request_id,
-            "method": method,
-            "path": path,
-        }
-    )
+        # Generate request ID
+        request_id = str(uuid.uuid4())
 
-    start_time = time.time()
+        # Store request_id in request state for use in exception handlers
+        request.state.request_id = request_id
 
-    try:
-        # Process the request
-        response = await call_next(request)
+        # Extract request info
+        method = request.method
+        path = request.url.path
+        query_string = request.url.query
+        if query_string:
+            path = f"{path}?{query_string}"
 
-        # Calculate duration
-        duration_ms = round((time.time() - start_time) * 1000, 2)
+        # Log request start (debug only; the completion line carries the same fields)
+        logger.debug(
+            f"Request started",
+            extra={
+                "request_id": request_id,
+                "method": method,
+                "path": path,
+            }
+        )
+
+        start_time = time.perf_counter()
+        queries_token = instrumentation.start_request_queries(request_id)
+        queries = instrumentation.current_request_queries()
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        status_code = 500
+        finished_at = None
+
+        async def send_timed(message: Message):
+            nonlocal status_code, finished_at
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SQL_STATS_HEADERS:
+                    _add_query_headers(MutableHeaders(scope=message), queries)
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished_at = time.perf_counter()
+
+        try:
+            # Process the request
+            await self.app(scope, receive, send_timed)
+
+        except Exception as e:
+            # Calculate duration for failed requests
+            elapsed = time.perf_counter() - start_time
+            duration_ms = round(elapsed * 1000, 2)
+            _record_metrics(request, 500, elapsed, instrumentation.finish_request_queries(queries_token))
+
+            # Log error response
+            logger.error(
+                f"Request failed: {str(e)}",
+                extra={
+                    "request_id": request_id,
+                    "method": method,
+                    "path": path,
+                    "status_code": 500,
+                    "duration_ms": duration_ms,
+                },
+                exc_info=True
+            )
+            raise
+
+        # Calculate duration up to the last body message (background tasks run after it)
+        elapsed = (finished_at or time.perf_counter()) - start_time
+        duration_ms = round(elapsed * 1000, 2)
+        instrumentation.finish_request_queries(queries_token)
+        _record_metrics(request, status_code, elapsed, queries)
+        _check_queries(request, status_code, queries)
 
         # Log successful response
-        log_level = "WARNING" if response.status_code >= 400 else "INFO"
+        log_level = "WARNING" if status_code >= 400 else "INFO"
         log_method = getattr(logger, log_level.lower())
 
         log_method(
@@ -51,27 +109,48 @@ async def request_logging_middleware(request: Request, call_next):
                 "request_id": request_id,
                 "method": method,
                 "path": path,
-                "status_code": response.status_code,
+                "status_code": status_code,
                 "duration_ms": duration_ms,
             }
         )
 
-        return response
 
-    except Exception as e:
-        # Calculate duration for failed requests
-        duration_ms = round((time.time() - start_time) * 1000, 2)
+def _record_metrics(request: Request, status_code: int, elapsed: float, queries):
+    route = metrics.route_template(request)
+    metrics.REQUESTS_IN_FLIGHT.dec()
+    metrics.REQUEST_LATENCY.observe(elapsed, request.method, route, status_code)
+    metrics.REQUEST_DB_TIME.observe(queries.seconds, request.method, route)
+    metrics.REQUEST_DB_QUERIES.observe(queries.count, request.method, route)
+
 
-        # Log error response
-        logger.error(
-            f"Request failed: {str(e)}",
+def _check_queries(request: Request, status_code: int, queries):
+    """Warn about requests over the SQL limits (likely N+1s)"""
+    repeated = queries.repeated()
+    problems = queries.warnings(repeated)
+    db_ms = round(queries.seconds * 1000, 2)
+
+    if problems:
+        logger.warning(
+            f"SQL limits exceeded ({', '.join(problems)}): {queries.count} queries, {db_ms}ms"
+            + "".join(f"\n  {count}x {sql[:300]}" for sql, count in repeated[:3]),
             extra={
-                "request_id": request_id,
-                "method": method,
-                "path": path,
-                "status_code": 500,
-                "duration_ms": duration_ms,
+                "request_id": queries.request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": status_code,
+                "extra": {
+                    "queries": queries.count,
+                    "db_ms": db_ms,
+                    "repeated": [{"statement": sql, "count": count} for sql, count in repeated],
+                },
             },
-            exc_info=True
         )
-        raise
\ No newline at end of file
+
+
+def _add_query_headers(headers: MutableHeaders, queries):
+    """Expose the SQL run so far; a streamed body's own queries come after the headers are sent"""
+    problems = queries.warnings(queries.repeated())
+    headers["X-DB-Queries"] = str(queries.count)
+    headers["X-DB-Time-Ms"] = str(round(queries.seconds * 1000, 2))
+    if problems:
+        headers["X-DB-Warning"] = ",".join(problems)
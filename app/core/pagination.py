@@ -0,0 +1,21 @@
+import base64
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a keyset position into an opaque, URL-safe cursor"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(position, dict):
+        raise ValueError("Malformed cursor")
+    return position
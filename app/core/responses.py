@@ -0,0 +1,24 @@
+from functools import lru_cache
+from typing import Any
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(model_type: type) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+
+class ModelResponse(Response):
+    """
+    JSON response written by pydantic-core straight to bytes.
+
+    FastAPI sends a returned Response as is, so this skips its second validation pass
+    against response_model, the conversion to plain Python objects and json.dumps.
+    Keep response_model on the route for the OpenAPI schema; the content must already
+    be an instance of it.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _adapter(type(content)).dump_json(content)
@@ -0,0 +1,32 @@
+import codecs
+from typing import Iterator
+import anyio
+from fastapi import Request
+
+
+def iter_body_lines(request: Request) -> Iterator[str]:
+    """
+    Sync iterator over the text lines of a streamed request body.
+    Meant to run in a worker thread: each chunk is awaited on the event loop,
+    so the body is never buffered in full. Lines keep their trailing newline.
+    """
+    stream = request.stream().__aiter__()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    async def next_chunk():
+        return await stream.__anext__()
+
+    pending = ""
+    while True:
+        try:
+            chunk = anyio.from_thread.run(next_chunk)
+        except StopAsyncIteration:
+            break
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
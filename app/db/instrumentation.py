@@ -0,0 +1,164 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger("app.db")
+
+
+class _TimedPoolMixin:
+    """Times how long a checkout waits for a free connection (including opening a new one)"""
+
+    metrics_name = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.POOL_WAIT.observe(time.perf_counter() - started, self.metrics_name)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics_name = "sync"
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+class RequestQueries:
+    """
+    SQL executed on behalf of one request. Statements are counted by their raw text
+    on the hot path and only normalized into fingerprints when the request ends.
+    """
+
+    __slots__ = ("request_id", "count", "seconds", "statements")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def add(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self) -> List[tuple]:
+        """(fingerprint, count) of statements run at least SQL_WARN_REPEATS times"""
+        if self.count < settings.SQL_WARN_REPEATS:
+            return []
+        counts = Counter()
+        for statement, count in self.statements.items():
+            counts[fingerprint(statement)] += count
+        return [(sql, count) for sql, count in counts.most_common() if count >= settings.SQL_WARN_REPEATS]
+
+    def warnings(self, repeated: List[tuple]) -> List[str]:
+        """Which per-request limits were exceeded"""
+        problems = []
+        if self.count > settings.SQL_WARN_QUERIES:
+            problems.append("query-count")
+        if self.seconds * 1000 > settings.SQL_WARN_DB_MS:
+            problems.append("db-time")
+        if repeated:
+            problems.append("repeated-statement")
+        return problems
+
+
+# SQL of the current request; None outside requests (e.g. the rating buffer's flusher).
+# The object is shared, not copied, with threadpool workers and child tasks, so their statements count too.
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def start_request_queries(request_id: str):
+    return _request_queries.set(RequestQueries(request_id))
+
+
+def current_request_queries() -> Optional[RequestQueries]:
+    return _request_queries.get()
+
+
+def finish_request_queries(token) -> RequestQueries:
+    queries = _request_queries.get()
+    _request_queries.reset(token)
+    return queries
+
+
+_PLACEHOLDER = re.compile(r"%\([^)]+\)s|%s|\$\d+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with every bound parameter (and expanded IN list) replaced by `?`"""
+    normalized = _PLACEHOLDER.sub("?", statement)
+    normalized = _PLACEHOLDER_LIST.sub("?", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def _shape(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shape(parameters, executemany: bool):
+    """Names and types of the bound parameters, never their values"""
+    if executemany and parameters:
+        return {"rows": len(parameters), "each": parameter_shape(parameters[0], False)}
+    if isinstance(parameters, dict):
+        return {name: _shape(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_shape(value) for value in parameters]
+    return _shape(parameters)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    queries = _request_queries.get()
+    if queries is not None:
+        queries.add(statement, seconds)
+    if seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        sql = fingerprint(statement)
+        shape = parameter_shape(parameters, executemany)
+        logger.warning(
+            f"Slow query: {sql[:500]} parameters={shape}",
+            extra={
+                "request_id": queries.request_id if queries is not None else "no-request-id",
+                "duration_ms": round(seconds * 1000, 2),
+                "extra": {"statement": sql, "parameters": shape},
+            },
+        )
+
+
+def _handle_error(context):
+    # after_cursor_execute is skipped for failed statements
+    stack = context.connection.info.get("query_started") if context.connection is not None else None
+    if stack:
+        seconds = time.perf_counter() - stack.pop()
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.add(context.statement or "", seconds)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Count pool checkouts and record statement time against the current request"""
+    engine.pool.metrics_name = name
+    metrics.register_pool(name, engine.pool)
+    event.listen(engine.pool, "checkout", lambda *args: metrics.POOL_CHECKOUTS.inc(name))
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _handle_error)
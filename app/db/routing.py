@@ -0,0 +1,53 @@
+import itertools
+import threading
+import time
+from typing import Generic, List, Sequence, TypeVar
+from app.core.logger import get_logger
+
+logger = get_logger("app.db.routing")
+
+EngineT = TypeVar("EngineT")
+
+# Clients send this to read from the primary, e.g. right after their own write
+CONSISTENCY_HEADER = "x-consistency"
+
+
+def wants_primary(request) -> bool:
+    return request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong"
+
+
+class ReplicaRouter(Generic[EngineT]):
+    """
+    Spreads reads round-robin over the replicas that are up, and falls back to the primary.
+    A replica that fails to connect is skipped for `retry_after` seconds, then tried again.
+    """
+
+    def __init__(self, primary: EngineT, replicas: Sequence[EngineT], retry_after: float):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_after = retry_after
+        self._down_until = [0.0] * len(self.replicas)
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[EngineT]:
+        """Engines to try in order: the healthy replicas, starting with the next in turn, then the primary"""
+        if not self.replicas:
+            return [self.primary]
+        now = time.monotonic()
+        count = len(self.replicas)
+        start = next(self._turn) % count
+        order = [(start + offset) % count for offset in range(count)]
+        return [self.replicas[index] for index in order if self._down_until[index] <= now] + [self.primary]
+
+    def mark_down(self, replica: EngineT, error: Exception):
+        index = self.replicas.index(replica)
+        with self._lock:
+            already_down = self._down_until[index] > time.monotonic()
+            self._down_until[index] = time.monotonic() + self.retry_after
+        if not already_down:
+            logger.warning(f"Read replica {index} unavailable, skipping it for {self.retry_after}s: {error}")
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [{"replica": index, "up": until <= now} for index, until in enumerate(self._down_until)]
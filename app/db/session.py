@@ -1,12 +1,102 @@
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from typing import AsyncIterator, Iterator
 from app.core.config import settings
+from app.db.instrumentation import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+from app.db.routing import ReplicaRouter, wants_primary
+
+# Connection failures that make a replica fail over (asyncpg raises OSError/TimeoutError unwrapped)
+REPLICA_ERRORS = (DBAPIError, OSError)
+
+
+class ReplicaSession(Session):
+    """
+    Session on a read replica. Nothing is checked when it is opened: if connecting to the
+    replica fails when the first statement runs, the replica is marked down and the session
+    moves to the primary, once. info["failover"] holds (router, replica, primary engine).
+    """
+
+    def _connection_for_bind(self, engine, execution_options=None, **kw):
+        failover = self.info.get("failover")
+        if failover is None or engine is not self.bind:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        except REPLICA_ERRORS as error:
+            router, replica, primary = self.info.pop("failover")
+            router.mark_down(replica, error)
+            # The transaction holds no connection yet, so it carries on against the primary
+            self.bind = primary
+            self.info["replica"] = False
+            return super()._connection_for_bind(primary, execution_options, **kw)
+
+POOL_OPTIONS = dict(
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
+
+# Sessions run in UTC whatever the server's TimeZone: rated_at defaults to now(), which is
+# local to the session, while the rating buffer stamps UTC in Python; both must agree for
+# the daily, monthly and partition boundaries
+SESSION_TIMEZONE = "UTC"
+
+
+def _create_sync_engine(url: str, name: str):
+    new_engine = create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT, "options": f"-c timezone={SESSION_TIMEZONE}"},
+        **POOL_OPTIONS,
+    )
+    instrument_engine(new_engine, name)
+    return new_engine
+
+
+def _create_async_engine(url: str, name: str):
+    new_engine = create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        poolclass=TimedAsyncQueuePool,
+        connect_args={"timeout": settings.DB_CONNECT_TIMEOUT, "server_settings": {"timezone": SESSION_TIMEZONE}},
+        **POOL_OPTIONS,
+    )
+    instrument_engine(new_engine.sync_engine, name)
+    return new_engine
+
 
 # Create Database Engine
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = _create_sync_engine(settings.DATABASE_URL, "sync")
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=ReplicaSession, autocommit=False, autoflush=False, bind=engine)
+
+# Async engine on the same database through asyncpg (used when DB_ASYNC is enabled)
+async_engine = _create_async_engine(settings.DATABASE_URL, "async")
+
+# Objects stay usable after commit; lazy loads are not possible on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=ReplicaSession
+)
+
+# Read replicas: catalog reads are spread over them, writes always use the engines above
+read_router = ReplicaRouter(
+    engine,
+    [_create_sync_engine(url, f"sync-replica-{i}") for i, url in enumerate(settings.DATABASE_REPLICA_URLS)],
+    settings.REPLICA_RETRY_SECONDS,
+)
+async_read_router = ReplicaRouter(
+    async_engine,
+    [_create_async_engine(url, f"async-replica-{i}") for i, url in enumerate(settings.DATABASE_REPLICA_URLS)],
+    settings.REPLICA_RETRY_SECONDS,
+)
 
 def get_db() -> Session:
     """
@@ -19,3 +109,57 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency to get an async DB session.
+    Yields:
+        AsyncSession: SQLAlchemy async session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _replica(router: ReplicaRouter, request: Request = None):
+    """The replica to read from next, or None for the primary"""
+    if request is not None and wants_primary(request):
+        return None
+    replica = router.candidates()[0]
+    return None if replica is router.primary else replica
+
+def open_read_session(request: Request = None) -> Session:
+    """
+    A session on the next healthy replica (the primary if there is none, or if the
+    client asked for X-Consistency: strong). session.info["replica"] tells them apart.
+    """
+    replica = _replica(read_router, request)
+    if replica is None:
+        return SessionLocal()
+    return ReadSessionLocal(bind=replica, info={"replica": True, "failover": (read_router, replica, engine)})
+
+def get_read_db(request: Request) -> Iterator[Session]:
+    """
+    Dependency for read-only handlers: a session on a read replica when one is configured.
+    Yields:
+        Session: SQLAlchemy session
+    """
+    db = open_read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Async version of get_read_db.
+    Yields:
+        AsyncSession: SQLAlchemy async session
+    """
+    replica = _replica(async_read_router, request)
+    if replica is None:
+        db = AsyncSessionLocal()
+    else:
+        db = AsyncReadSessionLocal(
+            bind=replica, info={"replica": True, "failover": (async_read_router, replica, async_engine.sync_engine)}
+        )
+    async with db as session:
+        yield session
@@ -1,26 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.exc import SQLAlchemyError
 from app.core.config import settings
-from app.core.logger import setup_logging, get_logger
-from app.core.middleware import request_logging_middleware
+from app.core.logger import setup_logging, get_logger, logging_stats
+from app.core.metrics import registry
+from app.core.middleware import RequestLoggingMiddleware
+from app.db.session import async_engine, async_read_router, read_router
+from app.services.movie_cache import movie_cache
+from app.services.rating_buffer import rating_buffer
 from app.exceptions.handlers import (
     http_exception_handler,
     validation_exception_handler,
     sqlalchemy_exception_handler,
     global_exception_handler
 )
-from app.controllers import movie_controller
+from app.controllers import genre_controller, leaderboard_controller, movie_controller, rating_controller
 
 # Setup logging first
 setup_logging()
 logger = get_logger("app.main")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.RATING_INGEST_MODE == "buffered":
+        rating_buffer.start()
+    yield
+    # Write out queued ratings before the process exits
+    await run_in_threadpool(rating_buffer.stop)
+    # Close pooled asyncpg connections on shutdown
+    await async_engine.dispose()
+    for replica in async_read_router.replicas:
+        await replica.dispose()
+
 # Create FastAPI app
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # Add request logging middleware
-app.middleware("http")(request_logging_middleware)
+app.add_middleware(RequestLoggingMiddleware)
 
 # Add exception handlers
 app.add_exception_handler(HTTPException, http_exception_handler)
@@ -30,8 +49,36 @@ app.add_exception_handler(Exception, global_exception_handler)
 
 # Include Routers
 app.include_router(movie_controller.router, prefix=f"{settings.API_V1_STR}/movies", tags=["Movies"])
+app.include_router(rating_controller.router, prefix=settings.API_V1_STR, tags=["Ratings"])
+app.include_router(leaderboard_controller.router, prefix=f"{settings.API_V1_STR}/leaderboards", tags=["Leaderboards"])
+app.include_router(genre_controller.router, prefix=f"{settings.API_V1_STR}/genres", tags=["Genres"])
 
 @app.get("/health")
 def health_check():
-    logger.info("Health check requested")
+    logger.debug("Health check requested")
     return {"status": "ok"}
+
+@app.get("/db/replicas")
+def replica_status():
+    """Which read replicas are in rotation (a replica that failed to connect sits out for a while)"""
+    return {"status": "success", "data": {"sync": read_router.status(), "async": async_read_router.status()}}
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss/eviction counters of the in-process movie cache, for sizing it"""
+    return {"status": "success", "data": movie_cache.stats()}
+
+@app.get("/ratings/buffer/stats")
+def rating_buffer_stats():
+    """Queue depth and flush counters of the write-behind rating buffer"""
+    return {"status": "success", "data": rating_buffer.stats()}
+
+@app.get("/logging/stats")
+def log_queue_stats():
+    """Depth of the log queue and how many records were dropped because it was full"""
+    return {"status": "success", "data": logging_stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Request, DB and pool metrics of this worker in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
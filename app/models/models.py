@@ -1,15 +1,21 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Table, TIMESTAMP, func
+from sqlalchemy import Column, Computed, Date, Float, Integer, BigInteger, REAL, SmallInteger, String, Text, ForeignKey, Table, Index, FetchedValue, TIMESTAMP, func, text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 from app.models.base import Base
 
+# Ratings are integer scores on a 1..RATING_SCALE scale
+RATING_SCALE = 10
+
 # Association Table for Many-to-Many (Movies <-> Genres)
 movie_genres = Table(
     "movie_genres",
     Base.metadata,
     Column("movie_id", ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True),
     Column("genre_id", ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key leads with movie_id; genre filters and facets look links up by genre
+    Index("ix_movie_genres_genre_id", "genre_id", "movie_id"),
 )
 
 class Director(Base):
@@ -40,25 +46,147 @@ class Movie(Base):
     __tablename__ = "movies"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    title: Mapped[str] = mapped_column(String, index=True)
+    title: Mapped[str] = mapped_column(String)
     release_year: Mapped[int] = mapped_column(Integer)
     cast: Mapped[Optional[str]] = mapped_column(Text)
     description: Mapped[Optional[str]] = mapped_column(Text)
     director_id: Mapped[int] = mapped_column(Integer, ForeignKey("directors.id"))
+    # Bumped on every update; together with the ratings count it forms the ETag
+    version: Mapped[int] = mapped_column(Integer, server_default=text("1"))
+    # Weighted title/director/cast/description document, maintained by a database trigger
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, server_default=FetchedValue(), server_onupdate=FetchedValue(), deferred=True
+    )
+
+    __table_args__ = (
+        Index("ix_movies_search_vector", "search_vector", postgresql_using="gin"),
+        # ix_movies_title_trgm (title gin_trgm_ops) is migration-only: a4e27c5f90d3 creates it
+        # when pg_trgm is available, so create_all works without the extension
+        # Sorted list pages: the id tie-breaker keeps the order total and keyset cursors stable
+        Index("ix_movies_title_id", "title", "id"),
+        Index("ix_movies_release_year_id", "release_year", "id"),
+        Index("ix_movies_director_id", "director_id"),
+    )
 
     # Relationships
     director: Mapped["Director"] = relationship(back_populates="movies")
     genres: Mapped[List["Genre"]] = relationship(secondary=movie_genres, back_populates="movies")
-    ratings: Mapped[List["MovieRating"]] = relationship(back_populates="movie", cascade="all, delete-orphan")
+    # Rows are removed by the ON DELETE CASCADE foreign keys, so deleting a movie never loads its ratings
+    ratings: Mapped[List["MovieRating"]] = relationship(back_populates="movie", cascade="all, delete-orphan", passive_deletes=True)
+    rating_stats: Mapped[Optional["MovieRatingStats"]] = relationship(back_populates="movie", cascade="all, delete-orphan", passive_deletes=True)
 
 class MovieRating(Base):
-    """Movie Rating Model"""
+    """
+    Movie Rating Model.
+    Range-partitioned by month of rated_at (the partition key has to be part of the primary
+    key); scripts.rating_partitions creates the monthly partitions ahead of time.
+    """
     __tablename__ = "movie_ratings"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     score: Mapped[int] = mapped_column(Integer) # Validator needed in App layer for 1-10
-    rated_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
+    rated_at: Mapped[datetime] = mapped_column(TIMESTAMP, primary_key=True, server_default=func.now())
     movie_id: Mapped[int] = mapped_column(Integer, ForeignKey("movies.id", ondelete="CASCADE"))
 
+    __table_args__ = (
+        # Serves a movie's ratings newest first (scanned backwards) and the ON DELETE CASCADE lookup
+        Index("ix_movie_ratings_movie_id_rated_at", "movie_id", "rated_at", "id"),
+        {"postgresql_partition_by": "RANGE (rated_at)"},
+    )
+
     # Relationship
     movie: Mapped["Movie"] = relationship(back_populates="ratings")
+
+class MovieRatingStats(Base):
+    """
+    Per-movie rating aggregates, kept in sync with movie_ratings on every write.
+    A trigger on movies creates the (zero) row when a movie is inserted.
+    """
+    __tablename__ = "movie_rating_stats"
+
+    movie_id: Mapped[int] = mapped_column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    ratings_sum: Mapped[int] = mapped_column(BigInteger, server_default=text("0"))
+    ratings_count: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    # histogram[i - 1] holds the number of ratings with score i
+    histogram: Mapped[List[int]] = mapped_column(ARRAY(Integer), server_default=text(f"array_fill(0, ARRAY[{RATING_SCALE}])"))
+    # Stored by Postgres so movies can be ranked by average through an index (0 when unrated)
+    average_rating: Mapped[float] = mapped_column(
+        Float, Computed("COALESCE(ratings_sum::float8 / NULLIF(ratings_count, 0), 0)", persisted=True)
+    )
+
+    __table_args__ = (
+        Index("ix_movie_rating_stats_average_rating", "average_rating", "movie_id"),
+        Index("ix_movie_rating_stats_ratings_count", "ratings_count", "movie_id"),
+    )
+
+    # Relationship
+    movie: Mapped["Movie"] = relationship(back_populates="rating_stats")
+
+    @property
+    def average(self) -> Optional[float]:
+        if not self.ratings_count:
+            return None
+        return self.ratings_sum / self.ratings_count
+
+class MovieRatingDaily(Base):
+    """Ratings per movie per day (by rated_at), kept in sync with movie_ratings on every write"""
+    __tablename__ = "movie_rating_daily"
+
+    movie_id: Mapped[int] = mapped_column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    ratings_count: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    ratings_sum: Mapped[int] = mapped_column(BigInteger, server_default=text("0"))
+
+    __table_args__ = (
+        # Covers "ratings per movie over the last N days" with an index-only scan
+        Index("ix_movie_rating_daily_day", "day", "movie_id", "ratings_count"),
+    )
+
+class MovieSimilarity(Base):
+    """
+    Each movie's nearest neighbours by genres, director and rating profile, best first.
+    Precomputed offline by scripts.build_similarities; rank 1 is the most similar movie.
+    """
+    __tablename__ = "movie_similarities"
+
+    movie_id: Mapped[int] = mapped_column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    rank: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    similar_movie_id: Mapped[int] = mapped_column(Integer, ForeignKey("movies.id", ondelete="CASCADE"))
+    score: Mapped[float] = mapped_column(REAL)
+
+    __table_args__ = (
+        # Deleting a movie cascades to the lists it appears in
+        Index("ix_movie_similarities_similar_movie_id", "similar_movie_id"),
+    )
+
+class GenreRatingDaily(Base):
+    """
+    Ratings per genre per day, compacted from movie_rating_daily (scripts.compact_genre_trends).
+    Not written per rating: every rating in a genre would contend for the same row.
+    """
+    __tablename__ = "genre_rating_daily"
+
+    genre_id: Mapped[int] = mapped_column(Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    ratings_count: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    ratings_sum: Mapped[int] = mapped_column(BigInteger, server_default=text("0"))
+
+class MovieRatingMonthly(Base):
+    """
+    Ratings per movie per month, written once the month is closed (scripts.rating_partitions rollup).
+    Whole-history aggregates read these rows before the rollup watermark and raw ratings after it.
+    """
+    __tablename__ = "movie_rating_monthly"
+
+    movie_id: Mapped[int] = mapped_column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    ratings_count: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    ratings_sum: Mapped[int] = mapped_column(BigInteger, server_default=text("0"))
+    histogram: Mapped[List[int]] = mapped_column(ARRAY(Integer), server_default=text(f"array_fill(0, ARRAY[{RATING_SCALE}])"))
+
+class RatingRollupMonth(Base):
+    """Months already folded into movie_rating_monthly; rolled up oldest first, so the latest is the watermark"""
+    __tablename__ = "movie_rating_rollup_months"
+
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    rolled_up_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now())
@@ -0,0 +1,198 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Movie, MovieRating, MovieRatingStats, Director, movie_genres
+from app.repositories import movie_queries as queries
+from app.schemas.schemas import MovieCreate, MovieUpdate
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+class AsyncMovieRepository:
+    """
+    Async Data Access Layer for Movies (asyncpg).
+    Mirrors MovieRepository; statements come from movie_queries so both stay identical.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_all(self, skip: int = 0, limit: int = 10, title: str = None, release_year: int = None, genre: str = None, sort: str = None) -> List[Movie]:
+        """Fetch movies with pagination, filtering, sorting and relations"""
+        stmt = queries.page_stmt(skip, limit, sort=sort, title=title, release_year=release_year, genre=genre)
+        return (await self.db.scalars(stmt)).all()
+
+    async def get_after(self, after: Optional[tuple], limit: int = 10, title: str = None, release_year: int = None, genre: str = None, sort: str = None) -> List[Movie]:
+        """Keyset pagination: fetch the next movies after `after`, the sort key values of the last movie seen"""
+        stmt = queries.after_stmt(after, limit, sort=sort, title=title, release_year=release_year, genre=genre)
+        return (await self.db.scalars(stmt)).all()
+
+    async def search(self, q: str, skip: int = 0, limit: int = 10) -> List[Movie]:
+        """Full-text search over title, director, cast and description, most relevant first"""
+        return (await self.db.scalars(queries.search_stmt(q, skip, limit))).all()
+
+    async def get_by_id(self, movie_id: int, refresh: bool = False) -> Optional[Movie]:
+        stmt = queries.movie_by_id_stmt(movie_id)
+        if refresh:
+            # Overwrite relationship collections already held by the session
+            stmt = stmt.execution_options(populate_existing=True)
+        return (await self.db.scalars(stmt)).unique().first()
+
+    async def get_version(self, movie_id: int):
+        """(version, ratings_count) for conditional requests, or None if the movie does not exist"""
+        return (await self.db.execute(queries.movie_version_stmt(movie_id))).first()
+
+    async def movie_exists(self, movie_id: int) -> bool:
+        """Primary key probe without loading the movie or its relations"""
+        return await self.db.scalar(queries.existing_movie_ids_stmt([movie_id])) is not None
+
+    async def existing_movie_ids(self, movie_ids: Set[int]) -> Set[int]:
+        """The subset of movie_ids present in the database (one query)"""
+        if not movie_ids:
+            return set()
+        return set(await self.db.scalars(queries.existing_movie_ids_stmt(movie_ids)))
+
+    async def director_exists(self, director_id: int) -> bool:
+        return await self.db.get(Director, director_id) is not None
+
+    async def count_genres(self, genre_ids: List[int]) -> int:
+        """Number of the given genre ids that exist"""
+        return await self.db.scalar(queries.count_genres_stmt(genre_ids))
+
+    async def create(self, movie_data: MovieCreate) -> Movie:
+        new_movie = Movie(
+            title=movie_data.title,
+            release_year=movie_data.release_year,
+            cast=movie_data.cast,
+            description=movie_data.description,
+            director_id=movie_data.director_id
+        )
+        self.db.add(new_movie)
+        # Flush for the id, then write the genre links in the same transaction
+        await self.db.flush()
+        if movie_data.genre_ids:
+            await self.db.execute(queries.genre_links_insert(new_movie.id, movie_data.genre_ids))
+        await self.db.commit()
+
+        return await self.get_by_id(new_movie.id, refresh=True)
+
+    async def update(self, movie: Movie, movie_update: MovieUpdate) -> Movie:
+        update_data = movie_update.model_dump(exclude_unset=True)
+        genre_ids = update_data.pop('genre_ids', None)
+
+        for field, value in update_data.items():
+            setattr(movie, field, value)
+        # Increment in SQL so concurrent updates never reuse a version
+        movie.version = Movie.version + 1
+
+        if genre_ids is not None:
+            await self.db.execute(movie_genres.delete().where(movie_genres.c.movie_id == movie.id))
+            if genre_ids:
+                await self.db.execute(queries.genre_links_insert(movie.id, genre_ids))
+
+        await self.db.commit()
+        return await self.get_by_id(movie.id, refresh=True)
+
+    async def delete(self, movie: Movie):
+        await self.db.delete(movie)
+        await self.db.commit()
+
+    async def add_rating(self, movie_id: int, score: int) -> MovieRating:
+        rating = MovieRating(movie_id=movie_id, score=score)
+        self.db.add(rating)
+        await self.db.flush()
+        # Keep the aggregates in the same transaction as the raw row
+        await self.apply_rating_stats({movie_id: [score]})
+        await self.apply_rating_daily([{"movie_id": movie_id, "score": score, "rated_at": rating.rated_at}])
+        await self.db.commit()
+        await self.db.refresh(rating)
+        return rating
+
+    async def bulk_add_ratings(self, ratings: List[Dict]) -> int:
+        """Insert many ratings and update the aggregates in one transaction; skips deleted movies"""
+        movie_ids = {rating["movie_id"] for rating in ratings}
+        if not movie_ids:
+            return 0
+        # Lock the movies so none is deleted between this check and the insert
+        existing = set(await self.db.scalars(queries.existing_movie_ids_stmt(movie_ids, lock=True)))
+        ratings = [rating for rating in ratings if rating["movie_id"] in existing]
+        if ratings:
+            inserted = [row._asdict() for row in await self.db.execute(queries.insert_ratings_stmt(), ratings)]
+            await self.apply_rating_stats(queries.group_scores(inserted))
+            await self.apply_rating_daily(inserted)
+            await self.apply_late_ratings(inserted)
+        await self.db.commit()
+        return len(ratings)
+
+    async def apply_rating_stats(self, scores_by_movie: Dict[int, List[int]]):
+        """Add new scores to the per-movie aggregates with a single upsert (no commit)"""
+        stmt = queries.rating_stats_upsert(scores_by_movie)
+        if stmt is not None:
+            await self.db.execute(stmt)
+
+    async def apply_rating_daily(self, ratings: List[Dict]):
+        """Add just-inserted ratings ({movie_id, score, rated_at}) to the per-day rollup (no commit)"""
+        stmt = queries.rating_daily_upsert(ratings)
+        if stmt is not None:
+            await self.db.execute(stmt)
+
+    async def apply_late_ratings(self, ratings: List[Dict]):
+        """Add ratings dated before the rollup watermark to the monthly rollup as well (no commit)"""
+        watermark = await self.rollup_watermark()
+        if watermark is None:
+            return
+        stmt = queries.rating_monthly_upsert([rating for rating in ratings if rating["rated_at"].date() < watermark])
+        if stmt is not None:
+            await self.db.execute(stmt)
+
+    async def rollup_watermark(self) -> Optional[date]:
+        """The first month not folded into movie_rating_monthly (None while none is)"""
+        last = await self.db.scalar(queries.last_rolled_up_month_stmt())
+        return queries.add_months(last, 1) if last else None
+
+    async def get_rating_stats(self, movie_id: int) -> Optional[MovieRatingStats]:
+        """Read the precomputed aggregates (primary key lookup, None if never rated)"""
+        return await self.db.get(MovieRatingStats, movie_id)
+
+    async def get_rating_stats_for_movies(self, movie_ids: List[int]) -> Dict[int, MovieRatingStats]:
+        """Batch-load aggregates for a page of movies in one query, keyed by movie id"""
+        if not movie_ids:
+            return {}
+        rows = await self.db.scalars(queries.rating_stats_for_movies_stmt(movie_ids))
+        return {stats.movie_id: stats for stats in rows}
+
+    async def get_ratings_for_movie(self, movie_id: int) -> List[MovieRating]:
+        """Get all ratings for a specific movie"""
+        return (await self.db.scalars(queries.ratings_for_movie_stmt(movie_id))).all()
+
+    async def get_ratings_after(self, movie_id: int, after: Optional[Tuple[datetime, int]], limit: int) -> List[MovieRating]:
+        """Keyset page of a movie's ratings, newest first, after the (rated_at, id) cursor"""
+        return (await self.db.scalars(queries.ratings_after_stmt(movie_id, after, limit))).all()
+
+    async def get_leaderboard(self, board: str, limit: int, min_votes: int = 0, days: int = 7, **filters) -> list:
+        """(movie_id, score, ratings_count) rows of a leaderboard, best first"""
+        stmt = queries.leaderboard_stmt(board, limit, min_votes=min_votes, days=days, **filters)
+        return (await self.db.execute(stmt)).all()
+
+    async def get_movie_rating_trend(self, movie_id: int, bucket: str, start: date, end: date) -> list:
+        """(bucket_start, ratings_count, ratings_sum) rows for the buckets with ratings, oldest first"""
+        return (await self.db.execute(queries.movie_rating_trend_stmt(movie_id, bucket, start, end))).all()
+
+    async def get_genre_rating_trend(self, genre_id: int, bucket: str, start: date, end: date) -> list:
+        """Same as get_movie_rating_trend, from the compacted genre rollup"""
+        return (await self.db.execute(queries.genre_rating_trend_stmt(genre_id, bucket, start, end))).all()
+
+    async def get_similar(self, movie_id: int, limit: int) -> list:
+        """(movie_id, score) rows of the precomputed most similar movies, best first"""
+        return (await self.db.execute(queries.similar_movies_stmt(movie_id, limit))).all()
+
+    async def get_by_ids(self, movie_ids: List[int]) -> List[Movie]:
+        """Movies with relations for the given ids, in no particular order"""
+        if not movie_ids:
+            return []
+        return (await self.db.scalars(queries.movies_by_ids_stmt(movie_ids))).all()
+
+    async def get_facets(self, director_limit: int, title: str = None, release_year: int = None, genre: str = None) -> Dict[str, list]:
+        """Genre, director and decade counts: one grouped query each, every facet ignoring its own filter"""
+        return {
+            "genres": (await self.db.execute(queries.genre_facet_stmt(title=title, release_year=release_year))).all(),
+            "directors": (await self.db.execute(queries.director_facet_stmt(director_limit, title=title, release_year=release_year, genre=genre))).all(),
+            "decades": (await self.db.execute(queries.decade_facet_stmt(title=title, genre=genre))).all(),
+        }
@@ -0,0 +1,435 @@
+"""
+Statement builders shared by the sync and async repositories.
+Each function only builds SQL; executing it is left to the caller's session.
+"""
+
+from datetime import date, datetime
+from sqlalchemy import TIMESTAMP, Date, Float, Integer, Select, cast, func, insert, literal, select, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.dialects.postgresql import array, insert as pg_insert
+from app.models.models import (
+    Movie, MovieRating, MovieRatingDaily, MovieRatingMonthly, MovieRatingStats, MovieSimilarity, Director, Genre, GenreRatingDaily,
+    RatingRollupMonth, movie_genres, RATING_SCALE,
+)
+from typing import Dict, List, Optional, Tuple
+
+
+def list_movies_stmt(title: str = None, release_year: int = None, genre: str = None) -> Select:
+    """Movies with relations and the list filters applied"""
+    # Genres are batch-loaded with one IN query for the whole page;
+    # joining a collection would multiply rows and force a subquery around LIMIT
+    stmt = select(Movie).options(
+        joinedload(Movie.director),
+        selectinload(Movie.genres)
+    )
+    return filter_movies(stmt, title=title, release_year=release_year, genre=genre)
+
+
+def filter_movies(stmt: Select, title: str = None, release_year: int = None, genre: str = None) -> Select:
+    """Apply the list filters to any select over movies"""
+    if title:
+        stmt = stmt.where(Movie.title.ilike(f"%{title}%"))
+    if release_year:
+        stmt = stmt.where(Movie.release_year == release_year)
+    if genre:
+        # EXISTS instead of a join so a movie matching several genres appears once
+        stmt = stmt.where(Movie.genres.any(Genre.name.ilike(f"%{genre}%")))
+    return stmt
+
+
+def genre_facet_stmt(title: str = None, release_year: int = None) -> Select:
+    """Movies per genre under every filter except genre"""
+    count = func.count(Movie.id)
+    stmt = select(Genre.id, Genre.name, count.label("count")).select_from(Movie).join(
+        movie_genres, movie_genres.c.movie_id == Movie.id
+    ).join(Genre, Genre.id == movie_genres.c.genre_id).group_by(Genre.id, Genre.name)
+    return filter_movies(stmt, title=title, release_year=release_year).order_by(count.desc(), Genre.name)
+
+
+def director_facet_stmt(limit: int, title: str = None, release_year: int = None, genre: str = None) -> Select:
+    """The `limit` directors with the most matching movies (there is no director filter to exclude)"""
+    count = func.count(Movie.id)
+    stmt = select(Director.id, Director.name, count.label("count")).select_from(Movie).join(
+        Director, Director.id == Movie.director_id
+    ).group_by(Director.id, Director.name)
+    stmt = filter_movies(stmt, title=title, release_year=release_year, genre=genre)
+    return stmt.order_by(count.desc(), Director.name).limit(limit)
+
+
+def decade_facet_stmt(title: str = None, genre: str = None) -> Select:
+    """Movies per decade under every filter except release_year"""
+    decade = (Movie.release_year // 10) * 10
+    stmt = select(decade.label("decade"), func.count(Movie.id).label("count")).group_by(decade)
+    return filter_movies(stmt, title=title, genre=genre).order_by(decade)
+
+
+def export_movies_stmt(**filters) -> Select:
+    """
+    Flat rows for the catalog export: movie columns, director name, genres and rating stats.
+    Genres come from correlated subqueries rather than GROUP BY, so Postgres can
+    walk the primary key and send the first rows before it has read the whole table.
+    """
+    genre_link = (movie_genres.c.movie_id == Movie.id)
+    genre_ids = select(movie_genres.c.genre_id).where(genre_link).order_by(movie_genres.c.genre_id)
+    genre_names = select(Genre.name).join(movie_genres, movie_genres.c.genre_id == Genre.id).where(genre_link).order_by(Genre.name)
+    stmt = select(
+        Movie.id,
+        Movie.title,
+        Movie.release_year,
+        Movie.cast,
+        Movie.description,
+        Movie.director_id,
+        Director.name.label("director"),
+        func.array(genre_ids.scalar_subquery()).label("genre_ids"),
+        func.array(genre_names.scalar_subquery()).label("genres"),
+        func.coalesce(MovieRatingStats.ratings_count, 0).label("ratings_count"),
+        func.coalesce(MovieRatingStats.ratings_sum, 0).label("ratings_sum"),
+    ).join(Director, Director.id == Movie.director_id).outerjoin(
+        MovieRatingStats, MovieRatingStats.movie_id == Movie.id
+    )
+    return filter_movies(stmt, **filters).order_by(Movie.id)
+
+
+# sort option -> (sort column, tie-breaker). Each pair matches a composite index, so a
+# sorted page is an index scan (backwards for descending) that stops after LIMIT rows.
+# The stats sorts rely on every movie having a movie_rating_stats row.
+MOVIE_SORTS = {
+    "average_rating": (MovieRatingStats.average_rating, MovieRatingStats.movie_id),
+    "ratings_count": (MovieRatingStats.ratings_count, MovieRatingStats.movie_id),
+    "release_year": (Movie.release_year, Movie.id),
+    "title": (Movie.title, Movie.id),
+}
+
+
+def sort_keys(sort: Optional[str]) -> Tuple[tuple, bool]:
+    """Columns to order by and whether descending, for a sort like "-average_rating" (None: by id)"""
+    if not sort:
+        return (Movie.id,), False
+    return MOVIE_SORTS[sort.lstrip("-")], sort.startswith("-")
+
+
+def sorted_movies_stmt(sort: Optional[str] = None, **filters) -> Select:
+    keys, descending = sort_keys(sort)
+    stmt = list_movies_stmt(**filters)
+    if keys[-1] is MovieRatingStats.movie_id:
+        stmt = stmt.join(MovieRatingStats, MovieRatingStats.movie_id == Movie.id)
+    return stmt.order_by(*(key.desc() if descending else key for key in keys))
+
+
+def page_stmt(skip: int, limit: int, sort: Optional[str] = None, **filters) -> Select:
+    # Without a total ORDER BY, OFFSET pages are not guaranteed to be disjoint
+    return sorted_movies_stmt(sort, **filters).offset(skip).limit(limit)
+
+
+def after_stmt(after: Optional[tuple], limit: int, sort: Optional[str] = None, **filters) -> Select:
+    """Keyset pagination: the movies after `after`, the sort key values of the last movie seen"""
+    stmt = sorted_movies_stmt(sort, **filters)
+    if after is not None:
+        keys, descending = sort_keys(sort)
+        position = tuple_(*keys)
+        stmt = stmt.where(position < tuple_(*after) if descending else position > tuple_(*after))
+    return stmt.limit(limit)
+
+
+def search_stmt(q: str, skip: int, limit: int) -> Select:
+    """Full-text search over title, director, cast and description, most relevant first"""
+    tsquery = func.websearch_to_tsquery("english", q)
+    rank = func.ts_rank_cd(Movie.search_vector, tsquery)
+    return select(Movie).options(
+        joinedload(Movie.director),
+        selectinload(Movie.genres)
+    ).where(
+        Movie.search_vector.op("@@")(tsquery)
+    ).order_by(rank.desc(), Movie.id).offset(skip).limit(limit)
+
+
+def movie_by_id_stmt(movie_id: int) -> Select:
+    return select(Movie).options(
+        joinedload(Movie.director),
+        joinedload(Movie.genres)
+    ).where(Movie.id == movie_id)
+
+
+def movie_version_stmt(movie_id: int) -> Select:
+    """Movie version and ratings count: a primary key lookup on each table, no relations"""
+    return select(
+        Movie.version,
+        func.coalesce(MovieRatingStats.ratings_count, 0).label("ratings_count"),
+    ).outerjoin(MovieRatingStats, MovieRatingStats.movie_id == Movie.id).where(Movie.id == movie_id)
+
+
+def genre_links_insert(movie_id: int, genre_ids: List[int]):
+    """Multi-row insert of the movie <-> genre links"""
+    return movie_genres.insert().values([
+        {"movie_id": movie_id, "genre_id": genre_id} for genre_id in genre_ids
+    ])
+
+
+def count_genres_stmt(genre_ids: List[int]) -> Select:
+    return select(func.count(Genre.id)).where(Genre.id.in_(genre_ids))
+
+
+def score_histogram(scores: List[int]) -> List[int]:
+    histogram = [0] * RATING_SCALE
+    for score in scores:
+        histogram[score - 1] += 1
+    return histogram
+
+
+def rating_stats_upsert(scores_by_movie: Dict[int, List[int]]):
+    """Single upsert adding new scores to the per-movie aggregates, or None if there are none"""
+    rows = []
+    # Sorted so concurrent writers lock the stats rows in the same order
+    for movie_id in sorted(scores_by_movie):
+        scores = scores_by_movie[movie_id]
+        rows.append({
+            "movie_id": movie_id,
+            "ratings_sum": sum(scores),
+            "ratings_count": len(scores),
+            "histogram": score_histogram(scores),
+        })
+    if not rows:
+        return None
+
+    stmt = pg_insert(MovieRatingStats).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MovieRatingStats.movie_id],
+        set_={
+            "ratings_sum": MovieRatingStats.ratings_sum + stmt.excluded.ratings_sum,
+            "ratings_count": MovieRatingStats.ratings_count + stmt.excluded.ratings_count,
+            "histogram": array([
+                MovieRatingStats.histogram[i] + stmt.excluded.histogram[i]
+                for i in range(1, RATING_SCALE + 1)
+            ]),
+        },
+    )
+
+
+def rating_daily_upsert(ratings: List[Dict]):
+    """
+    Single upsert folding just-inserted ratings ({movie_id, score, rated_at}) into the per-day
+    rollup, or None if there are none. Built from the inserted values, so no partition is read back.
+    """
+    scores_by_day: Dict[Tuple[int, date], List[int]] = {}
+    for rating in ratings:
+        scores_by_day.setdefault((rating["movie_id"], rating["rated_at"].date()), []).append(rating["score"])
+    if not scores_by_day:
+        return None
+    # Sorted so concurrent writers lock the rollup rows in the same order
+    stmt = pg_insert(MovieRatingDaily).values([
+        {"movie_id": movie_id, "day": day, "ratings_count": len(scores), "ratings_sum": sum(scores)}
+        for (movie_id, day), scores in sorted(scores_by_day.items())
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[MovieRatingDaily.movie_id, MovieRatingDaily.day],
+        set_={
+            "ratings_count": MovieRatingDaily.ratings_count + stmt.excluded.ratings_count,
+            "ratings_sum": MovieRatingDaily.ratings_sum + stmt.excluded.ratings_sum,
+        },
+    )
+
+
+def rating_monthly_upsert(ratings: List[Dict]):
+    """Single upsert adding ratings ({movie_id, score, rated_at}) to the monthly rollup, or None if there are none"""
+    scores_by_month: Dict[Tuple[int, date], List[int]] = {}
+    for rating in ratings:
+        scores_by_month.setdefault((rating["movie_id"], rating["rated_at"].date().replace(day=1)), []).append(rating["score"])
+    if not scores_by_month:
+        return None
+    stmt = pg_insert(MovieRatingMonthly).values([
+        {"movie_id": movie_id, "month": month, "ratings_count": len(scores), "ratings_sum": sum(scores), "histogram": score_histogram(scores)}
+        for (movie_id, month), scores in sorted(scores_by_month.items())
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[MovieRatingMonthly.movie_id, MovieRatingMonthly.month],
+        set_={
+            "ratings_count": MovieRatingMonthly.ratings_count + stmt.excluded.ratings_count,
+            "ratings_sum": MovieRatingMonthly.ratings_sum + stmt.excluded.ratings_sum,
+            "histogram": array([
+                MovieRatingMonthly.histogram[i] + stmt.excluded.histogram[i]
+                for i in range(1, RATING_SCALE + 1)
+            ]),
+        },
+    )
+
+
+def last_rolled_up_month_stmt() -> Select:
+    return select(func.max(RatingRollupMonth.month))
+
+
+def insert_ratings_stmt():
+    """Multi-row rating insert returning the stored rows in parameter order (rated_at may come from the server)"""
+    return insert(MovieRating).returning(
+        MovieRating.id, MovieRating.movie_id, MovieRating.score, MovieRating.rated_at, sort_by_parameter_order=True
+    )
+
+
+def existing_movie_ids_stmt(movie_ids, lock: bool = False) -> Select:
+    """Ids of the given movies that exist; `lock` holds them (FOR KEY SHARE) against deletion until commit"""
+    stmt = select(Movie.id).where(Movie.id.in_(movie_ids))
+    if lock:
+        stmt = stmt.order_by(Movie.id).with_for_update(key_share=True)
+    return stmt
+
+
+def group_scores(ratings: List[Dict]) -> Dict[int, List[int]]:
+    """Group rating rows ({movie_id, score, ...}) into scores per movie for rating_stats_upsert"""
+    scores_by_movie: Dict[int, List[int]] = {}
+    for rating in ratings:
+        scores_by_movie.setdefault(rating["movie_id"], []).append(rating["score"])
+    return scores_by_movie
+
+
+def add_months(month: date, count: int) -> date:
+    """The first day of the month `count` months after `month` (which must be a first day)"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def score_histogram_columns(score_column) -> list:
+    """Per-score rating counts as an int[] aggregate, matching the histogram column layout"""
+    return array([
+        cast(func.count().filter(score_column == score), Integer)
+        for score in range(1, RATING_SCALE + 1)
+    ])
+
+
+def monthly_rollup_stmt(before: date, since: Optional[date] = None) -> Select:
+    """Per-movie, per-month aggregates of the raw ratings in [since, before), in movie_rating_monthly's columns"""
+    month = cast(func.date_trunc("month", MovieRating.rated_at), Date)
+    stmt = select(
+        MovieRating.movie_id,
+        month,
+        func.count(MovieRating.id),
+        func.sum(MovieRating.score),
+        score_histogram_columns(MovieRating.score),
+    ).where(MovieRating.rated_at < before).group_by(MovieRating.movie_id, month)
+    if since is not None:
+        stmt = stmt.where(MovieRating.rated_at >= since)
+    return stmt
+
+
+def rating_stats_for_movies_stmt(movie_ids: List[int]) -> Select:
+    return select(MovieRatingStats).where(MovieRatingStats.movie_id.in_(movie_ids))
+
+
+def ratings_for_movie_stmt(movie_id: int) -> Select:
+    """A movie's ratings newest first; id breaks ties so the order is total"""
+    return select(MovieRating).where(MovieRating.movie_id == movie_id).order_by(
+        MovieRating.rated_at.desc(), MovieRating.id.desc()
+    )
+
+
+def ratings_after_stmt(movie_id: int, after: Optional[Tuple[datetime, int]], limit: int) -> Select:
+    """Keyset page of a movie's ratings after the (rated_at, id) of the last one seen"""
+    stmt = ratings_for_movie_stmt(movie_id)
+    if after is not None:
+        # Row comparison matches the (movie_id, rated_at, id) index, read backwards
+        stmt = stmt.where(tuple_(MovieRating.rated_at, MovieRating.id) < tuple_(*after))
+    return stmt.limit(limit)
+
+
+def rating_rows_stmt(movie_id: int) -> Select:
+    """Plain columns for streaming a movie's ratings without building ORM objects"""
+    return select(MovieRating.id, MovieRating.score, MovieRating.rated_at).where(
+        MovieRating.movie_id == movie_id
+    ).order_by(MovieRating.rated_at.desc(), MovieRating.id.desc())
+
+
+def top_rated_stmt(min_votes: int, limit: int, **filters) -> Select:
+    """Movies by plain average rating among those with at least `min_votes` ratings"""
+    score = MovieRatingStats.average_rating
+    stmt = select(
+        MovieRatingStats.movie_id, score.label("score"), MovieRatingStats.ratings_count
+    ).join(Movie, Movie.id == MovieRatingStats.movie_id).where(
+        MovieRatingStats.ratings_count >= min_votes
+    )
+    # Walks ix_movie_rating_stats_average_rating backwards until `limit` rows pass the filters; an
+    # incremental sort puts ties in ascending id order, as on the other boards
+    return filter_movies(stmt, **filters).order_by(score.desc(), MovieRatingStats.movie_id).limit(limit)
+
+
+def weighted_stmt(min_votes: int, limit: int, **filters) -> Select:
+    """
+    Movies by Bayesian average (ratings_sum + m * C) / (ratings_count + m), where m is
+    `min_votes` and C the mean of all ratings, among movies with at least m ratings.
+    Few votes pull a movie towards C, so a single 10/10 does not top the board.
+    """
+    mean = select(
+        func.sum(MovieRatingStats.ratings_sum) / cast(func.nullif(func.sum(MovieRatingStats.ratings_count), 0), Float)
+    ).scalar_subquery()
+    m = literal(min_votes)
+    score = (MovieRatingStats.ratings_sum + m * mean) / (MovieRatingStats.ratings_count + m)
+    stmt = select(
+        MovieRatingStats.movie_id, score.label("score"), MovieRatingStats.ratings_count
+    ).join(Movie, Movie.id == MovieRatingStats.movie_id).where(
+        MovieRatingStats.ratings_count >= min_votes
+    )
+    return filter_movies(stmt, **filters).order_by(score.desc(), MovieRatingStats.movie_id).limit(limit)
+
+
+def trending_stmt(days: int, limit: int, **filters) -> Select:
+    """Movies by rating velocity: ratings per day over the last `days` days (today included), from the daily rollup"""
+    window_count = func.sum(MovieRatingDaily.ratings_count)
+    stmt = select(
+        MovieRatingDaily.movie_id,
+        (window_count / cast(days, Float)).label("score"),
+        window_count.label("ratings_count"),
+    ).join(Movie, Movie.id == MovieRatingDaily.movie_id).where(
+        MovieRatingDaily.day > func.current_date() - days
+    ).group_by(MovieRatingDaily.movie_id)
+    return filter_movies(stmt, **filters).order_by(window_count.desc(), MovieRatingDaily.movie_id).limit(limit)
+
+
+def rating_trend_stmt(rollup, key_column, key: int, bucket: str, start: date, end: date) -> Select:
+    """
+    Ratings count and sum per bucket ("day", "week" or "month") from a per-day rollup, for days in
+    [start, end], oldest first. Reads one row per day at most, however many ratings there were.
+    """
+    bucket_start = cast(func.date_trunc(bucket, cast(rollup.day, TIMESTAMP)), Date).label("bucket_start")
+    return select(
+        bucket_start,
+        cast(func.sum(rollup.ratings_count), Integer).label("ratings_count"),
+        func.sum(rollup.ratings_sum).label("ratings_sum"),
+    ).where(key_column == key, rollup.day.between(start, end)).group_by(bucket_start).order_by(bucket_start)
+
+
+def movie_rating_trend_stmt(movie_id: int, bucket: str, start: date, end: date) -> Select:
+    return rating_trend_stmt(MovieRatingDaily, MovieRatingDaily.movie_id, movie_id, bucket, start, end)
+
+
+def genre_rating_trend_stmt(genre_id: int, bucket: str, start: date, end: date) -> Select:
+    return rating_trend_stmt(GenreRatingDaily, GenreRatingDaily.genre_id, genre_id, bucket, start, end)
+
+
+def genre_daily_rollup_stmt(since: Optional[date] = None) -> Select:
+    """Per-genre, per-day totals of movie_rating_daily (from `since` on), in genre_rating_daily's columns"""
+    stmt = select(
+        movie_genres.c.genre_id,
+        MovieRatingDaily.day,
+        func.sum(MovieRatingDaily.ratings_count),
+        func.sum(MovieRatingDaily.ratings_sum),
+    ).join(movie_genres, movie_genres.c.movie_id == MovieRatingDaily.movie_id).group_by(movie_genres.c.genre_id, MovieRatingDaily.day)
+    if since is not None:
+        stmt = stmt.where(MovieRatingDaily.day >= since)
+    return stmt
+
+
+def leaderboard_stmt(board: str, limit: int, min_votes: int = 0, days: int = 7, **filters) -> Select:
+    if board == "trending":
+        return trending_stmt(days, limit, **filters)
+    if board == "weighted":
+        return weighted_stmt(min_votes, limit, **filters)
+    return top_rated_stmt(min_votes, limit, **filters)
+
+
+def similar_movies_stmt(movie_id: int, limit: int) -> Select:
+    """(movie_id, score) of a movie's precomputed neighbours, best first: a primary key range scan"""
+    return select(
+        MovieSimilarity.similar_movie_id.label("movie_id"), MovieSimilarity.score
+    ).where(MovieSimilarity.movie_id == movie_id).order_by(MovieSimilarity.rank).limit(limit)
+
+
+def movies_by_ids_stmt(movie_ids: List[int]) -> Select:
+    """Movies with relations for a known set of ids (order is up to the caller)"""
+    return list_movies_stmt().where(Movie.id.in_(movie_ids))
@@ -1,8 +1,13 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, insert
-from app.models.models import Movie, MovieRating, Director, Genre, movie_genres
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, Integer, cast, func, insert, select, text, or_, union_all
+from sqlalchemy.dialects.postgresql import array
+from app.models.models import (
+    Movie, MovieRating, MovieRatingDaily, MovieRatingMonthly, MovieRatingStats, Director, Genre, GenreRatingDaily, movie_genres, RATING_SCALE,
+)
+from app.repositories import movie_queries as queries
 from app.schemas.schemas import MovieCreate, MovieUpdate
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
 
 class MovieRepository:
     """
@@ -13,28 +18,43 @@ class MovieRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_all(self, skip: int = 0, limit: int = 10, title: str = None, release_year: int = None, genre: str = None) -> List[Movie]:
-        """Fetch movies with pagination, filtering and relations"""
-        query = self.db.query(Movie).options(
-            joinedload(Movie.director),
-            joinedload(Movie.genres)
-        )
-        
-        if title:
-            query = query.filter(Movie.title.ilike(f"%{title}%"))
-        if release_year:
-            query = query.filter(Movie.release_year == release_year)
-        if genre:
-            query = query.join(Movie.genres).filter(Genre.name.ilike(f"%{genre}%"))
-        
-        return query.offset(skip).limit(limit).all()
+    def get_all(self, skip: int = 0, limit: int = 10, title: str = None, release_year: int = None, genre: str = None, sort: str = None) -> List[Movie]:
+        """Fetch movies with pagination, filtering, sorting and relations"""
+        stmt = queries.page_stmt(skip, limit, sort=sort, title=title, release_year=release_year, genre=genre)
+        return self.db.scalars(stmt).all()
 
+    def get_after(self, after: Optional[tuple], limit: int = 10, title: str = None, release_year: int = None, genre: str = None, sort: str = None) -> List[Movie]:
+        """Keyset pagination: fetch the next movies after `after`, the sort key values of the last movie seen"""
+        stmt = queries.after_stmt(after, limit, sort=sort, title=title, release_year=release_year, genre=genre)
+        return self.db.scalars(stmt).all()
+
+    def search(self, q: str, skip: int = 0, limit: int = 10) -> List[Movie]:
+        """Full-text search over title, director, cast and description, most relevant first"""
+        return self.db.scalars(queries.search_stmt(q, skip, limit)).all()
 
     def get_by_id(self, movie_id: int) -> Optional[Movie]:
-        return self.db.query(Movie).options(
-            joinedload(Movie.director),
-            joinedload(Movie.genres)
-        ).filter(Movie.id == movie_id).first()
+        return self.db.scalars(queries.movie_by_id_stmt(movie_id)).unique().first()
+
+    def get_version(self, movie_id: int):
+        """(version, ratings_count) for conditional requests, or None if the movie does not exist"""
+        return self.db.execute(queries.movie_version_stmt(movie_id)).first()
+
+    def movie_exists(self, movie_id: int) -> bool:
+        """Primary key probe without loading the movie or its relations"""
+        return self.db.scalar(queries.existing_movie_ids_stmt([movie_id])) is not None
+
+    def existing_movie_ids(self, movie_ids: Set[int]) -> Set[int]:
+        """The subset of movie_ids present in the database (one query)"""
+        if not movie_ids:
+            return set()
+        return set(self.db.scalars(queries.existing_movie_ids_stmt(movie_ids)))
+
+    def director_exists(self, director_id: int) -> bool:
+        return self.db.get(Director, director_id) is not None
+
+    def count_genres(self, genre_ids: List[int]) -> int:
+        """Number of the given genre ids that exist"""
+        return self.db.scalar(queries.count_genres_stmt(genre_ids))
 
     def create(self, movie_data: MovieCreate) -> Movie:
         # Add Movie
@@ -46,20 +66,55 @@ class MovieRepository:
             director_id=movie_data.director_id
         )
         self.db.add(new_movie)
-        self.db.commit()
-        self.db.refresh(new_movie)
+        # Flush for the id, then write the genre links in the same transaction
+        self.db.flush()
 
         # Add Genres (Many-to-Many)
         if movie_data.genre_ids:
-            for genre_id in movie_data.genre_ids:
-                # Use the table object for insert
-                stmt = insert(movie_genres).values(movie_id=new_movie.id, genre_id=genre_id)
-                self.db.execute(stmt)
-            self.db.commit()
-        
+            self.db.execute(queries.genre_links_insert(new_movie.id, movie_data.genre_ids))
+        self.db.commit()
+
         # Refresh to load relationships
         return self.get_by_id(new_movie.id)
 
+    def existing_director_ids(self, director_ids: Set[int]) -> Set[int]:
+        """The subset of director_ids present in the database (one query)"""
+        if not director_ids:
+            return set()
+        return set(self.db.scalars(select(Director.id).where(Director.id.in_(director_ids))))
+
+    def existing_genre_ids(self, genre_ids: Set[int]) -> Set[int]:
+        """The subset of genre_ids present in the database (one query)"""
+        if not genre_ids:
+            return set()
+        return set(self.db.scalars(select(Genre.id).where(Genre.id.in_(genre_ids))))
+
+    def bulk_create(self, movies: List[MovieCreate]) -> List[int]:
+        """Insert a batch of movies and their genre links with multi-row INSERTs in one transaction"""
+        if not movies:
+            return []
+        stmt = insert(Movie).returning(Movie.id, sort_by_parameter_order=True)
+        movie_ids = self.db.scalars(stmt, [
+            {
+                "title": movie.title,
+                "release_year": movie.release_year,
+                "cast": movie.cast,
+                "description": movie.description,
+                "director_id": movie.director_id,
+            }
+            for movie in movies
+        ]).all()
+
+        links = [
+            {"movie_id": movie_id, "genre_id": genre_id}
+            for movie_id, movie in zip(movie_ids, movies)
+            for genre_id in dict.fromkeys(movie.genre_ids)
+        ]
+        if links:
+            self.db.execute(insert(movie_genres), links)
+        self.db.commit()
+        return movie_ids
+
     def update(self, movie: Movie, movie_update: MovieUpdate) -> Movie:
         # Update basic fields
         update_data = movie_update.model_dump(exclude_unset=True)
@@ -67,16 +122,16 @@ class MovieRepository:
         
         for field, value in update_data.items():
             setattr(movie, field, value)
+        # Increment in SQL so concurrent updates never reuse a version
+        movie.version = Movie.version + 1
         
         # Update genres if provided
         if genre_ids is not None:
             # Remove existing genres
             self.db.execute(movie_genres.delete().where(movie_genres.c.movie_id == movie.id))
-            # Add new genres
+            # Add new genres in one multi-row insert
             if genre_ids:
-                for genre_id in genre_ids:
-                    stmt = insert(movie_genres).values(movie_id=movie.id, genre_id=genre_id)
-                    self.db.execute(stmt)
+                self.db.execute(queries.genre_links_insert(movie.id, genre_ids))
         
         self.db.commit()
         self.db.refresh(movie)
@@ -91,17 +146,214 @@ class MovieRepository:
     def add_rating(self, movie_id: int, score: int) -> MovieRating:
         rating = MovieRating(movie_id=movie_id, score=score)
         self.db.add(rating)
+        self.db.flush()
+        # Keep the aggregates in the same transaction as the raw row
+        self.apply_rating_stats({movie_id: [score]})
+        # rated_at is part of the primary key, so the flush has already read the server's value back
+        self.apply_rating_daily([{"movie_id": movie_id, "score": score, "rated_at": rating.rated_at}])
         self.db.commit()
         self.db.refresh(rating)
         return rating
 
-    def get_rating_stats(self, movie_id: int):
-        """Calculates avg and count using SQL for performance"""
-        return self.db.query(
-            func.avg(MovieRating.score).label("average"),
-            func.count(MovieRating.id).label("count")
-        ).filter(MovieRating.movie_id == movie_id).first()
+    def bulk_add_ratings(self, ratings: List[Dict]) -> int:
+        """
+        Insert many ratings ({movie_id, score[, rated_at]}) and fold them into the aggregates
+        in one transaction. Ratings for movies that no longer exist are skipped. Returns rows written.
+        """
+        movie_ids = {rating["movie_id"] for rating in ratings}
+        if not movie_ids:
+            return 0
+        # Lock the movies so none is deleted between this check and the insert
+        existing = set(self.db.scalars(queries.existing_movie_ids_stmt(movie_ids, lock=True)))
+        ratings = [rating for rating in ratings if rating["movie_id"] in existing]
+        if ratings:
+            inserted = [row._asdict() for row in self.db.execute(queries.insert_ratings_stmt(), ratings)]
+            self.apply_rating_stats(queries.group_scores(inserted))
+            self.apply_rating_daily(inserted)
+            self.apply_late_ratings(inserted)
+        self.db.commit()
+        return len(ratings)
+
+    def apply_rating_stats(self, scores_by_movie: Dict[int, List[int]]):
+        """Add new scores to the per-movie aggregates with a single upsert (no commit)"""
+        stmt = queries.rating_stats_upsert(scores_by_movie)
+        if stmt is not None:
+            self.db.execute(stmt)
+
+    def apply_rating_daily(self, ratings: List[Dict]):
+        """Add just-inserted ratings ({movie_id, score, rated_at}) to the per-day rollup (no commit)"""
+        stmt = queries.rating_daily_upsert(ratings)
+        if stmt is not None:
+            self.db.execute(stmt)
+
+    def apply_late_ratings(self, ratings: List[Dict]):
+        """
+        Add ratings dated before the rollup watermark (backdated imports) to the monthly rollup
+        as well, since aggregates no longer read those months raw (no commit).
+        Runs after the insert: a rollup in progress holds the month's partition until it commits.
+        """
+        watermark = self.rollup_watermark()
+        if watermark is None:
+            return
+        stmt = queries.rating_monthly_upsert([rating for rating in ratings if rating["rated_at"].date() < watermark])
+        if stmt is not None:
+            self.db.execute(stmt)
+
+    def rollup_watermark(self) -> Optional[date]:
+        """The first month not folded into movie_rating_monthly (None while none is); every older rating is in the rollup"""
+        last = self.db.scalar(queries.last_rolled_up_month_stmt())
+        return queries.add_months(last, 1) if last else None
+
+    def get_rating_stats(self, movie_id: int) -> Optional[MovieRatingStats]:
+        """Read the precomputed aggregates (primary key lookup, None if never rated)"""
+        return self.db.get(MovieRatingStats, movie_id)
+
+    def get_rating_stats_for_movies(self, movie_ids: List[int]) -> Dict[int, MovieRatingStats]:
+        """Batch-load aggregates for a page of movies in one query, keyed by movie id"""
+        if not movie_ids:
+            return {}
+        rows = self.db.scalars(queries.rating_stats_for_movies_stmt(movie_ids))
+        return {stats.movie_id: stats for stats in rows}
+
+    def _aggregate_ratings(self, watermark: Optional[date] = None):
+        """
+        Per-movie aggregates, including zero rows for unrated movies. With a rollup watermark, the
+        months before it are read from movie_rating_monthly and only later partitions raw.
+        """
+        raw = select(
+            MovieRating.movie_id,
+            func.sum(MovieRating.score).label("ratings_sum"),
+            func.count(MovieRating.id).label("ratings_count"),
+            queries.score_histogram_columns(MovieRating.score).label("histogram"),
+        ).group_by(MovieRating.movie_id)
+        if watermark is None:
+            ratings = raw.subquery()
+        else:
+            ratings = union_all(
+                raw.where(MovieRating.rated_at >= watermark),
+                select(MovieRatingMonthly.movie_id, MovieRatingMonthly.ratings_sum, MovieRatingMonthly.ratings_count, MovieRatingMonthly.histogram),
+            ).subquery()
+        return select(
+            Movie.id.label("movie_id"),
+            func.coalesce(func.sum(ratings.c.ratings_sum), 0).label("ratings_sum"),
+            cast(func.coalesce(func.sum(ratings.c.ratings_count), 0), Integer).label("ratings_count"),
+            array([
+                cast(func.coalesce(func.sum(ratings.c.histogram[score]), 0), Integer)
+                for score in range(1, RATING_SCALE + 1)
+            ]).label("histogram"),
+        ).outerjoin(ratings, ratings.c.movie_id == Movie.id).group_by(Movie.id)
+
+    def rebuild_rating_stats(self) -> int:
+        """
+        Recompute the monthly, daily and per-movie aggregates. Returns stats rows written.
+        Months before the rollup watermark are rebuilt from the raw ratings first, so the
+        per-movie aggregates then read them plus only the later partitions.
+        """
+        # Block concurrent rating inserts so no increment lands between the scan and the write
+        self.db.execute(text("LOCK TABLE movie_ratings IN SHARE MODE"))
+
+        # Months already rolled up are recomputed too, so a rebuild also repairs the monthly rollup
+        watermark = self.rollup_watermark()
+        if watermark is not None:
+            self.db.execute(MovieRatingMonthly.__table__.delete())
+            self.db.execute(insert(MovieRatingMonthly).from_select(
+                ["movie_id", "month", "ratings_count", "ratings_sum", "histogram"], queries.monthly_rollup_stmt(watermark)
+            ))
+
+        self.db.execute(MovieRatingStats.__table__.delete())
+        aggregates = self._aggregate_ratings(watermark)
+        stmt = insert(MovieRatingStats).from_select(
+            ["movie_id", "ratings_sum", "ratings_count", "histogram"], aggregates
+        )
+        result = self.db.execute(stmt)
+
+        # The daily rollup is derived from the same rows, so rebuild it under the same lock
+        self.db.execute(MovieRatingDaily.__table__.delete())
+        day = cast(MovieRating.rated_at, Date)
+        self.db.execute(insert(MovieRatingDaily).from_select(
+            ["movie_id", "day", "ratings_count", "ratings_sum"],
+            select(MovieRating.movie_id, day, func.count(MovieRating.id), func.sum(MovieRating.score))
+            .group_by(MovieRating.movie_id, day),
+        ))
+        self._write_genre_rating_daily()
+        self.db.commit()
+        return result.rowcount
+
+    def find_rating_stats_drift(self) -> list:
+        """Compare stored aggregates with the ratings (monthly rollups before the watermark) and return mismatching movies"""
+        actual = self._aggregate_ratings(self.rollup_watermark()).subquery()
+        stored = MovieRatingStats.__table__
+        query = select(
+            func.coalesce(stored.c.movie_id, actual.c.movie_id).label("movie_id"),
+            stored.c.ratings_count.label("stored_count"),
+            actual.c.ratings_count.label("actual_count"),
+            stored.c.ratings_sum.label("stored_sum"),
+            actual.c.ratings_sum.label("actual_sum"),
+        ).select_from(
+            stored.join(actual, stored.c.movie_id == actual.c.movie_id, full=True)
+        ).where(
+            or_(
+                # Every movie must have a row, and no row may outlive its movie
+                stored.c.movie_id.is_(None),
+                actual.c.movie_id.is_(None),
+                stored.c.ratings_count != actual.c.ratings_count,
+                stored.c.ratings_sum != actual.c.ratings_sum,
+                stored.c.histogram != actual.c.histogram,
+            )
+        ).order_by(text("movie_id"))
+        return self.db.execute(query).all()
 
     def get_ratings_for_movie(self, movie_id: int) -> List[MovieRating]:
         """Get all ratings for a specific movie"""
-        return self.db.query(MovieRating).filter(MovieRating.movie_id == movie_id).order_by(MovieRating.rated_at.desc()).all()
+        return self.db.scalars(queries.ratings_for_movie_stmt(movie_id)).all()
+
+    def get_ratings_after(self, movie_id: int, after: Optional[Tuple[datetime, int]], limit: int) -> List[MovieRating]:
+        """Keyset page of a movie's ratings, newest first, after the (rated_at, id) cursor"""
+        return self.db.scalars(queries.ratings_after_stmt(movie_id, after, limit)).all()
+
+    def get_leaderboard(self, board: str, limit: int, min_votes: int = 0, days: int = 7, **filters) -> list:
+        """(movie_id, score, ratings_count) rows of a leaderboard, best first"""
+        stmt = queries.leaderboard_stmt(board, limit, min_votes=min_votes, days=days, **filters)
+        return self.db.execute(stmt).all()
+
+    def get_movie_rating_trend(self, movie_id: int, bucket: str, start: date, end: date) -> list:
+        """(bucket_start, ratings_count, ratings_sum) rows for the buckets with ratings, oldest first"""
+        return self.db.execute(queries.movie_rating_trend_stmt(movie_id, bucket, start, end)).all()
+
+    def get_genre_rating_trend(self, genre_id: int, bucket: str, start: date, end: date) -> list:
+        """Same as get_movie_rating_trend, from the compacted genre rollup"""
+        return self.db.execute(queries.genre_rating_trend_stmt(genre_id, bucket, start, end)).all()
+
+    def compact_genre_rating_daily(self, since: Optional[date] = None) -> int:
+        """Recompute genre_rating_daily from movie_rating_daily for days from `since` on (every day if None). Returns rows written."""
+        written = self._write_genre_rating_daily(since)
+        self.db.commit()
+        return written
+
+    def _write_genre_rating_daily(self, since: Optional[date] = None) -> int:
+        stmt = GenreRatingDaily.__table__.delete()
+        if since is not None:
+            stmt = stmt.where(GenreRatingDaily.day >= since)
+        self.db.execute(stmt)
+        result = self.db.execute(insert(GenreRatingDaily).from_select(
+            ["genre_id", "day", "ratings_count", "ratings_sum"], queries.genre_daily_rollup_stmt(since)
+        ))
+        return result.rowcount
+
+    def get_similar(self, movie_id: int, limit: int) -> list:
+        """(movie_id, score) rows of the precomputed most similar movies, best first"""
+        return self.db.execute(queries.similar_movies_stmt(movie_id, limit)).all()
+
+    def get_by_ids(self, movie_ids: List[int]) -> List[Movie]:
+        """Movies with relations for the given ids, in no particular order"""
+        if not movie_ids:
+            return []
+        return self.db.scalars(queries.movies_by_ids_stmt(movie_ids)).all()
+
+    def get_facets(self, director_limit: int, title: str = None, release_year: int = None, genre: str = None) -> Dict[str, list]:
+        """Genre, director and decade counts: one grouped query each, every facet ignoring its own filter"""
+        return {
+            "genres": self.db.execute(queries.genre_facet_stmt(title=title, release_year=release_year)).all(),
+            "directors": self.db.execute(queries.director_facet_stmt(director_limit, title=title, release_year=release_year, genre=genre)).all(),
+            "decades": self.db.execute(queries.decade_facet_stmt(title=title, genre=genre)).all(),
+        }
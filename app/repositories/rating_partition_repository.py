@@ -0,0 +1,111 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, text
+from app.models.models import MovieRatingMonthly, RatingRollupMonth
+from app.repositories import movie_queries as queries
+from datetime import date
+from typing import Dict, List, Optional
+
+DEFAULT_PARTITION = "movie_ratings_default"
+
+
+def partition_name(month: date) -> str:
+    return f"movie_ratings_{month.year:04d}_{month.month:02d}"
+
+
+class RatingPartitionRepository:
+    """
+    Maintenance of the monthly movie_ratings partitions and of the per-movie monthly rollup.
+    Every method commits its own work, one month at a time.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_partitions(self) -> List[Dict]:
+        """Monthly partitions, oldest first: {name, month, rows (planner estimate), rolled_up}"""
+        rows = self.db.execute(text("""
+            SELECT child.relname AS name, child.reltuples AS rows FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'movie_ratings'::regclass ORDER BY child.relname
+        """)).all()
+        rolled_up = set(self.db.scalars(select(RatingRollupMonth.month)))
+        partitions = []
+        for row in rows:
+            if row.name == DEFAULT_PARTITION:
+                # Expected to stay empty, so an exact count is cheap and worth having
+                month, count = None, self.db.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}"))
+            else:
+                # reltuples is -1 until the first VACUUM/ANALYZE
+                month, count = date(int(row.name[-7:-3]), int(row.name[-2:]), 1), max(int(row.rows), 0)
+            partitions.append({"name": row.name, "month": month, "rows": count, "rolled_up": month in rolled_up})
+        return partitions
+
+    def partition_exists(self, month: date) -> bool:
+        return self.db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition_name(month)})
+
+    def create_partition(self, month: date) -> bool:
+        """
+        Create and attach the partition for `month`. Ratings for that month that already sit in
+        the default partition are moved into it first, since ATTACH refuses overlapping rows.
+        Returns False if it already existed.
+        """
+        if self.partition_exists(month):
+            return False
+        name, end = partition_name(month), queries.add_months(month, 1)
+        self.db.execute(text(f"CREATE TABLE {name} (LIKE movie_ratings INCLUDING DEFAULTS)"))
+        self.db.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE rated_at >= :start AND rated_at < :end RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), {"start": month, "end": end})
+        self.db.execute(text(f"ALTER TABLE movie_ratings ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{end}')"))
+        self.db.commit()
+        return True
+
+    def ensure_partitions(self, first: date, last: date) -> List[str]:
+        """Create every missing monthly partition from `first` through `last`; returns the names created"""
+        created = []
+        month = first.replace(day=1)
+        while month <= last:
+            if self.create_partition(month):
+                created.append(partition_name(month))
+            month = queries.add_months(month, 1)
+        return created
+
+    def rollup_watermark(self) -> Optional[date]:
+        last = self.db.scalar(queries.last_rolled_up_month_stmt())
+        return queries.add_months(last, 1) if last else None
+
+    def oldest_rating_month(self) -> Optional[date]:
+        return self.db.scalar(text("SELECT date_trunc('month', min(rated_at))::date FROM movie_ratings"))
+
+    def oldest_default_month(self) -> Optional[date]:
+        """Month of the oldest rating left in the default partition (None if it is empty)"""
+        return self.db.scalar(text(f"SELECT date_trunc('month', min(rated_at))::date FROM {DEFAULT_PARTITION}"))
+
+    def rollup_month(self, month: date) -> int:
+        """
+        Fold one closed month into movie_rating_monthly and record it, so aggregates stop reading
+        its partition. The month's rows are locked against writes meanwhile. Returns rollup rows written.
+        """
+        table = partition_name(month) if self.partition_exists(month) else DEFAULT_PARTITION
+        self.db.execute(text(f"LOCK TABLE {table} IN SHARE MODE"))
+        # Late writes for this month may already have been folded in; recompute from the raw rows
+        self.db.execute(delete(MovieRatingMonthly).where(MovieRatingMonthly.month == month))
+        result = self.db.execute(insert(MovieRatingMonthly).from_select(
+            ["movie_id", "month", "ratings_count", "ratings_sum", "histogram"],
+            queries.monthly_rollup_stmt(queries.add_months(month, 1), month),
+        ))
+        self.db.execute(insert(RatingRollupMonth).values(month=month))
+        self.db.commit()
+        return result.rowcount
+
+    def rollup_closed(self, closed_before: date) -> Dict[date, int]:
+        """Roll up every month before `closed_before` past the watermark, oldest first; {month: rows written}"""
+        month = self.rollup_watermark() or self.oldest_rating_month()
+        written = {}
+        while month is not None and month < closed_before:
+            written[month] = self.rollup_month(month)
+            month = queries.add_months(month, 1)
+        return written
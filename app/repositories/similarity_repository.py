@@ -0,0 +1,87 @@
+import io
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, select
+from app.models.models import Movie, MovieRatingStats, MovieSimilarity, movie_genres
+from typing import Dict, Iterable, List, Tuple
+
+# (similar_movie_id, score) pairs, best first
+Neighbours = List[Tuple[int, float]]
+
+
+class MovieSimilarityRepository:
+    """
+    Reads the catalog features the similarity job needs and writes its neighbour lists.
+    Lookups for the API go through MovieRepository.get_similar.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_features(self) -> Tuple[list, list, list]:
+        """
+        (movie_id, director_id) rows ordered by movie id, (movie_id, genre_id) links and
+        (movie_id, ratings_count, histogram) rows for every movie, all read in one REPEATABLE
+        READ snapshot so a movie created in between cannot appear in only some of them
+        """
+        connection = self.db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        try:
+            movies = connection.execute(select(Movie.id, Movie.director_id).order_by(Movie.id)).all()
+            genres = connection.execute(select(movie_genres.c.movie_id, movie_genres.c.genre_id)).all()
+            ratings = connection.execute(select(MovieRatingStats.movie_id, MovieRatingStats.ratings_count, MovieRatingStats.histogram)).all()
+        finally:
+            # Don't hold the snapshot open while the scores are computed
+            self.db.rollback()
+        return movies, genres, ratings
+
+    def get_list_sizes(self) -> Dict[int, Tuple[int, float]]:
+        """{movie_id: (neighbours stored, lowest stored score)} for movies that have a list"""
+        rows = self.db.execute(
+            select(MovieSimilarity.movie_id, func.count(), func.min(MovieSimilarity.score)).group_by(MovieSimilarity.movie_id)
+        )
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def get_lists(self, movie_ids: Iterable[int]) -> Dict[int, Neighbours]:
+        lists: Dict[int, Neighbours] = {}
+        rows = self.db.execute(
+            select(MovieSimilarity.movie_id, MovieSimilarity.similar_movie_id, MovieSimilarity.score)
+            .where(MovieSimilarity.movie_id.in_(list(movie_ids)))
+            .order_by(MovieSimilarity.movie_id, MovieSimilarity.rank)
+        )
+        for movie_id, similar_movie_id, score in rows:
+            lists.setdefault(movie_id, []).append((similar_movie_id, score))
+        return lists
+
+    def replace_all(self, lists: Iterable[Tuple[int, Neighbours]]) -> int:
+        """
+        Swap in a complete set of lists with COPY, in one transaction: readers keep the old
+        lists until it commits. Returns rows written.
+        """
+        self.db.execute(delete(MovieSimilarity))
+        buffer, written = io.StringIO(), 0
+        for movie_id, neighbours in lists:
+            for rank, (similar_movie_id, score) in enumerate(neighbours, start=1):
+                buffer.write(f"{movie_id}\t{rank}\t{similar_movie_id}\t{score:.6f}\n")
+            written += len(neighbours)
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert("COPY movie_similarities (movie_id, rank, similar_movie_id, score) FROM STDIN", buffer)
+        finally:
+            cursor.close()
+        self.db.commit()
+        return written
+
+    def replace_lists(self, lists: Dict[int, Neighbours]) -> int:
+        """Rewrite the lists of the given movies only. Returns rows written."""
+        if not lists:
+            return 0
+        self.db.execute(delete(MovieSimilarity).where(MovieSimilarity.movie_id.in_(list(lists))))
+        rows = [
+            {"movie_id": movie_id, "rank": rank, "similar_movie_id": similar_movie_id, "score": score}
+            for movie_id in sorted(lists)
+            for rank, (similar_movie_id, score) in enumerate(lists[movie_id], start=1)
+        ]
+        if rows:
+            self.db.execute(insert(MovieSimilarity), rows)
+        self.db.commit()
+        return len(rows)
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
-from datetime import datetime
+from typing import Generic, List, Optional, TypeVar
+from datetime import date, datetime
+
+T = TypeVar("T")
 
 # --- Response Standard ---
 class ResponseBase(BaseModel):
@@ -8,6 +10,18 @@ class ResponseBase(BaseModel):
     data: Optional[dict | list] = None
     error: Optional[str] = None
 
+class DataResponse(BaseModel, Generic[T]):
+    """Typed success envelope: {"status": "success", "data": ...}"""
+    status: str = "success"
+    data: T
+
+class PageResponse(DataResponse[List[T]], Generic[T]):
+    # Only set when paging by cursor; null on the last page
+    next_cursor: Optional[str] = None
+
+class Message(BaseModel):
+    message: str
+
 # --- Models ---
 
 class GenreResponse(BaseModel):
@@ -50,12 +64,81 @@ class MovieResponse(MovieBase):
     class Config:
         from_attributes = True
 
+class LeaderboardEntry(BaseModel):
+    rank: int
+    # Average, Bayesian average or ratings per day, depending on the board
+    score: float
+    # Ratings behind the score (for trending: ratings within the window)
+    ratings_count: int
+    movie: MovieResponse
+
+class SimilarMovie(BaseModel):
+    # Weighted genre overlap, shared director and rating-profile similarity; 1.0 at most
+    score: float
+    movie: MovieResponse
+
+class FacetCount(BaseModel):
+    id: int
+    name: str
+    count: int
+
+class DecadeCount(BaseModel):
+    decade: int
+    count: int
+
+class MovieFacets(BaseModel):
+    genres: List[FacetCount]
+    directors: List[FacetCount]
+    decades: List[DecadeCount]
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
+
 class RatingCreate(BaseModel):
     score: int = Field(..., ge=1, le=10)
 
+class RatingBatchItem(BaseModel):
+    movie_id: int
+    score: int = Field(..., ge=1, le=10)
+
+class RatingBatchCreate(BaseModel):
+    ratings: List[RatingBatchItem] = Field(..., min_length=1, max_length=10000)
+
 class RatingResponse(BaseModel):
     id: int
     score: int
     rated_at: datetime
     class Config:
         from_attributes = True
+
+class TrendBucket(BaseModel):
+    # First day of the bucket (weeks start on Monday)
+    start: date
+    ratings_count: int
+    # None for buckets without ratings
+    average_rating: Optional[float] = None
+
+class RatingTrend(BaseModel):
+    bucket: str
+    start: date
+    end: date
+    # Every bucket in the range, oldest first, including empty ones
+    buckets: List[TrendBucket]
+
+class RatingBatchRejection(BaseModel):
+    index: int
+    movie_id: int
+    error: str
+
+class RatingBatchResult(BaseModel):
+    accepted: int
+    rejected: List[RatingBatchRejection]
+    # True when the ratings were queued by the write-behind buffer rather than written
+    queued: bool
@@ -0,0 +1,198 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.repositories.async_movie_repository import AsyncMovieRepository
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from app.services.movie_service import (
+    MovieService, to_movie_response, to_rating_responses, parse_movie_cursor, parse_ratings_cursor, ratings_buffered, enqueue_ratings, split_rating_batch,
+    leaderboard_entries, facets_response, trend_buckets, rating_trend, similar_movies, movie_responses, split_page, movie_page,
+    ratings_page, movie_not_found, check_director, check_genres, check_genre, movie_etag, ratings_etag, facets_key, movie_created,
+    movie_updated, detail_etag, movie_deleted, rating_added, rating_batch_result,
+)
+from app.services.rating_buffer import rating_buffer
+from app.schemas.schemas import MovieCreate, MovieResponse, MovieUpdate, RatingBatchItem, RatingTrend, SimilarMovie
+from app.core.logger import get_logger
+from app.core.config import settings
+from app.services.movie_cache import movie_cache, movie_fields, list_key, leaderboard_key, get_leaderboard, put_leaderboard
+
+logger = get_logger("app.services")
+
+class AsyncMovieService:
+    """
+    Business Logic Layer on an AsyncSession.
+    Same behaviour as MovieService, whose module-level helpers hold everything but the
+    repository calls; every method is a coroutine.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.repo = AsyncMovieRepository(db)
+        self.cache_lag = settings.REPLICA_MAX_LAG_SECONDS if db.info.get("replica") else 0
+
+    async def get_movies(self, page: int, page_size: int, title: str = None, release_year: int = None, genre: str = None, sort: str = None):
+        key = list_key(page, page_size, title=title, release_year=release_year, genre=genre, sort=sort)
+        cached = movie_cache.get_list(key)
+        if cached is not None:
+            return cached
+
+        token = movie_cache.token(self.cache_lag)
+        movies = await self.repo.get_all(skip=(page - 1) * page_size, limit=page_size, title=title, release_year=release_year, genre=genre, sort=sort)
+        results = movie_responses(movies, await self.repo.get_rating_stats_for_movies([movie.id for movie in movies]))
+        movie_cache.put_list(key, results, token)
+        return results
+
+    async def get_movies_after(self, cursor: str, page_size: int, title: str = None, release_year: int = None, genre: str = None, sort: str = None):
+        after = parse_movie_cursor(cursor, sort)
+        movies, has_more = split_page(
+            await self.repo.get_after(after, limit=page_size + 1, title=title, release_year=release_year, genre=genre, sort=sort), page_size
+        )
+        return movie_page(movies, await self.repo.get_rating_stats_for_movies([movie.id for movie in movies]), has_more, sort)
+
+    async def search_movies(self, q: str, page: int, page_size: int):
+        movies = await self.repo.search(q, skip=(page - 1) * page_size, limit=page_size)
+        return movie_responses(movies, await self.repo.get_rating_stats_for_movies([movie.id for movie in movies]))
+
+    async def get_facets(self, director_limit: int, title: str = None, release_year: int = None, genre: str = None):
+        key = facets_key(director_limit, title=title, release_year=release_year, genre=genre)
+        cached = movie_cache.get_facets(key) if key else None
+        if cached is not None:
+            return cached
+
+        token = movie_cache.token(self.cache_lag)
+        facets = facets_response(await self.repo.get_facets(director_limit, title=title, release_year=release_year, genre=genre))
+        if key:
+            movie_cache.put_facets(key, facets, token)
+        return facets
+
+    async def get_leaderboard(self, board: str, limit: int, min_votes: int = 0, days: int = 7, genre: str = None, release_year: int = None):
+        key = leaderboard_key(board, limit, min_votes, days, genre=genre, release_year=release_year)
+        cached = get_leaderboard(key)
+        if cached is not None:
+            return cached
+
+        rows = await self.repo.get_leaderboard(board, limit, min_votes=min_votes, days=days, genre=genre, release_year=release_year)
+        movie_ids = [row.movie_id for row in rows]
+        movies = await self.repo.get_by_ids(movie_ids)
+        entries = leaderboard_entries(rows, movies, await self.repo.get_rating_stats_for_movies(movie_ids))
+        put_leaderboard(key, entries)
+        return entries
+
+    async def get_similar_movies(self, movie_id: int, limit: int) -> List[SimilarMovie]:
+        rows = await self.repo.get_similar(movie_id, limit)
+        if not rows and not await self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "similar movies")
+        movie_ids = [row.movie_id for row in rows]
+        movies = await self.repo.get_by_ids(movie_ids)
+        return similar_movies(rows, movies, await self.repo.get_rating_stats_for_movies(movie_ids))
+
+    async def get_movie_etag(self, movie_id: int) -> str:
+        return movie_etag(movie_id, await self.repo.get_version(movie_id))
+
+    async def get_ratings_etag(self, movie_id: int) -> str:
+        return ratings_etag(movie_id, await self.repo.get_version(movie_id))
+
+    async def get_movie_detail(self, movie_id: int, etag: str) -> Tuple[MovieResponse, str]:
+        cached = movie_cache.get_detail(movie_id, etag)
+        if cached is not None:
+            return cached, etag
+
+        token = movie_cache.token(self.cache_lag)
+        movie = await self.repo.get_by_id(movie_id)
+        if not movie:
+            raise movie_not_found(movie_id)
+        stats = await self.repo.get_rating_stats(movie.id)
+        movie_response, etag = to_movie_response(movie, stats), detail_etag(movie, stats)
+        movie_cache.put_detail(movie_id, movie_response, etag, token)
+        return movie_response, etag
+
+    async def create_movie(self, movie_in: MovieCreate):
+        check_director(await self.repo.director_exists(movie_in.director_id), movie_in.director_id)
+        check_genres(await self.repo.count_genres(movie_in.genre_ids), movie_in.genre_ids)
+        return movie_created(await self.repo.create(movie_in))
+
+    async def update_movie(self, movie_id: int, movie_update: MovieUpdate):
+        movie = await self.repo.get_by_id(movie_id)
+        if not movie:
+            raise movie_not_found(movie_id, "update")
+        if movie_update.director_id:
+            check_director(await self.repo.director_exists(movie_update.director_id), movie_update.director_id, " for update")
+        if movie_update.genre_ids:
+            check_genres(await self.repo.count_genres(movie_update.genre_ids), movie_update.genre_ids, " for update")
+
+        before = movie_fields(movie)
+        updated_movie = await self.repo.update(movie, movie_update)
+        return movie_updated(before, updated_movie, await self.repo.get_rating_stats(updated_movie.id))
+
+    async def delete_movie(self, movie_id: int):
+        movie = await self.repo.get_by_id(movie_id)
+        if not movie:
+            raise movie_not_found(movie_id, "deletion")
+        before = movie_fields(movie)
+        await self.repo.delete(movie)
+        movie_deleted(before)
+
+    async def _enqueue_ratings(self, ratings):
+        # Only block (in a worker thread) when the buffer has no room right now
+        if not rating_buffer.try_submit(ratings):
+            await run_in_threadpool(enqueue_ratings, ratings)
+
+    async def rate_movie(self, movie_id: int, score: int):
+        if not await self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "rating")
+        if ratings_buffered():
+            await self._enqueue_ratings([(movie_id, score)])
+            return None
+        rating = await self.repo.add_rating(movie_id, score)
+        rating_added(rating)
+        return rating
+
+    async def rate_movies_batch(self, ratings: List[RatingBatchItem]) -> Dict:
+        accepted, rejected = split_rating_batch(ratings, await self.repo.existing_movie_ids({rating.movie_id for rating in ratings}))
+        if ratings_buffered():
+            if accepted:
+                await self._enqueue_ratings([(rating["movie_id"], rating["score"]) for rating in accepted])
+            written = len(accepted)
+        else:
+            written = await self.repo.bulk_add_ratings(accepted)
+        return rating_batch_result(ratings, accepted, rejected, written)
+
+    async def get_movie_ratings(self, movie_id: int):
+        if not await self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "ratings retrieval")
+        ratings = await self.repo.get_ratings_for_movie(movie_id)
+        logger.info(f"Retrieved {len(ratings)} ratings for movie: {movie_id}")
+        return to_rating_responses(ratings)
+
+    async def get_movie_rating_trend(self, movie_id: int, bucket: str, start: Optional[date] = None, end: Optional[date] = None) -> RatingTrend:
+        starts, end = trend_buckets(bucket, start, end)
+        if not await self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "rating trend")
+        return rating_trend(bucket, starts, end, await self.repo.get_movie_rating_trend(movie_id, bucket, starts[0], end))
+
+    async def get_genre_rating_trend(self, genre_id: int, bucket: str, start: Optional[date] = None, end: Optional[date] = None) -> RatingTrend:
+        starts, end = trend_buckets(bucket, start, end)
+        check_genre(await self.repo.count_genres([genre_id]), genre_id, "rating trend")
+        return rating_trend(bucket, starts, end, await self.repo.get_genre_rating_trend(genre_id, bucket, starts[0], end))
+
+    async def get_movie_ratings_after(self, movie_id: int, cursor: str, page_size: int):
+        after = parse_ratings_cursor(cursor)
+        if not await self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "ratings retrieval")
+        return ratings_page(*split_page(await self.repo.get_ratings_after(movie_id, after, limit=page_size + 1), page_size))
+
+
+class ThreadedMovieService:
+    """
+    Exposes a sync MovieService through the async interface by running each call
+    in the threadpool, so the same async controllers serve both DB_ASYNC modes.
+    """
+
+    def __init__(self, service: MovieService):
+        self._service = service
+
+    def __getattr__(self, name: str):
+        method = getattr(self._service, name)
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(method, *args, **kwargs)
+
+        return call
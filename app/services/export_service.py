@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.repositories import movie_queries as queries
+from app.core.logger import get_logger
+
+logger = get_logger("app.services.export")
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+EXPORT_FIELDS = (
+    "id", "title", "release_year", "cast", "description",
+    "director_id", "director", "genre_ids", "genres",
+    "ratings_count", "average_rating",
+)
+
+
+def _record(row) -> Dict:
+    average = round(row.ratings_sum / row.ratings_count, 1) if row.ratings_count else 0.0
+    return {
+        "id": row.id,
+        "title": row.title,
+        "release_year": row.release_year,
+        "cast": row.cast,
+        "description": row.description,
+        "director_id": row.director_id,
+        "director": row.director,
+        "genre_ids": row.genre_ids,
+        "genres": row.genres,
+        "ratings_count": row.ratings_count,
+        "average_rating": average,
+    }
+
+
+class MovieExportService:
+    """
+    Streams the catalog as NDJSON or CSV straight from a server-side cursor.
+    Rows are plain tuples (no ORM objects or Pydantic models) and are encoded one
+    fetch batch at a time, so memory stays flat however many movies are exported.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, batch_size: int = 1000):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    def iter_export(self, fmt: str = "ndjson", **filters) -> Iterator[str]:
+        """
+        Generator of text chunks. It opens its own session so it can outlive the request
+        handler, and reads everything in one REPEATABLE READ snapshot.
+        """
+        encode = self._encode_csv if fmt == "csv" else self._encode_ndjson
+        exported = 0
+        with self.session_factory() as db:
+            connection = db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            stmt = queries.export_movies_stmt(**filters).execution_options(yield_per=self.batch_size)
+            result = connection.execute(stmt)
+
+            if fmt == "csv":
+                yield ",".join(EXPORT_FIELDS) + "\r\n"
+            for rows in result.partitions():
+                exported += len(rows)
+                yield encode(rows)
+        logger.info(f"Movie export finished: format={fmt}, rows={exported}")
+
+    def _encode_ndjson(self, rows) -> str:
+        return "".join(json.dumps(_record(row), ensure_ascii=False) + "\n" for row in rows)
+
+    def _encode_csv(self, rows) -> str:
+        # Same layout the importer reads: genre lists are joined with '|'
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            record = _record(row)
+            record["genre_ids"] = "|".join(str(genre_id) for genre_id in record["genre_ids"])
+            record["genres"] = "|".join(record["genres"])
+            writer.writerow(record[field] for field in EXPORT_FIELDS)
+        return buffer.getvalue()
+
+    def open_ratings(self, movie_id: int) -> Tuple[Optional[Row], Iterator[str]]:
+        """
+        (version, NDJSON chunks) of one movie's ratings, newest first, from a server-side cursor.
+        Both are read in one REPEATABLE READ snapshot, so an ETag built from the (version,
+        ratings_count) row describes exactly the streamed body, whichever replica this session
+        landed on. The version is None, and nothing is streamed, if the movie does not exist.
+        """
+        db = self.session_factory()
+        try:
+            connection = db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            version = connection.execute(queries.movie_version_stmt(movie_id)).first()
+        except BaseException:
+            db.close()
+            raise
+        if version is None:
+            db.close()
+            return None, iter(())
+        return version, self._iter_ratings(db, connection, movie_id)
+
+    def _iter_ratings(self, db: Session, connection, movie_id: int) -> Iterator[str]:
+        with db:
+            stmt = queries.rating_rows_stmt(movie_id).execution_options(yield_per=self.batch_size)
+            for rows in connection.execute(stmt).partitions():
+                yield "".join(
+                    json.dumps({"id": row.id, "score": row.score, "rated_at": row.rated_at.isoformat()}) + "\n"
+                    for row in rows
+                )
@@ -0,0 +1,125 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.repositories.movie_repository import MovieRepository
+from app.schemas.schemas import MovieCreate
+from app.services.movie_cache import movie_cache
+from app.core.logger import get_logger
+
+logger = get_logger("app.services.import")
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# Keep the report bounded even if every row of a huge file is bad
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    failed: int = 0
+    errors: List[Dict] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self) -> Dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _parse_ndjson(lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+def _parse_csv(lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+    """CSV with a header row; genre_ids are separated by '|' (e.g. "1|4|7")"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        if not any(row.values()):
+            continue
+        record = {key: (value if value != "" else None) for key, value in row.items() if key}
+        genre_ids = record.get("genre_ids")
+        record["genre_ids"] = [part for part in genre_ids.split("|") if part.strip()] if genre_ids else []
+        yield reader.line_num, record
+
+
+class MovieImportService:
+    """
+    Streams movies from NDJSON or CSV into the database in batches.
+    Rows are validated individually; a bad row is reported and skipped, never aborting the import.
+    """
+
+    def __init__(self, db: Session, batch_size: int = 1000):
+        self.repo = MovieRepository(db)
+        self.db = db
+        self.batch_size = batch_size
+
+    def import_lines(self, lines: Iterable[str], fmt: str = "ndjson") -> ImportReport:
+        """Consume an iterator of text lines; memory use is bounded by one batch"""
+        parse = _parse_csv if fmt == "csv" else _parse_ndjson
+        report = ImportReport()
+        batch: List[Tuple[int, MovieCreate]] = []
+
+        for line_no, record in parse(lines):
+            if isinstance(record, Exception):
+                report.add_error(line_no, f"Malformed {fmt} row: {record}")
+                continue
+            try:
+                batch.append((line_no, MovieCreate.model_validate(record)))
+            except ValidationError as e:
+                report.add_error(line_no, "; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch, report)
+                batch = []
+
+        if batch:
+            self._import_batch(batch, report)
+
+        if report.imported:
+            # New rows can land on any cached list page
+            movie_cache.invalidate_lists()
+        logger.info(f"Movie import finished: imported={report.imported}, failed={report.failed}")
+        return report
+
+    def _import_batch(self, batch: List[Tuple[int, MovieCreate]], report: ImportReport):
+        # Validation: check every referenced director and genre with one query each
+        directors = self.repo.existing_director_ids({movie.director_id for _, movie in batch})
+        genres = self.repo.existing_genre_ids({genre_id for _, movie in batch for genre_id in movie.genre_ids})
+
+        valid: List[Tuple[int, MovieCreate]] = []
+        for line_no, movie in batch:
+            if movie.director_id not in directors:
+                report.add_error(line_no, f"Director not found: {movie.director_id}")
+            elif any(genre_id not in genres for genre_id in movie.genre_ids):
+                report.add_error(line_no, f"One or more genres invalid: {movie.genre_ids}")
+            else:
+                valid.append((line_no, movie))
+
+        try:
+            self.repo.bulk_create([movie for _, movie in valid])
+            report.imported += len(valid)
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Movie import batch failed: {e}")
+            for line_no, _ in valid:
+                report.add_error(line_no, "Database error while inserting batch")
@@ -0,0 +1,274 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.schemas.schemas import MovieResponse
+
+# Write stamps are tracked per hash slot of the movie id, so memory stays bounded
+# (a collision only makes a cache fill skip, never serve stale data)
+_STAMP_SLOTS = 4096
+
+
+# Any new rating can move a movie across pages of these sorts, so their pages are not cached
+_RATING_SORTS = ("average_rating", "ratings_count")
+
+
+class ListKey(NamedTuple):
+    """Normalized list_movies filters; equal requests share one cache entry"""
+    page: int
+    page_size: int
+    title: Optional[str]
+    release_year: Optional[int]
+    genre: Optional[str]
+    sort: Optional[str] = None
+
+
+class FacetsKey(NamedTuple):
+    """Facet counts of the unfiltered catalog (the only facets that are cached)"""
+    director_limit: int
+
+
+class MovieFields(NamedTuple):
+    """The fields the list filters look at, captured before and after a write"""
+    id: int
+    title: str
+    release_year: int
+    genres: Tuple[str, ...]
+
+
+def list_key(page: int, page_size: int, title: str = None, release_year: int = None, genre: str = None, sort: str = None) -> ListKey:
+    title = title.strip().lower() if title else None
+    genre = genre.strip().lower() if genre else None
+    return ListKey(page, page_size, title or None, release_year or None, genre or None, sort or None)
+
+
+def _cacheable(key: ListKey) -> bool:
+    return not key.sort or key.sort.lstrip("-") not in _RATING_SORTS
+
+
+def movie_fields(movie) -> MovieFields:
+    """Snapshot of a Movie or MovieResponse for filter matching"""
+    return MovieFields(movie.id, movie.title, movie.release_year, tuple(genre.name for genre in movie.genres))
+
+
+def _contains(pattern: str, value: str) -> bool:
+    """Python equivalent of ILIKE '%pattern%' (LIKE wildcards in the pattern are treated as a match)"""
+    if "%" in pattern or "_" in pattern:
+        return True
+    return pattern in value.lower()
+
+
+def _matches(key: ListKey, movie: MovieFields) -> bool:
+    if key.title and not _contains(key.title, movie.title):
+        return False
+    if key.release_year and key.release_year != movie.release_year:
+        return False
+    if key.genre and not any(_contains(key.genre, name) for name in movie.genres):
+        return False
+    return True
+
+
+def leaderboard_key(board: str, limit: int, min_votes: int, days: int, genre: str = None, release_year: int = None) -> tuple:
+    genre = genre.strip().lower() if genre else None
+    return ("leaderboard", board, limit, min_votes, days, genre or None, release_year or None)
+
+
+def _estimate_size(response: MovieResponse) -> int:
+    """Rough in-memory size of a cached response, in bytes"""
+    text = len(response.title) + len(response.cast or "") + len(response.description or "")
+    return 600 + 2 * text + 200 * len(response.genres)
+
+
+class MovieCache:
+    """
+    Read-through cache for movie detail and list pages.
+    Writes evict only the entries they can affect. Entries live in this process only,
+    so with several workers the TTL bounds how stale another worker's copy can get.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.enabled = enabled
+        self._cache = LRUCache(max_entries, max_bytes, ttl_seconds, on_remove=self._forget)
+        self._lock = self._cache.lock
+        self._lists_by_movie: Dict[int, Set[ListKey]] = {}
+        self._writes = 0
+        self._list_stamp = 0
+        self._stamps = [0] * _STAMP_SLOTS
+        # (monotonic time, write counter) of recent writes, for tokens of lagging replica reads
+        self._recent: Deque[Tuple[float, int]] = deque(maxlen=1024)
+
+    def token(self, lag: float = 0) -> int:
+        """
+        Taken before reading from the database; a fill is dropped if a write happened since.
+        A read from a replica passes its worst-case `lag`: writes from that window may not
+        be visible to it yet, so they count as happening after the token.
+        """
+        if lag <= 0:
+            return self._writes
+        cutoff = time.monotonic() - lag
+        token = self._writes
+        for at, writes in reversed(self._recent):
+            if at <= cutoff:
+                break
+            token = writes - 1
+        return token
+
+    def get_detail(self, movie_id: int, etag: str) -> Optional[MovieResponse]:
+        """
+        The cached detail if it was built at the version `etag` names. Writes from other
+        workers do not evict this cache, so an entry at another version is never served
+        under `etag`: the body and its ETag must describe the same row.
+        """
+        if not self.enabled:
+            return None
+        entry = self._cache.get(("movie", movie_id))
+        if entry is None or entry[0] != etag:
+            return None
+        return entry[1]
+
+    def put_detail(self, movie_id: int, response: MovieResponse, etag: str, token: int):
+        """Cache a detail together with the ETag of the rows it was built from"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._stamps[movie_id % _STAMP_SLOTS] > token:
+                return
+            self._cache.set(("movie", movie_id), (etag, response), _estimate_size(response))
+
+    def get_list(self, key: ListKey) -> Optional[List[MovieResponse]]:
+        if not self.enabled or not _cacheable(key):
+            return None
+        return self._cache.get(key)
+
+    def put_list(self, key: ListKey, results: List[MovieResponse], token: int):
+        if not self.enabled or not _cacheable(key):
+            return
+        with self._lock:
+            if self._list_stamp > token or any(self._stamps[r.id % _STAMP_SLOTS] > token for r in results):
+                return
+            self._cache.set(key, results, sum(_estimate_size(r) for r in results) + 200)
+            for response in results:
+                self._lists_by_movie.setdefault(response.id, set()).add(key)
+
+    def get_facets(self, key: FacetsKey) -> Optional[Dict[str, list]]:
+        if not self.enabled:
+            return None
+        return self._cache.get(key)
+
+    def put_facets(self, key: FacetsKey, facets: Dict[str, list], token: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._list_stamp > token:
+                return
+            self._cache.set(key, facets, 100 * sum(len(counts) for counts in facets.values()) + 200)
+
+    def invalidate_ratings(self, movie_id: int):
+        """A rating changes the movie's aggregates but not which pages it appears on"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stamp(movie_id)
+            self._cache.delete(("movie", movie_id))
+            for key in list(self._lists_by_movie.get(movie_id, ())):
+                self._cache.delete(key)
+
+    def invalidate_movie(self, before: Optional[MovieFields], after: Optional[MovieFields]):
+        """
+        Evict after a create (before=None), update or delete (after=None).
+        On pages ordered by id, a movie entering or leaving a filtered result shifts
+        only the pages at or after its position, plus a trailing short page; pages
+        sorted by title or year are evicted whenever the filters match.
+        """
+        if not self.enabled:
+            return
+        movie_id = (after or before).id
+        with self._lock:
+            self._stamp(movie_id)
+            self._list_stamp = self._writes
+            self._cache.delete(("movie", movie_id))
+
+            def affected(key, results) -> bool:
+                if isinstance(key, FacetsKey):
+                    # Any movie create, update or delete can change a count
+                    return True
+                if not isinstance(key, ListKey):
+                    return False
+                if any(response.id == movie_id for response in results):
+                    return True
+                if not any(fields and _matches(key, fields) for fields in (before, after)):
+                    return False
+                if key.sort:
+                    return True
+                return len(results) < key.page_size or movie_id <= results[-1].id
+
+            self._cache.delete_where(affected)
+
+    def invalidate_lists(self):
+        """Drop every cached list page and facet count (bulk writes), keeping movie details"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._bump()
+            self._list_stamp = self._writes
+            self._cache.delete_where(lambda key, _: isinstance(key, (ListKey, FacetsKey)))
+
+    def clear(self):
+        with self._lock:
+            self._bump()
+            self._list_stamp = self._writes
+            self._stamps = [self._writes] * _STAMP_SLOTS
+            self._cache.clear()
+        # Leaderboards are cached beside this cache, not in it
+        leaderboard_cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"enabled": self.enabled, **self._cache.stats()}
+
+    def _stamp(self, movie_id: int):
+        self._bump()
+        self._stamps[movie_id % _STAMP_SLOTS] = self._writes
+
+    def _bump(self):
+        self._writes += 1
+        self._recent.append((time.monotonic(), self._writes))
+
+    def _forget(self, key, value):
+        # Called by the LRU under its lock whenever an entry leaves the cache
+        if not isinstance(key, ListKey):
+            return
+        for response in value:
+            keys = self._lists_by_movie.get(response.id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._lists_by_movie[response.id]
+
+
+movie_cache = MovieCache(
+    enabled=settings.CACHE_ENABLED,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+)
+
+# Leaderboards are not evicted by writes: a new rating shifts scores, and a board that is
+# up to LEADERBOARD_TTL_SECONDS old is acceptable, whereas recomputing it per rating is not
+leaderboard_cache = LRUCache(
+    max_entries=1000,
+    max_bytes=settings.CACHE_MAX_BYTES // 4,
+    ttl_seconds=settings.LEADERBOARD_TTL_SECONDS,
+)
+
+
+# Gated on movie_cache.enabled, so turning the movie cache off turns these off too
+def get_leaderboard(key: tuple) -> Optional[list]:
+    if not movie_cache.enabled:
+        return None
+    return leaderboard_cache.get(key)
+
+
+def put_leaderboard(key: tuple, entries: list):
+    if movie_cache.enabled:
+        leaderboard_cache.set(key, entries, sum(_estimate_size(entry.movie) + 100 for entry in entries) + 200)
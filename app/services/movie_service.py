@@ -1,12 +1,308 @@
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter
 from app.repositories.movie_repository import MovieRepository
-from app.schemas.schemas import MovieCreate, MovieResponse, MovieUpdate, RatingResponse
-from app.models.models import Director, Genre
+from app.schemas.schemas import (
+    LeaderboardEntry, MovieCreate, MovieResponse, MovieUpdate, RatingBatchItem, RatingResponse, RatingTrend, SimilarMovie, TrendBucket,
+)
+from app.core.config import settings
+from app.models.models import Movie, MovieRatingStats
 from app.core.logger import get_logger
+from app.services.movie_cache import (
+    movie_cache, movie_fields, list_key, leaderboard_key, get_leaderboard, put_leaderboard, FacetsKey, MovieFields,
+)
+from app.core.etag import make_etag
+from app.core.pagination import encode_cursor, decode_cursor
+from app.services.rating_buffer import rating_buffer, RatingBufferFull
 
 logger = get_logger("app.services")
 
+
+_rating_list = TypeAdapter(List[RatingResponse])
+
+# Rating trends: buckets returned when no start is given, and the most one request may cover
+TREND_DEFAULT_BUCKETS = 30
+TREND_MAX_BUCKETS = 366
+
+
+def to_movie_response(movie: Movie, stats: Optional[MovieRatingStats]) -> MovieResponse:
+    """Build the API model from a movie and its precomputed rating aggregates"""
+    movie_response = MovieResponse.model_validate(movie)
+    # The aggregates come from another row; plain assignment (no validate_assignment) adds no second pass
+    movie_response.average_rating = round(stats.average, 1) if stats and stats.average else 0.0
+    movie_response.ratings_count = stats.ratings_count if stats else 0
+    return movie_response
+
+
+def to_rating_responses(ratings) -> List[RatingResponse]:
+    """Validate a whole list of rating rows in one pydantic-core call"""
+    return _rating_list.validate_python(ratings, from_attributes=True)
+
+
+def parse_movie_cursor(cursor: str, sort: str = None) -> Optional[tuple]:
+    """
+    Decode a list cursor into the sort key values of the last movie seen, (id,) or (key, id).
+    An empty cursor starts at the beginning; a cursor from another sort order is rejected.
+    """
+    if not cursor:
+        return None
+    try:
+        position = decode_cursor(cursor)
+        if position.get("sort") != sort:
+            raise ValueError("Cursor belongs to another sort order")
+        movie_id = int(position["id"])
+        if not sort:
+            return (movie_id,)
+        key = position["key"]
+        if not isinstance(key, str if sort.lstrip("-") == "title" else (int, float)):
+            raise TypeError("Cursor key does not match the sort column")
+        return (key, movie_id)
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"Invalid pagination cursor: {cursor}")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def movie_cursor(movie: Movie, stats: Optional[MovieRatingStats], sort: str = None) -> str:
+    """Cursor pointing just after `movie` in the given sort order"""
+    if not sort:
+        return encode_cursor({"id": movie.id})
+    field = sort.lstrip("-")
+    if field in ("average_rating", "ratings_count"):
+        # A movie without a stats row is shown as unrated (see to_movie_response); its cursor
+        # key is what that row would hold, 0 for both aggregates
+        key = getattr(stats, field) if stats is not None else 0
+    else:
+        key = getattr(movie, field)
+    return encode_cursor({"sort": sort, "key": key, "id": movie.id})
+
+
+def ratings_buffered() -> bool:
+    return settings.RATING_INGEST_MODE == "buffered"
+
+
+def enqueue_ratings(ratings: List[Tuple[int, int]]):
+    """Hand (movie_id, score) pairs to the write-behind buffer, waiting briefly for room"""
+    try:
+        rating_buffer.submit(ratings, timeout=settings.RATING_SUBMIT_TIMEOUT_MS / 1000)
+    except ValueError:
+        raise HTTPException(status_code=413, detail="Too many ratings in one batch")
+    except RatingBufferFull:
+        logger.warning(f"Rating buffer full, rejecting {len(ratings)} ratings")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Rating ingestion is overloaded, retry later",
+            headers={"Retry-After": "1"},
+        )
+
+
+def split_rating_batch(ratings: List[RatingBatchItem], existing: set) -> Tuple[List[Dict], List[Dict]]:
+    """Split a batch into insertable rows and per-item errors for unknown movies"""
+    accepted, rejected = [], []
+    for index, rating in enumerate(ratings):
+        if rating.movie_id in existing:
+            accepted.append({"movie_id": rating.movie_id, "score": rating.score})
+        else:
+            rejected.append({"index": index, "movie_id": rating.movie_id, "error": "Movie not found"})
+    return accepted, rejected
+
+
+def parse_ratings_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """Decode a ratings cursor into the (rated_at, id) of the last rating seen"""
+    if not cursor:
+        return None
+    try:
+        position = decode_cursor(cursor)
+        return datetime.fromisoformat(position["rated_at"]), int(position["id"])
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"Invalid ratings cursor: {cursor}")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def ratings_cursor(rating) -> str:
+    return encode_cursor({"rated_at": rating.rated_at.isoformat(), "id": rating.id})
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the "day", "week" (Monday, as date_trunc) or "month" bucket containing `day`"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def trend_buckets(bucket: str, start: Optional[date], end: Optional[date]) -> Tuple[List[date], date]:
+    """
+    Bucket starts covering [start, end] and the end day. `end` defaults to today and `start` to
+    TREND_DEFAULT_BUCKETS buckets before it; the first bucket is widened to start on its boundary.
+    """
+    end = end or date.today()
+    if start is None:
+        start = end
+        for _ in range(TREND_DEFAULT_BUCKETS - 1):
+            start = bucket_start(start, bucket) - timedelta(days=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    starts = [bucket_start(start, bucket)]
+    while True:
+        following = bucket_start(starts[-1] + timedelta(days=31 if bucket == "month" else 7 if bucket == "week" else 1), bucket)
+        if following > end:
+            return starts, end
+        if len(starts) == TREND_MAX_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"A trend covers at most {TREND_MAX_BUCKETS} buckets")
+        starts.append(following)
+
+
+def rating_trend(bucket: str, starts: List[date], end: date, rows) -> RatingTrend:
+    """Dense series from (bucket_start, ratings_count, ratings_sum) rows: empty buckets get a zero count"""
+    rows_by_start = {row.bucket_start: row for row in rows}
+    buckets = []
+    for start in starts:
+        row = rows_by_start.get(start)
+        if row is None or not row.ratings_count:
+            buckets.append(TrendBucket(start=start, ratings_count=0))
+        else:
+            buckets.append(TrendBucket(start=start, ratings_count=row.ratings_count, average_rating=round(row.ratings_sum / row.ratings_count, 2)))
+    return RatingTrend(bucket=bucket, start=starts[0], end=end, buckets=buckets)
+
+
+def leaderboard_entries(rows, movies: List[Movie], stats_by_movie: Dict[int, MovieRatingStats]) -> List[LeaderboardEntry]:
+    """Attach the loaded movies to ranked (movie_id, score, ratings_count) rows, keeping their order"""
+    movies_by_id = {movie.id: movie for movie in movies}
+    return [
+        LeaderboardEntry(
+            rank=rank,
+            score=round(row.score, 3),
+            ratings_count=row.ratings_count,
+            movie=to_movie_response(movies_by_id[row.movie_id], stats_by_movie.get(row.movie_id)),
+        )
+        for rank, row in enumerate(rows, start=1)
+    ]
+
+
+def similar_movies(rows, movies: List[Movie], stats_by_movie: Dict[int, MovieRatingStats]) -> List[SimilarMovie]:
+    """Attach the loaded movies to (movie_id, score) neighbour rows, keeping their order; skips ones deleted in between"""
+    movies_by_id = {movie.id: movie for movie in movies}
+    return [
+        SimilarMovie(score=round(row.score, 3), movie=to_movie_response(movies_by_id[row.movie_id], stats_by_movie.get(row.movie_id)))
+        for row in rows
+        if row.movie_id in movies_by_id
+    ]
+
+
+def movie_responses(movies: List[Movie], stats_by_movie: Dict[int, MovieRatingStats]) -> List[MovieResponse]:
+    return [to_movie_response(movie, stats_by_movie.get(movie.id)) for movie in movies]
+
+
+def split_page(rows: list, page_size: int) -> Tuple[list, bool]:
+    """(page, has_more) from rows fetched with one extra row, which tells whether another page exists"""
+    return rows[:page_size], len(rows) > page_size
+
+
+def movie_page(movies: List[Movie], stats_by_movie: Dict[int, MovieRatingStats], has_more: bool, sort: str = None):
+    """(movies, next_cursor) of a keyset page"""
+    next_cursor = movie_cursor(movies[-1], stats_by_movie.get(movies[-1].id), sort) if has_more else None
+    return movie_responses(movies, stats_by_movie), next_cursor
+
+
+def ratings_page(ratings: list, has_more: bool):
+    """(ratings, next_cursor) of a keyset page"""
+    return to_rating_responses(ratings), ratings_cursor(ratings[-1]) if has_more else None
+
+
+def movie_not_found(movie_id: int, action: str = None) -> HTTPException:
+    """404 for a missing movie, logged when it was looked up for `action`"""
+    if action:
+        logger.warning(f"Movie not found for {action}: {movie_id}")
+    return HTTPException(status_code=404, detail="Movie not found")
+
+
+def check_director(exists: bool, director_id: int, context: str = ""):
+    if not exists:
+        logger.warning(f"Director not found{context}: {director_id}")
+        raise HTTPException(status_code=404, detail="Director not found")
+
+
+def check_genres(found: int, genre_ids: List[int], context: str = ""):
+    if found != len(genre_ids):
+        logger.warning(f"One or more genres invalid{context}: {genre_ids}")
+        raise HTTPException(status_code=404, detail="One or more genres invalid")
+
+
+def check_genre(found: int, genre_id: int, action: str):
+    if not found:
+        logger.warning(f"Genre not found for {action}: {genre_id}")
+        raise HTTPException(status_code=404, detail="Genre not found")
+
+
+def movie_etag(movie_id: int, version) -> str:
+    """ETag of the movie detail from its (version, ratings_count) row: changes on every update and every new rating"""
+    if not version:
+        raise movie_not_found(movie_id)
+    return make_etag("m", movie_id, version.version, version.ratings_count)
+
+
+def detail_etag(movie: Movie, stats: Optional[MovieRatingStats]) -> str:
+    """The same ETag, taken from the rows a detail body was built from"""
+    return make_etag("m", movie.id, movie.version, stats.ratings_count if stats else 0)
+
+
+def ratings_etag(movie_id: int, version) -> str:
+    """ETag of the ratings list: ratings are append-only, so the count versions it"""
+    if not version:
+        raise movie_not_found(movie_id)
+    return make_etag("r", movie_id, version.ratings_count)
+
+
+def facets_key(director_limit: int, title: str = None, release_year: int = None, genre: str = None) -> Optional[FacetsKey]:
+    """Cache key of the facet counts; only the unfiltered catalog is cached"""
+    if title or release_year or genre:
+        return None
+    return FacetsKey(director_limit)
+
+
+def movie_created(movie: Movie) -> MovieResponse:
+    logger.info(f"Movie created: {movie.id} - {movie.title}")
+    movie_cache.invalidate_movie(None, movie_fields(movie))
+    return to_movie_response(movie, None)
+
+
+def movie_updated(before: MovieFields, movie: Movie, stats: Optional[MovieRatingStats]) -> MovieResponse:
+    logger.info(f"Movie updated: {movie.id} - {movie.title}")
+    movie_cache.invalidate_movie(before, movie_fields(movie))
+    return to_movie_response(movie, stats)
+
+
+def movie_deleted(before: MovieFields):
+    logger.warning(f"Movie deleted: {before.id} - {before.title}")
+    movie_cache.invalidate_movie(before, None)
+
+
+def rating_added(rating):
+    movie_cache.invalidate_ratings(rating.movie_id)
+    logger.info(f"Rating added: movie_id={rating.movie_id}, score={rating.score}, rating_id={rating.id}")
+
+
+def rating_batch_result(ratings: List[RatingBatchItem], accepted: List[Dict], rejected: List[Dict], written: int) -> Dict:
+    """Evict the rated movies (rows written directly) and report the batch"""
+    if not ratings_buffered():
+        for movie_id in {rating["movie_id"] for rating in accepted}:
+            movie_cache.invalidate_ratings(movie_id)
+    logger.info(f"Rating batch: accepted={written}, rejected={len(ratings) - written}")
+    return {"accepted": written, "rejected": rejected, "queued": ratings_buffered()}
+
+
+def facets_response(rows: Dict[str, list]) -> Dict[str, List[Dict]]:
+    return {
+        "genres": [{"id": row.id, "name": row.name, "count": row.count} for row in rows["genres"]],
+        "directors": [{"id": row.id, "name": row.name, "count": row.count} for row in rows["directors"]],
+        "decades": [{"decade": row.decade, "count": row.count} for row in rows["decades"]],
+    }
+
+
 class MovieService:
     """
     Business Logic Layer.
@@ -15,108 +311,163 @@ class MovieService:
 
     def __init__(self, db: Session):
         self.repo = MovieRepository(db)
-        self.db = db # Needed only for validation checks (could be in another repo)
-
-    def get_movies(self, page: int, page_size: int, title: str = None, release_year: int = None, genre: str = None):
-        skip = (page - 1) * page_size
-        movies = self.repo.get_all(skip=skip, limit=page_size, title=title, release_year=release_year, genre=genre)
-
-        
-        # Append calculated stats
-        results = []
-        for movie in movies:
-            stats = self.repo.get_rating_stats(movie.id)
-            movie_response = MovieResponse.from_orm(movie)
-            movie_response.average_rating = round(stats.average, 1) if stats.average else 0.0
-            movie_response.ratings_count = stats.count
-            results.append(movie_response)
+        # Replica sessions may trail the primary, so cached reads are tagged as of that long ago
+        self.cache_lag = settings.REPLICA_MAX_LAG_SECONDS if db.info.get("replica") else 0
+
+    def get_movies(self, page: int, page_size: int, title: str = None, release_year: int = None, genre: str = None, sort: str = None):
+        key = list_key(page, page_size, title=title, release_year=release_year, genre=genre, sort=sort)
+        cached = movie_cache.get_list(key)
+        if cached is not None:
+            return cached
 
+        token = movie_cache.token(self.cache_lag)
+        movies = self.repo.get_all(skip=(page - 1) * page_size, limit=page_size, title=title, release_year=release_year, genre=genre, sort=sort)
+        # Load stats for the whole page at once and join them in memory
+        results = movie_responses(movies, self.repo.get_rating_stats_for_movies([movie.id for movie in movies]))
+        movie_cache.put_list(key, results, token)
         return results
 
-    def get_movie_detail(self, movie_id: int):
+    def get_movies_after(self, cursor: str, page_size: int, title: str = None, release_year: int = None, genre: str = None, sort: str = None):
+        """Keyset pagination. An empty cursor starts at the beginning; returns (movies, next_cursor)."""
+        after = parse_movie_cursor(cursor, sort)
+        movies, has_more = split_page(
+            self.repo.get_after(after, limit=page_size + 1, title=title, release_year=release_year, genre=genre, sort=sort), page_size
+        )
+        return movie_page(movies, self.repo.get_rating_stats_for_movies([movie.id for movie in movies]), has_more, sort)
+
+    def search_movies(self, q: str, page: int, page_size: int):
+        movies = self.repo.search(q, skip=(page - 1) * page_size, limit=page_size)
+        return movie_responses(movies, self.repo.get_rating_stats_for_movies([movie.id for movie in movies]))
+
+    def get_facets(self, director_limit: int, title: str = None, release_year: int = None, genre: str = None):
+        """Counts per genre, director and decade for the current filters; the unfiltered catalog is cached"""
+        key = facets_key(director_limit, title=title, release_year=release_year, genre=genre)
+        cached = movie_cache.get_facets(key) if key else None
+        if cached is not None:
+            return cached
+
+        token = movie_cache.token(self.cache_lag)
+        facets = facets_response(self.repo.get_facets(director_limit, title=title, release_year=release_year, genre=genre))
+        if key:
+            movie_cache.put_facets(key, facets, token)
+        return facets
+
+    def get_leaderboard(self, board: str, limit: int, min_votes: int = 0, days: int = 7, genre: str = None, release_year: int = None):
+        """Ranked movies from the rating rollups; boards are cached for LEADERBOARD_TTL_SECONDS"""
+        key = leaderboard_key(board, limit, min_votes, days, genre=genre, release_year=release_year)
+        cached = get_leaderboard(key)
+        if cached is not None:
+            return cached
+
+        rows = self.repo.get_leaderboard(board, limit, min_votes=min_votes, days=days, genre=genre, release_year=release_year)
+        movie_ids = [row.movie_id for row in rows]
+        entries = leaderboard_entries(rows, self.repo.get_by_ids(movie_ids), self.repo.get_rating_stats_for_movies(movie_ids))
+        put_leaderboard(key, entries)
+        return entries
+
+    def get_similar_movies(self, movie_id: int, limit: int) -> List[SimilarMovie]:
+        """Precomputed neighbours (scripts.build_similarities); empty until the job has seen the movie"""
+        rows = self.repo.get_similar(movie_id, limit)
+        if not rows and not self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "similar movies")
+        movie_ids = [row.movie_id for row in rows]
+        return similar_movies(rows, self.repo.get_by_ids(movie_ids), self.repo.get_rating_stats_for_movies(movie_ids))
+
+    def get_movie_etag(self, movie_id: int) -> str:
+        return movie_etag(movie_id, self.repo.get_version(movie_id))
+
+    def get_ratings_etag(self, movie_id: int) -> str:
+        return ratings_etag(movie_id, self.repo.get_version(movie_id))
+
+    def get_movie_detail(self, movie_id: int, etag: str) -> Tuple[MovieResponse, str]:
+        """
+        (detail, its ETag). The cached body is used only if it is at the version `etag` (from
+        get_movie_etag) names; otherwise the movie is read again and the ETag is taken from that read.
+        """
+        cached = movie_cache.get_detail(movie_id, etag)
+        if cached is not None:
+            return cached, etag
+
+        token = movie_cache.token(self.cache_lag)
         movie = self.repo.get_by_id(movie_id)
         if not movie:
-            raise HTTPException(status_code=404, detail="Movie not found")
-        
+            raise movie_not_found(movie_id)
         stats = self.repo.get_rating_stats(movie.id)
-        movie_response = MovieResponse.from_orm(movie)
-        movie_response.average_rating = round(stats.average, 1) if stats.average else 0.0
-        movie_response.ratings_count = stats.count
-        return movie_response
-
+        movie_response, etag = to_movie_response(movie, stats), detail_etag(movie, stats)
+        movie_cache.put_detail(movie_id, movie_response, etag, token)
+        return movie_response, etag
 
     def create_movie(self, movie_in: MovieCreate):
-        # Validation: Check Director
-        director = self.db.query(Director).filter(Director.id == movie_in.director_id).first()
-        if not director:
-            logger.warning(f"Director not found: {movie_in.director_id}")
-            raise HTTPException(status_code=404, detail="Director not found")
-        
-        # Validation: Check Genres
-        existing_genres = self.db.query(Genre).filter(Genre.id.in_(movie_in.genre_ids)).count()
-        if existing_genres != len(movie_in.genre_ids):
-            logger.warning(f"One or more genres invalid: {movie_in.genre_ids}")
-            raise HTTPException(status_code=404, detail="One or more genres invalid")
-
-        movie = self.repo.create(movie_in)
-        logger.info(f"Movie created: {movie.id} - {movie.title}")
-        movie_response = MovieResponse.from_orm(movie)
-        movie_response.average_rating = 0.0
-        movie_response.ratings_count = 0
-        return movie_response
+        check_director(self.repo.director_exists(movie_in.director_id), movie_in.director_id)
+        check_genres(self.repo.count_genres(movie_in.genre_ids), movie_in.genre_ids)
+        return movie_created(self.repo.create(movie_in))
 
     def update_movie(self, movie_id: int, movie_update: MovieUpdate):
         movie = self.repo.get_by_id(movie_id)
         if not movie:
-            logger.warning(f"Movie not found for update: {movie_id}")
-            raise HTTPException(status_code=404, detail="Movie not found")
-        
-        # Validation: Check Director if provided
+            raise movie_not_found(movie_id, "update")
         if movie_update.director_id:
-            director = self.db.query(Director).filter(Director.id == movie_update.director_id).first()
-            if not director:
-                logger.warning(f"Director not found for update: {movie_update.director_id}")
-                raise HTTPException(status_code=404, detail="Director not found")
-        
-        # Validation: Check Genres if provided
+            check_director(self.repo.director_exists(movie_update.director_id), movie_update.director_id, " for update")
         if movie_update.genre_ids:
-            existing_genres = self.db.query(Genre).filter(Genre.id.in_(movie_update.genre_ids)).count()
-            if existing_genres != len(movie_update.genre_ids):
-                logger.warning(f"One or more genres invalid for update: {movie_update.genre_ids}")
-                raise HTTPException(status_code=404, detail="One or more genres invalid")
+            check_genres(self.repo.count_genres(movie_update.genre_ids), movie_update.genre_ids, " for update")
 
+        before = movie_fields(movie)
         updated_movie = self.repo.update(movie, movie_update)
-        logger.info(f"Movie updated: {movie_id} - {updated_movie.title}")
-        stats = self.repo.get_rating_stats(updated_movie.id)
-        movie_response = MovieResponse.from_orm(updated_movie)
-        movie_response.average_rating = round(stats.average, 1) if stats.average else 0.0
-        movie_response.ratings_count = stats.count
-        return movie_response
-
+        return movie_updated(before, updated_movie, self.repo.get_rating_stats(updated_movie.id))
 
     def delete_movie(self, movie_id: int):
         movie = self.repo.get_by_id(movie_id)
         if not movie:
-            logger.warning(f"Movie not found for deletion: {movie_id}")
-            raise HTTPException(status_code=404, detail="Movie not found")
-        logger.warning(f"Movie deleted: {movie_id} - {movie.title}")
+            raise movie_not_found(movie_id, "deletion")
+        before = movie_fields(movie)
         self.repo.delete(movie)
+        movie_deleted(before)
 
     def rate_movie(self, movie_id: int, score: int):
-        movie = self.repo.get_by_id(movie_id)
-        if not movie:
-            logger.warning(f"Movie not found for rating: {movie_id}")
-            raise HTTPException(status_code=404, detail="Movie not found")
+        """Store a rating; in buffered mode it is queued and None is returned"""
+        if not self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "rating")
+        if ratings_buffered():
+            enqueue_ratings([(movie_id, score)])
+            return None
         rating = self.repo.add_rating(movie_id, score)
-        logger.info(f"Rating added: movie_id={movie_id}, score={score}, rating_id={rating.id}")
+        rating_added(rating)
         return rating
 
+    def rate_movies_batch(self, ratings: List[RatingBatchItem]) -> Dict:
+        """Store many ratings at once; unknown movies are reported per item instead of failing the batch"""
+        accepted, rejected = split_rating_batch(ratings, self.repo.existing_movie_ids({rating.movie_id for rating in ratings}))
+        if ratings_buffered():
+            if accepted:
+                enqueue_ratings([(rating["movie_id"], rating["score"]) for rating in accepted])
+            written = len(accepted)
+        else:
+            written = self.repo.bulk_add_ratings(accepted)
+        return rating_batch_result(ratings, accepted, rejected, written)
+
     def get_movie_ratings(self, movie_id: int):
-        movie = self.repo.get_by_id(movie_id)
-        if not movie:
-            logger.warning(f"Movie not found for ratings retrieval: {movie_id}")
-            raise HTTPException(status_code=404, detail="Movie not found")
-        
+        if not self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "ratings retrieval")
         ratings = self.repo.get_ratings_for_movie(movie_id)
         logger.info(f"Retrieved {len(ratings)} ratings for movie: {movie_id}")
-        return [RatingResponse.from_orm(rating) for rating in ratings]
+        return to_rating_responses(ratings)
+
+    def get_movie_rating_trend(self, movie_id: int, bucket: str, start: Optional[date] = None, end: Optional[date] = None) -> RatingTrend:
+        """Ratings count and average per bucket, read from the per-day rollup"""
+        starts, end = trend_buckets(bucket, start, end)
+        if not self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "rating trend")
+        return rating_trend(bucket, starts, end, self.repo.get_movie_rating_trend(movie_id, bucket, starts[0], end))
+
+    def get_genre_rating_trend(self, genre_id: int, bucket: str, start: Optional[date] = None, end: Optional[date] = None) -> RatingTrend:
+        """Same as get_movie_rating_trend for a genre, read from the compacted genre rollup"""
+        starts, end = trend_buckets(bucket, start, end)
+        check_genre(self.repo.count_genres([genre_id]), genre_id, "rating trend")
+        return rating_trend(bucket, starts, end, self.repo.get_genre_rating_trend(genre_id, bucket, starts[0], end))
+
+    def get_movie_ratings_after(self, movie_id: int, cursor: str, page_size: int):
+        """Keyset pagination over (rated_at, id), newest first; returns (ratings, next_cursor)"""
+        after = parse_ratings_cursor(cursor)
+        if not self.repo.movie_exists(movie_id):
+            raise movie_not_found(movie_id, "ratings retrieval")
+        return ratings_page(*split_page(self.repo.get_ratings_after(movie_id, after, limit=page_size + 1), page_size))
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.session import SessionLocal
+from app.repositories.movie_repository import MovieRepository
+from app.services.movie_cache import movie_cache
+
+logger = get_logger("app.services.ratings")
+
+# A batch that still fails after this many transactions is dropped (and counted)
+FLUSH_ATTEMPTS = 3
+
+
+class PendingRating(NamedTuple):
+    movie_id: int
+    score: int
+    rated_at: datetime
+
+
+class RatingBufferFull(Exception):
+    """Raised when the buffer stays full for the whole submit timeout"""
+
+
+class RatingBuffer:
+    """
+    Write-behind buffer for ratings.
+
+    Ratings are queued in memory and a background thread writes them in multi-row
+    transactions (movie_ratings rows plus the movie_rating_stats upsert) once
+    `flush_size` ratings are waiting or `flush_interval` seconds have passed.
+
+    Guarantees:
+    - Backpressure: the queue holds at most `max_size` ratings; submit() waits up to
+      its timeout for room and then raises RatingBufferFull (callers answer 503).
+    - Ordering: ratings are written in acceptance order within this process, and
+      rated_at is stamped (UTC) when the rating is accepted, not when it is flushed.
+      It is the same clock as the now() default of unbuffered ratings, since the
+      engines pin the session TimeZone to UTC (app.db.session.SESSION_TIMEZONE).
+    - Durability: an accepted rating lives only in process memory until its batch
+      commits. stop() drains the queue on a clean shutdown, but a crash or kill -9
+      loses up to `max_size` accepted ratings. Use RATING_INGEST_MODE=sync where
+      that is not acceptable.
+    - Visibility: a rating shows up in stats, ETags and listings after its flush,
+      i.e. within roughly `flush_interval`.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        flush_size: int,
+        flush_interval: float,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._session_factory = session_factory
+        self._queue: Deque[PendingRating] = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._thread: threading.Thread = None
+        self._running = False
+        self.accepted = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.flushes = 0
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="rating-buffer-flusher", daemon=True)
+        self._thread.start()
+        logger.info(f"Rating buffer started: max_size={self.max_size}, flush_size={self.flush_size}, flush_interval={self.flush_interval}s")
+
+    def stop(self, timeout: float = 30.0):
+        """Stop accepting ratings and write everything still queued"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        self._thread.join(timeout)
+        logger.info(f"Rating buffer stopped: pending={len(self._queue)}, written={self.written}")
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def try_submit(self, ratings: Iterable[Tuple[int, int]]) -> bool:
+        """Queue ratings without waiting; False if there is not enough room or the buffer is stopped"""
+        ratings = list(ratings)
+        if len(ratings) > self.max_size:
+            return False
+        return self._submit(ratings, timeout=0)
+
+    def submit(self, ratings: Iterable[Tuple[int, int]], timeout: float):
+        """Queue (movie_id, score) pairs, waiting up to `timeout` seconds for room"""
+        if not self._submit(list(ratings), timeout):
+            raise RatingBufferFull()
+
+    def _submit(self, ratings: List[Tuple[int, int]], timeout: float) -> bool:
+        if len(ratings) > self.max_size:
+            raise ValueError("Batch is larger than the rating buffer")
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._running and len(self._queue) + len(ratings) > self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += len(ratings)
+                    return False
+                self._not_full.wait(remaining)
+            if not self._running:
+                # Stopped (or never started): nothing would flush these
+                return False
+
+            rated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            self._queue.extend(PendingRating(movie_id, score, rated_at) for movie_id, score in ratings)
+            self.accepted += len(ratings)
+            if len(self._queue) >= self.flush_size:
+                self._not_empty.notify()
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "running": self._running,
+                "pending": len(self._queue),
+                "max_size": self.max_size,
+                "accepted": self.accepted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "flushes": self.flushes,
+            }
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._running and len(self._queue) < self.flush_size:
+                    self._not_empty.wait(self.flush_interval)
+                if not self._queue:
+                    if not self._running:
+                        return
+                    continue
+                batch = [self._queue.popleft() for _ in range(min(self.flush_size, len(self._queue)))]
+                self._not_full.notify_all()
+            self._flush(batch)
+
+    def _flush(self, batch: List[PendingRating]):
+        rows = [rating._asdict() for rating in batch]
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            try:
+                with self._session_factory() as db:
+                    written = MovieRepository(db).bulk_add_ratings(rows)
+                break
+            except Exception:
+                if attempt == FLUSH_ATTEMPTS:
+                    logger.error(f"Rating buffer flush failed, dropping {len(batch)} ratings", exc_info=True)
+                    with self._lock:
+                        self.dropped += len(batch)
+                    return
+                logger.warning(f"Rating buffer flush failed (attempt {attempt}), retrying", exc_info=True)
+                time.sleep(0.5 * attempt)
+
+        with self._lock:
+            self.written += written
+            self.dropped += len(batch) - written
+            self.flushes += 1
+        if written < len(batch):
+            logger.warning(f"Dropped {len(batch) - written} buffered ratings for deleted movies")
+        for movie_id in {rating.movie_id for rating in batch}:
+            movie_cache.invalidate_ratings(movie_id)
+
+
+rating_buffer = RatingBuffer(
+    max_size=settings.RATING_BUFFER_MAX_SIZE,
+    flush_size=settings.RATING_FLUSH_SIZE,
+    flush_interval=settings.RATING_FLUSH_INTERVAL_MS / 1000,
+)
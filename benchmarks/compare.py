@@ -0,0 +1,79 @@
+"""
+Compare two benchmark result files (python -m benchmarks.run) and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+    python -m benchmarks.compare base.json head.json --threshold 5
+
+Exits with 1 if any scenario lost more than --threshold percent throughput, gained that
+much p99 latency, or runs that much more queries per operation.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Optional, Tuple
+
+
+def _load(path: str) -> Tuple[Dict, Dict[Tuple[str, str], Dict]]:
+    with open(path, encoding="utf-8") as handle:
+        report = json.load(handle)
+    return report, {(result["layer"], result["scenario"]): result for result in report["results"]}
+
+
+def _change(before: float, after: float) -> Optional[float]:
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+def _format(change: Optional[float]) -> str:
+    return "n/a" if change is None else f"{change:+.1f}%"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    base_report, base = _load(args.base)
+    head_report, head = _load(args.head)
+    print(f"base {base_report['commit']}{' (dirty)' if base_report['dirty'] else ''}  ->  "
+          f"head {head_report['commit']}{' (dirty)' if head_report['dirty'] else ''}")
+    if base_report["dataset"] != head_report["dataset"]:
+        print(f"warning: datasets differ: {base_report['dataset']} vs {head_report['dataset']}")
+
+    regressions = []
+    print(f"{'layer':8} {'scenario':24} {'ops/s':>10} {'p50':>9} {'p99':>9} {'queries':>10}")
+    for key in sorted(base.keys() & head.keys()):
+        before, after = base[key], head[key]
+        throughput = _change(before["throughput"], after["throughput"])
+        p50 = _change(before["latency_ms"]["p50"], after["latency_ms"]["p50"])
+        p99 = _change(before["latency_ms"]["p99"], after["latency_ms"]["p99"])
+        queries = "-"
+        if before["queries_per_op"] and after["queries_per_op"]:
+            queries = f"{before['queries_per_op']['mean']} -> {after['queries_per_op']['mean']}"
+            # Random arguments make the mean wobble slightly (e.g. empty pages skip a query)
+            if after["queries_per_op"]["mean"] > before["queries_per_op"]["mean"] * (1 + args.threshold / 100):
+                regressions.append(f"{key[0]} {key[1]}: queries per op {queries}")
+
+        if throughput is not None and throughput < -args.threshold:
+            regressions.append(f"{key[0]} {key[1]}: throughput {_format(throughput)}")
+        if p99 is not None and p99 > args.threshold:
+            regressions.append(f"{key[0]} {key[1]}: p99 {_format(p99)}")
+        print(f"{key[0]:8} {key[1]:24} {_format(throughput):>10} {_format(p50):>9} {_format(p99):>9} {queries:>10}")
+
+    for key in sorted(base.keys() ^ head.keys()):
+        print(f"{key[0]:8} {key[1]:24} only in {'base' if key in base else 'head'}")
+
+    if regressions:
+        print(f"\nRegressions over {args.threshold}%:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""
+The benchmark dataset. Seed it with the data generator, against a database used only
+for benchmarks:
+    python -m scripts.generate_data --reset --movies 100000 --ratings 5000000 --until 2025-01-01
+
+There is no SQLite stand-in: the repositories depend on Postgres features
+(tsvector search, generated columns, ON CONFLICT upserts, triggers), so numbers from
+another engine would not say anything about this service.
+"""
+from typing import Dict
+from sqlalchemy import text
+
+
+def describe(db) -> Dict[str, int]:
+    """Row counts of the seeded tables, recorded with every benchmark result"""
+    counts = {}
+    for table in ("movies", "directors", "genres", "movie_genres", "movie_ratings"):
+        counts[table] = db.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+    return counts
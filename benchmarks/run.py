@@ -0,0 +1,255 @@
+"""
+Run the benchmark scenarios in-process (service layer) and over HTTP, and write the
+results as JSON.
+
+Run from the project root against a seeded benchmark database (python -m scripts.generate_data):
+    python -m benchmarks.run
+    python -m benchmarks.run --layers service --scenarios get_movie,list_movies_genre --requests 5000
+    python -m benchmarks.run --layers http --base-url http://localhost:8000 --concurrency 16
+
+Without --base-url the HTTP layer starts its own uvicorn worker on a free port, with
+SQL_STATS_HEADERS on so query counts can be read from the responses. The read cache is
+off unless --cache is given, so the numbers measure the database paths.
+
+Results go to benchmarks/results/<commit>.json by default; compare two runs with
+python -m benchmarks.compare.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.db import instrumentation
+from app.db.session import SessionLocal
+from app.services.movie_cache import movie_cache
+from app.services.movie_service import MovieService
+from benchmarks.dataset import describe
+from benchmarks.scenarios import SCENARIOS, Context, encode_body, load_context
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(name: str, layer: str, latencies: List[float], queries: List[int], errors: int, seconds: float) -> Dict:
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3)
+    return {
+        "scenario": name,
+        "layer": layer,
+        "ops": len(latencies),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "p50": ms(percentile(ordered, 50)),
+            "p90": ms(percentile(ordered, 90)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1]) if ordered else 0.0,
+        },
+        # None when the server does not report them (external --base-url without SQL_STATS_HEADERS)
+        "queries_per_op": {
+            "mean": round(sum(queries) / len(queries), 2),
+            "max": max(queries),
+        } if queries else None,
+    }
+
+
+def run_workers(total: int, concurrency: int, seed: int, make_op: Callable[[int], Callable[[random.Random], Optional[int]]]):
+    """
+    Run `total` operations over `concurrency` threads. make_op(worker) returns the
+    operation, which returns the statement count (or None) and raises on failure.
+    """
+    latencies: List[float] = []
+    queries: List[int] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(index: int, count: int):
+        op = make_op(index)
+        rng = random.Random(seed * 1000 + index)
+        mine, my_queries, my_errors = [], [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                statements = op(rng)
+            except Exception:
+                my_errors += 1
+                continue
+            mine.append(time.perf_counter() - started)
+            if statements is not None:
+                my_queries.append(statements)
+        with lock:
+            latencies.extend(mine)
+            queries.extend(my_queries)
+            errors[0] += my_errors
+
+    shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(i, share)) for i, share in enumerate(shares) if share]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, queries, errors[0], time.perf_counter() - started
+
+
+def service_op(scenario, ctx: Context):
+    def op(rng: random.Random) -> int:
+        token = instrumentation.start_request_queries("benchmark")
+        try:
+            with SessionLocal() as db:
+                scenario.service(MovieService(db), ctx, rng)
+        finally:
+            statements = instrumentation.finish_request_queries(token).count
+        return statements
+    return op
+
+
+def http_op(scenario, ctx: Context, base_url: str):
+    url = urlparse(base_url)
+    # One keep-alive connection per worker thread
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+
+    def op(rng: random.Random) -> Optional[int]:
+        request = scenario.http(ctx, rng)
+        body = encode_body(request)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        connection.request(request.method, request.path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status >= 400:
+            raise RuntimeError(f"{request.method} {request.path} -> {response.status}")
+        statements = response.getheader("X-DB-Queries")
+        return int(statements) if statements is not None else None
+    return op
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(cache: bool, db_async: bool) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "SQL_STATS_HEADERS": "true",
+        "CACHE_ENABLED": "true" if cache else "false",
+        "DB_ASYNC": "true" if db_async else "false",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return server, base_url
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("The benchmark server did not start within 30s")
+
+
+def git_commit() -> Tuple[str, bool]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated, default all")
+    parser.add_argument("--layers", default="service,http", help="service, http or both")
+    parser.add_argument("--requests", type=int, default=2000, help="measured operations per scenario and layer")
+    parser.add_argument("--warmup", type=int, default=200, help="unmeasured operations run first")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="keep the read cache on")
+    parser.add_argument("--db-async", action="store_true", help="serve the HTTP layer through the async stack")
+    parser.add_argument("--base-url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--output", help="result file, default benchmarks/results/<commit>.json")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    layers = [layer.strip() for layer in args.layers.split(",")]
+
+    movie_cache.enabled = args.cache
+    with SessionLocal() as db:
+        ctx = load_context(db)
+        dataset = describe(db)
+
+    server, base_url = None, args.base_url
+    if "http" in layers and not base_url:
+        server, base_url = start_server(args.cache, args.db_async)
+
+    results = []
+    try:
+        for layer in layers:
+            for name in names:
+                scenario = SCENARIOS[name]
+                make_op = (lambda _: service_op(scenario, ctx)) if layer == "service" else (lambda _: http_op(scenario, ctx, base_url))
+                if args.warmup:
+                    run_workers(args.warmup, args.concurrency, args.seed + 1, make_op)
+                latencies, queries, errors, seconds = run_workers(args.requests, args.concurrency, args.seed, make_op)
+                result = summarize(name, layer, latencies, queries, errors, seconds)
+                results.append(result)
+                latency = result["latency_ms"]
+                print(
+                    f"{layer:8} {name:24} {result['throughput']:>9} ops/s  p50 {latency['p50']:>8}ms  "
+                    f"p99 {latency['p99']:>8}ms  queries {(result['queries_per_op'] or {}).get('mean', '-')}  errors {errors}"
+                )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "dataset": dataset,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
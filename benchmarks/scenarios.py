@@ -0,0 +1,120 @@
+"""
+Benchmark scenarios. Each one has a service-layer call (MovieService on its own
+session, like a request handled through get_db) and the equivalent HTTP request.
+"""
+import json
+import random
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+from sqlalchemy import text
+from app.schemas.schemas import MovieUpdate
+from app.services.movie_service import MovieService
+from scripts.generate_data import TITLE_WORDS
+
+API = "/api/v1/movies"
+
+
+class Context(NamedTuple):
+    """What the scenarios draw their random arguments from"""
+    min_movie_id: int
+    max_movie_id: int
+    years: Tuple[int, int]
+    genres: List[str]
+
+
+def load_context(db) -> Context:
+    low, high = db.execute(text("SELECT min(id), max(id) FROM movies")).one()
+    if low is None:
+        raise SystemExit("No movies in the database; seed it with python -m scripts.generate_data first.")
+    years = tuple(db.execute(text("SELECT min(release_year), max(release_year) FROM movies")).one())
+    genres = list(db.execute(text("SELECT name FROM genres ORDER BY id")).scalars())
+    return Context(low, high, years, genres)
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    body: Optional[dict] = None
+
+
+class Scenario(NamedTuple):
+    name: str
+    # (service, context, rng) -> None; raises on failure
+    service: Callable[[MovieService, Context, random.Random], None]
+    # (context, rng) -> the HTTP request to send
+    http: Callable[[Context, random.Random], Request]
+
+
+def _movie_id(ctx: Context, rng: random.Random) -> int:
+    return rng.randint(ctx.min_movie_id, ctx.max_movie_id)
+
+
+def _list_args(ctx: Context, rng: random.Random, name: str) -> Dict:
+    args = {"page": rng.randint(1, 20), "page_size": 20}
+    if name in ("title", "all"):
+        args["title"] = rng.choice(TITLE_WORDS).lower()
+    if name in ("year", "all"):
+        args["release_year"] = rng.randint(*ctx.years)
+    if name in ("genre", "all"):
+        args["genre"] = rng.choice(ctx.genres)
+    return args
+
+
+def _list_scenario(filter_name: str) -> Scenario:
+    def service(svc: MovieService, ctx: Context, rng: random.Random):
+        svc.get_movies(**_list_args(ctx, rng, filter_name))
+
+    def http(ctx: Context, rng: random.Random) -> Request:
+        return Request("GET", f"{API}/?{urlencode(_list_args(ctx, rng, filter_name))}")
+
+    suffix = "" if filter_name == "none" else f"_{filter_name}"
+    return Scenario(f"list_movies{suffix}", service, http)
+
+
+def _get_movie(svc: MovieService, ctx: Context, rng: random.Random):
+    # Same calls as GET /movies/{id}: the ETag lookup, then the (possibly cached) detail
+    movie_id = _movie_id(ctx, rng)
+    svc.get_movie_detail(movie_id, svc.get_movie_etag(movie_id))
+
+
+def _update_body(rng: random.Random) -> dict:
+    return {"description": f"Benchmark update {rng.getrandbits(32)}"}
+
+
+SCENARIOS: Dict[str, Scenario] = {scenario.name: scenario for scenario in [
+    _list_scenario("none"),
+    _list_scenario("title"),
+    _list_scenario("year"),
+    _list_scenario("genre"),
+    _list_scenario("all"),
+    Scenario(
+        "get_movie",
+        _get_movie,
+        lambda ctx, rng: Request("GET", f"{API}/{_movie_id(ctx, rng)}"),
+    ),
+    Scenario(
+        "rate_movie",
+        lambda svc, ctx, rng: svc.rate_movie(_movie_id(ctx, rng), rng.randint(1, 10)),
+        lambda ctx, rng: Request("POST", f"{API}/{_movie_id(ctx, rng)}/ratings?score={rng.randint(1, 10)}"),
+    ),
+    Scenario(
+        "update_movie",
+        lambda svc, ctx, rng: svc.update_movie(_movie_id(ctx, rng), MovieUpdate(**_update_body(rng))),
+        lambda ctx, rng: Request("PUT", f"{API}/{_movie_id(ctx, rng)}", _update_body(rng)),
+    ),
+    # The full list (the legacy response) and the first keyset page
+    Scenario(
+        "get_movie_ratings",
+        lambda svc, ctx, rng: svc.get_movie_ratings(_movie_id(ctx, rng)),
+        lambda ctx, rng: Request("GET", f"{API}/{_movie_id(ctx, rng)}/ratings"),
+    ),
+    Scenario(
+        "get_movie_ratings_page",
+        lambda svc, ctx, rng: svc.get_movie_ratings_after(_movie_id(ctx, rng), None, 100),
+        lambda ctx, rng: Request("GET", f"{API}/{_movie_id(ctx, rng)}/ratings?cursor=&page_size=100"),
+    ),
+]}
+
+
+def encode_body(request: Request) -> Optional[bytes]:
+    return json.dumps(request.body).encode() if request.body is not None else None
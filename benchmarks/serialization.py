@@ -0,0 +1,107 @@
+"""
+Cost per movie of turning loaded rows into a JSON list response: the old path
+(MovieResponse.from_orm, a response_model=dict envelope, jsonable_encoder and json.dumps)
+against the typed envelope written by ModelResponse.
+
+No database is needed: the rows are transient ORM objects, so only the Pydantic and
+FastAPI work is measured. Each path is served by an in-process app at every page size;
+the per-item cost is the slope between the smallest and the largest size.
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 1,10,100 --repeat 2000
+"""
+import argparse
+import sys
+import time
+import warnings
+from typing import Dict, List
+from fastapi import FastAPI, Query
+from fastapi.testclient import TestClient
+from app.core.responses import ModelResponse
+from app.models.models import Director, Genre, Movie, MovieRatingStats
+from app.schemas.schemas import MovieResponse, PageResponse
+from app.services.movie_service import to_movie_response
+
+GENRES = [Genre(id=index, name=name) for index, name in enumerate(("Drama", "Comedy", "Science Fiction", "Thriller"), start=1)]
+
+
+def make_rows(count: int):
+    movies, stats = [], {}
+    for movie_id in range(1, count + 1):
+        director = Director(id=movie_id % 50 + 1, name=f"Director {movie_id % 50 + 1}")
+        movies.append(Movie(
+            id=movie_id,
+            title=f"Movie {movie_id}",
+            release_year=1950 + movie_id % 70,
+            cast="Actor One, Actor Two, Actor Three",
+            description=f"A story about movie number {movie_id}, told over two hours.",
+            director=director,
+            genres=GENRES[:movie_id % 3 + 1],
+        ))
+        stats[movie_id] = MovieRatingStats(movie_id=movie_id, ratings_sum=movie_id * 7, ratings_count=movie_id)
+    return movies, stats
+
+
+def legacy_movie_response(movie: Movie, stats: MovieRatingStats) -> MovieResponse:
+    """to_movie_response as it was before the typed envelopes"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        movie_response = MovieResponse.from_orm(movie)
+    movie_response.average_rating = round(stats.average, 1) if stats and stats.average else 0.0
+    movie_response.ratings_count = stats.ratings_count if stats else 0
+    return movie_response
+
+
+def build_app(movies: List[Movie], stats: Dict[int, MovieRatingStats]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=dict)
+    def legacy(n: int = Query(...)):
+        return {"status": "success", "data": [legacy_movie_response(movie, stats[movie.id]) for movie in movies[:n]]}
+
+    @app.get("/typed", response_model=PageResponse[MovieResponse])
+    def typed(n: int = Query(...)):
+        data = [to_movie_response(movie, stats[movie.id]) for movie in movies[:n]]
+        return ModelResponse(PageResponse[MovieResponse](data=data))
+
+    return app
+
+
+def measure(client: TestClient, path: str, size: int, repeat: int) -> float:
+    """Mean seconds per request"""
+    url = f"{path}?n={size}"
+    for _ in range(max(repeat // 10, 10)):
+        client.get(url)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        client.get(url)
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,100", help="comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=1000, help="requests per path and size")
+    args = parser.parse_args()
+    sizes = sorted({int(size) for size in args.sizes.split(",")})
+    if len(sizes) < 2:
+        parser.error("give at least two page sizes")
+
+    movies, stats = make_rows(sizes[-1])
+    client = TestClient(build_app(movies, stats))
+    # Both paths must produce the same document
+    assert client.get(f"/legacy?n={sizes[-1]}").json()["data"] == client.get(f"/typed?n={sizes[-1]}").json()["data"]
+
+    per_item = {}
+    for path in ("/legacy", "/typed"):
+        timings = {size: measure(client, path, size, args.repeat) for size in sizes}
+        for size, seconds in timings.items():
+            print(f"{path:8} {size:>5} items  {seconds * 1e3:8.3f} ms/request")
+        per_item[path] = (timings[sizes[-1]] - timings[sizes[0]]) / (sizes[-1] - sizes[0])
+
+    legacy, typed = per_item["/legacy"], per_item["/typed"]
+    print(f"per item: legacy {legacy * 1e6:.1f} us, typed {typed * 1e6:.1f} us ({(1 - typed / legacy) * 100:.0f}% less)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
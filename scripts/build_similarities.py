@@ -0,0 +1,42 @@
+"""
+Build the precomputed "similar movies" lists (movie_similarities) served by
+GET /movies/{id}/similar.
+
+Run from the project root:
+    python -m scripts.build_similarities                  # full rebuild, e.g. nightly
+    python -m scripts.build_similarities --incremental    # new movies and lists shortened by deletes, e.g. hourly
+    python -m scripts.build_similarities --top-k 50 --block 128
+
+A full rebuild swaps every list in one transaction, so the endpoint keeps serving the
+previous lists until it commits. Needs NumPy, from the optional dependency group:
+    poetry install --with similarities
+"""
+import argparse
+import sys
+import time
+from app.db.session import SessionLocal
+from app.repositories.similarity_repository import MovieSimilarityRepository
+from app.services.similarity_service import DEFAULT_BLOCK, DEFAULT_TOP_K, build_all, refresh
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="neighbours kept per movie")
+    parser.add_argument("--block", type=int, default=DEFAULT_BLOCK, help="movies scored per NumPy block (memory vs. overhead)")
+    parser.add_argument("--incremental", action="store_true", help="only fill in missing or incomplete lists")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    with SessionLocal() as db:
+        repo = MovieSimilarityRepository(db)
+        if args.incremental:
+            recomputed, updated = refresh(repo, args.top_k, args.block)
+            print(f"Computed {recomputed} lists and updated {updated} existing ones ({round(time.monotonic() - started, 1)}s)")
+        else:
+            written = build_all(repo, args.top_k, args.block)
+            print(f"Wrote {written} neighbours ({round(time.monotonic() - started, 1)}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
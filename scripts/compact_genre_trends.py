@@ -0,0 +1,33 @@
+"""
+Compact the per-movie daily rating rollup into the per-genre one (genre_rating_daily) that
+serves GET /genres/{id}/ratings/trends.
+
+Run from the project root, e.g. every few minutes from cron:
+    python -m scripts.compact_genre_trends            # recompute the last 2 days, today included
+    python -m scripts.compact_genre_trends --days 30
+    python -m scripts.compact_genre_trends --all      # every day, e.g. after genres were reassigned
+
+Ratings are attributed to the genres their movie has when its day is compacted.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from app.db.session import SessionLocal
+from app.repositories.movie_repository import MovieRepository
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=2, help="recompute this many days back, today included")
+    parser.add_argument("--all", action="store_true", help="recompute every day")
+    args = parser.parse_args()
+
+    since = None if args.all else date.today() - timedelta(days=args.days - 1)
+    with SessionLocal() as db:
+        written = MovieRepository(db).compact_genre_rating_daily(since)
+    print(f"Compacted {written} genre-days{f' since {since}' if since else ''}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Query-plan regression check: runs the hot read paths of MovieRepository against a seeded
+database, EXPLAINs every statement they send (including the selectinload follow-ups) and
+fails when a plan reads a large table with a sequential scan. The partitions of a
+partitioned table a plan scans count together, so a scan over every month fails even
+when each month is small.
+
+Run from the project root against a database seeded at a realistic scale, so the planner
+has a reason to prefer the indexes:
+    python -m scripts.generate_data --reset --movies 100000 --ratings 2000000
+    python -m scripts.explain_check
+    python -m scripts.explain_check --threshold 50000 --only list_movies_genre,ratings_page -v
+
+Facets, the catalog export and the stats rebuild read whole tables by design and are
+not checked. Exits with 1 if any case fails.
+"""
+import argparse
+import json
+import sys
+from datetime import date
+from typing import Callable, Dict, Iterator, List, NamedTuple, Set, Tuple
+from sqlalchemy import event, text
+from app.db.session import SessionLocal, engine
+from app.repositories.movie_repository import MovieRepository
+
+# Sequential scans of tables with more (estimated) rows than this fail the check
+DEFAULT_THRESHOLD = 10_000
+
+
+class Context(NamedTuple):
+    movie_id: int
+    quiet_movie_id: int
+    release_year: int
+    genre: str
+    genre_id: int
+    word: str
+
+
+class Case(NamedTuple):
+    run: Callable[[MovieRepository, Context], object]
+    # Tables this case may scan in full regardless of size
+    allow: Set[str] = set()
+
+
+CASES: Dict[str, Case] = {
+    "list_movies": Case(lambda repo, ctx: repo.get_all(0, 10)),
+    "list_movies_year": Case(lambda repo, ctx: repo.get_all(0, 10, release_year=ctx.release_year)),
+    "list_movies_genre": Case(lambda repo, ctx: repo.get_all(0, 10, genre=ctx.genre)),
+    "list_movies_after": Case(lambda repo, ctx: repo.get_after((ctx.movie_id,), 10)),
+    "list_movies_by_rating": Case(lambda repo, ctx: repo.get_all(0, 10, sort="-average_rating")),
+    "list_movies_by_count": Case(lambda repo, ctx: repo.get_all(0, 10, sort="-ratings_count")),
+    "list_movies_by_year": Case(lambda repo, ctx: repo.get_all(0, 10, sort="release_year")),
+    "list_movies_by_title": Case(lambda repo, ctx: repo.get_all(0, 10, sort="title")),
+    "search": Case(lambda repo, ctx: repo.search(ctx.word, 0, 10)),
+    "get_movie": Case(lambda repo, ctx: repo.get_by_id(ctx.movie_id)),
+    "movie_version": Case(lambda repo, ctx: repo.get_version(ctx.movie_id)),
+    "existing_movie_ids": Case(lambda repo, ctx: repo.existing_movie_ids({ctx.movie_id, ctx.quiet_movie_id})),
+    "rating_stats": Case(lambda repo, ctx: repo.get_rating_stats_for_movies([ctx.movie_id, ctx.quiet_movie_id])),
+    "ratings_all": Case(lambda repo, ctx: repo.get_ratings_for_movie(ctx.quiet_movie_id)),
+    "ratings_page": Case(lambda repo, ctx: repo.get_ratings_after(ctx.movie_id, None, 100)),
+    "leaderboard_top_rated": Case(lambda repo, ctx: repo.get_leaderboard("top_rated", 20, min_votes=10)),
+    "leaderboard_top_rated_genre": Case(lambda repo, ctx: repo.get_leaderboard("top_rated", 20, min_votes=10, genre=ctx.genre)),
+    # The global mean behind the Bayesian average is a sum over every stats row
+    "leaderboard_weighted": Case(lambda repo, ctx: repo.get_leaderboard("weighted", 20, min_votes=25), {"movie_rating_stats"}),
+    "leaderboard_trending": Case(lambda repo, ctx: repo.get_leaderboard("trending", 20, days=7)),
+    "movie_trend": Case(lambda repo, ctx: repo.get_movie_rating_trend(ctx.movie_id, "week", date(2024, 1, 1), date(2024, 12, 31))),
+    "genre_trend": Case(lambda repo, ctx: repo.get_genre_rating_trend(ctx.genre_id, "month", date(2020, 1, 1), date(2024, 12, 31))),
+    "similar": Case(lambda repo, ctx: repo.get_similar(ctx.movie_id, 10)),
+}
+
+
+def load_context(db) -> Context:
+    """Parameters that exist in the seeded data: the most rated movie, a median one, its year, genre and a title word"""
+    movie_id = db.execute(text("SELECT movie_id FROM movie_rating_stats ORDER BY ratings_count DESC, movie_id LIMIT 1")).scalar()
+    if movie_id is None:
+        raise SystemExit("The database has no movies; seed it first")
+    quiet_movie_id = db.execute(text(
+        "SELECT movie_id FROM movie_rating_stats ORDER BY ratings_count, movie_id "
+        "OFFSET (SELECT count(*) / 2 FROM movie_rating_stats) LIMIT 1"
+    )).scalar()
+    row = db.execute(text("""
+        SELECT m.release_year, m.title, g.name, g.id FROM movies m
+        JOIN movie_genres mg ON mg.movie_id = m.id JOIN genres g ON g.id = mg.genre_id
+        WHERE m.id = :movie_id ORDER BY g.name LIMIT 1
+    """), {"movie_id": movie_id}).one()
+    return Context(movie_id, quiet_movie_id, row.release_year, row.name, row.id, row.title.split()[0])
+
+
+def load_table_rows(db) -> Dict[str, Tuple[str, float]]:
+    """
+    {relation: (table, estimated rows)}: the planner's own size estimates, as of the last
+    ANALYZE (-1 if never analyzed), with every partition mapped to its partitioned table
+    """
+    return {
+        relname: (table, max(rows, 0))
+        for relname, table, rows in db.execute(text(
+            "SELECT relname, coalesce(pg_partition_root(oid)::regclass::text, relname), reltuples "
+            "FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        )).all()
+    }
+
+
+def capture_statements(db, run: Callable[[], object]) -> List[Tuple[str, object]]:
+    """The (SQL, parameters) pairs sent to the database while `run` executes"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def explain(db, statement: str, parameters) -> dict:
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    # psycopg2 decodes json columns; keep working if the value arrives as text
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+
+def check_case(db, name: str, case: Case, ctx: Context, table_rows: Dict[str, Tuple[str, float]], threshold: int, verbose: bool) -> List[str]:
+    """Failure messages for one case (empty when every plan is fine)"""
+    repo = MovieRepository(db)
+    statements = capture_statements(db, lambda: case.run(repo, ctx))
+    failures = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        plan = explain(db, statement, parameters)
+        # Partitions are scanned one by one, so add up the ones a plan reads in full per partitioned table
+        scanned: Dict[str, Dict[str, float]] = {}
+        for node in plan_nodes(plan):
+            if node["Node Type"] == "Seq Scan":
+                relation = node["Relation Name"]
+                table, rows = table_rows.get(relation, (relation, 0))
+                scanned.setdefault(table, {})[relation] = rows
+        for table, relations in scanned.items():
+            rows = sum(relations.values())
+            if rows > threshold and table not in case.allow:
+                failures.append(f"{name}: sequential scan on {table} (~{int(rows)} rows) in: {' '.join(statement.split())[:200]}")
+        if verbose:
+            print(f"      {plan['Node Type']} cost={plan['Total Cost']}: {' '.join(statement.split())[:120]}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="largest table (rows) a plan may scan sequentially")
+    parser.add_argument("--only", help="comma-separated case names, default all")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the top plan node of every statement")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.only.split(",")] if args.only else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)} (choose from {', '.join(CASES)})")
+
+    failures: List[str] = []
+    with SessionLocal() as db:
+        ctx = load_context(db)
+        table_rows = load_table_rows(db)
+        for name in names:
+            case_failures = check_case(db, name, CASES[name], ctx, table_rows, args.threshold, args.verbose)
+            print(f"   {'ok  ' if not case_failures else 'FAIL'} {name}")
+            failures.extend(case_failures)
+            db.rollback()
+
+    if failures:
+        print(f"\n{len(failures)} plan(s) scan tables above {args.threshold} rows:")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+    print(f"\nAll {len(names)} cases use indexes on tables above {args.threshold} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
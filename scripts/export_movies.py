@@ -0,0 +1,40 @@
+"""
+Export the movie catalog as NDJSON or CSV, streamed from a server-side cursor.
+
+Run from the project root:
+    python -m scripts.export_movies movies.ndjson
+    python -m scripts.export_movies movies.csv --format csv --genre drama
+    python -m scripts.export_movies - | gzip > movies.ndjson.gz
+
+CSV output can be fed back to scripts.import_movies.
+"""
+import argparse
+import sys
+from app.services.export_service import MovieExportService, EXPORT_FORMATS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="defaults to the file extension, else ndjson")
+    parser.add_argument("--title")
+    parser.add_argument("--release-year", type=int)
+    parser.add_argument("--genre")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    target = sys.stdout if args.path == "-" else open(args.path, "w", newline="", encoding="utf-8")
+
+    try:
+        exporter = MovieExportService(batch_size=args.batch_size)
+        for chunk in exporter.iter_export(fmt, title=args.title, release_year=args.release_year, genre=args.genre):
+            target.write(chunk)
+    finally:
+        if target is not sys.stdout:
+            target.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Generate a synthetic catalog and rating history at a chosen scale and load it with COPY.
+
+Run from the project root against a database you can wipe (DATABASE_URL from the
+environment or .env, as for the app):
+    python -m scripts.generate_data --reset --movies 100000 --ratings 10000000
+    python -m scripts.generate_data --reset --ratings 10000000 --jobs 8 --until 2025-01-01
+
+The dataset is deterministic for a given --seed, scale and --until (which defaults to
+today, so pass it explicitly to reproduce a dataset on another day):
+- movie popularity is Zipfian (--zipf), over a shuffled ranking so it is not tied to ids;
+  directors are Zipfian too, and each movie gets 1-4 genres with skewed genre popularity;
+- rated_at is spread over the last --days days, denser towards --until and never
+  before the movie's release year; scores cluster around a per-movie quality.
+
+Ratings are generated and COPYed in parallel chunks (--jobs processes, one connection
+each), then the rating aggregates are rebuilt and the result is checked with
+scripts.seed_check.
+"""
+import argparse
+import io
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List, NamedTuple
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.repositories.rating_partition_repository import RatingPartitionRepository
+
+GENRES = (
+    "Drama", "Comedy", "Action", "Thriller", "Romance", "Horror", "Documentary", "Animation",
+    "Adventure", "Crime", "Science Fiction", "Fantasy", "Mystery", "Family", "War", "Western",
+    "Musical", "History", "Biography", "Sport",
+)
+TITLE_WORDS = (
+    "Dark", "Night", "Love", "War", "Star", "City", "Last", "Red", "Silent", "Lost",
+    "Golden", "Empire", "River", "Storm", "Ghost", "King", "Summer", "Winter", "Road", "Secret",
+)
+FIRST_NAMES = ("Ava", "Ben", "Chloe", "Daniel", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas", "Kira", "Luca", "Maya", "Nils", "Omar", "Priya")
+LAST_NAMES = ("Anders", "Brooks", "Castillo", "Dubois", "Eriksen", "Fischer", "Garcia", "Hughes", "Ito", "Jensen", "Kowalski", "Laurent", "Moreau", "Novak", "Okafor", "Petrov")
+
+# Share of movies with 1, 2, 3 and 4 genres
+GENRE_FAN_OUT = (0.30, 0.40, 0.22, 0.08)
+RATING_CHUNK = 250_000
+
+
+class Scale(NamedTuple):
+    movies: int = 10000
+    directors: int = 2000
+    genres: int = 20
+    ratings: int = 1000000
+    zipf: float = 1.0
+    days: int = 3650
+    seed: int = 42
+    until: date = None
+
+
+def zipf_cum_weights(n: int, exponent: float) -> List[float]:
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+def expected_top_share(scale: Scale, fraction: float = 0.01) -> float:
+    """Share of all ratings the most popular `fraction` of movies should receive"""
+    cum = zipf_cum_weights(scale.movies, scale.zipf)
+    top = max(int(scale.movies * fraction), 1)
+    return cum[top - 1] / cum[-1]
+
+
+def _epoch(day: date) -> float:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+class CatalogModel:
+    """Per-movie properties shared by the catalog load and every rating chunk (rebuilt from the seed)"""
+
+    def __init__(self, scale: Scale):
+        rng = random.Random(f"{scale.seed}-catalog")
+        self.end = _epoch(scale.until)
+        start = self.end - scale.days * 86400
+        first_year = 1920
+        last_year = scale.until.year
+
+        # Index 0 is unused so lists can be indexed by movie id
+        self.release_year = [0] * (scale.movies + 1)
+        self.quality = [0.0] * (scale.movies + 1)
+        self.earliest = [0.0] * (scale.movies + 1)
+        for movie_id in range(1, scale.movies + 1):
+            # Skewed towards recent years, like real catalogs
+            year = first_year + int((last_year - first_year + 1) * rng.random() ** 0.6)
+            self.release_year[movie_id] = min(year, last_year)
+            self.quality[movie_id] = min(max(rng.gauss(6.6, 1.1), 2.0), 9.5)
+            self.earliest[movie_id] = max(start, _epoch(date(self.release_year[movie_id], 1, 1)))
+
+        self.ids_by_rank = list(range(1, scale.movies + 1))
+        rng.shuffle(self.ids_by_rank)
+        self.cum_weights = zipf_cum_weights(scale.movies, scale.zipf)
+
+
+def _catalog_rows(scale: Scale, model: CatalogModel):
+    rng = random.Random(f"{scale.seed}-rows")
+    directors = io.StringIO()
+    for director_id in range(1, scale.directors + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {director_id}"
+        directors.write(f"{director_id}\t{name}\t{rng.randint(1920, 1995)}\tSynthetic director {director_id}\n")
+
+    genre_names = list(GENRES[:scale.genres]) + [f"Genre {i}" for i in range(len(GENRES) + 1, scale.genres + 1)]
+    genres = io.StringIO("".join(f"{genre_id}\t{name}\n" for genre_id, name in enumerate(genre_names, start=1)))
+
+    director_weights = zipf_cum_weights(scale.directors, 1.1)
+    director_ids = list(range(1, scale.directors + 1))
+    rng.shuffle(director_ids)
+    genre_weights = zipf_cum_weights(scale.genres, 0.8)
+    genre_ids = list(range(1, scale.genres + 1))
+
+    movies, movie_genres = io.StringIO(), io.StringIO()
+    for movie_id in range(1, scale.movies + 1):
+        title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+        cast = ", ".join(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(2, 6)))
+        director_id = rng.choices(director_ids, cum_weights=director_weights)[0]
+        movies.write(
+            f"{movie_id}\t{title} {movie_id}\t{model.release_year[movie_id]}\t{cast}\t"
+            f"Synthetic movie {movie_id}\t{director_id}\n"
+        )
+        wanted = rng.choices((1, 2, 3, 4), weights=GENRE_FAN_OUT)[0]
+        chosen = set()
+        while len(chosen) < min(wanted, scale.genres):
+            chosen.add(rng.choices(genre_ids, cum_weights=genre_weights)[0])
+        movie_genres.writelines(f"{movie_id}\t{genre_id}\n" for genre_id in sorted(chosen))
+
+    for buffer in (directors, movies, movie_genres):
+        buffer.seek(0)
+    return directors, genres, movies, movie_genres
+
+
+_worker_scale: Scale = None
+_worker_model: CatalogModel = None
+_worker_engine = None
+
+
+def _init_worker(scale: Scale):
+    global _worker_scale, _worker_model, _worker_engine
+    _worker_scale = scale
+    _worker_model = CatalogModel(scale)
+    _worker_engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+
+
+def _copy_ratings_chunk(chunk: int) -> int:
+    """Generate and COPY one chunk; ids are fixed per chunk, so the result does not depend on scheduling"""
+    scale, model = _worker_scale, _worker_model
+    first_id = chunk * RATING_CHUNK + 1
+    count = min(RATING_CHUNK, scale.ratings - chunk * RATING_CHUNK)
+    rng = random.Random(f"{scale.seed}-ratings-{chunk}")
+
+    buffer = io.StringIO()
+    movie_ids = rng.choices(model.ids_by_rank, cum_weights=model.cum_weights, k=count)
+    for offset, movie_id in enumerate(movie_ids):
+        score = min(max(round(rng.gauss(model.quality[movie_id], 1.8)), 1), 10)
+        earliest = model.earliest[movie_id]
+        # sqrt makes the density grow linearly towards `until` (a growing user base)
+        rated_at = earliest + (model.end - earliest) * math.sqrt(rng.random())
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(rated_at))
+        buffer.write(f"{first_id + offset}\t{movie_id}\t{score}\t{stamp}\n")
+    buffer.seek(0)
+
+    connection = _worker_engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert("COPY movie_ratings (id, movie_id, score, rated_at) FROM STDIN", buffer)
+        connection.commit()
+    finally:
+        connection.close()
+    return count
+
+
+def generate(scale: Scale, jobs: int, reset: bool) -> None:
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    model = CatalogModel(scale)
+    started = time.monotonic()
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            if reset:
+                cursor.execute(
+                    "TRUNCATE movie_ratings, movie_rating_daily, movie_rating_monthly, movie_rating_rollup_months, genre_rating_daily, movie_similarities, "
+                    "movie_rating_stats, movie_genres, movies, genres, directors RESTART IDENTITY CASCADE"
+                )
+            else:
+                cursor.execute("SELECT EXISTS (SELECT 1 FROM movies)")
+                if cursor.fetchone()[0]:
+                    raise SystemExit("The database already has movies; use --reset on a database you can wipe.")
+
+            directors, genres, movies, movie_genres = _catalog_rows(scale, model)
+            cursor.copy_expert("COPY directors (id, name, birth_year, description) FROM STDIN", directors)
+            cursor.copy_expert("COPY genres (id, name) FROM STDIN", genres)
+            cursor.copy_expert('COPY movies (id, title, release_year, "cast", description, director_id) FROM STDIN', movies)
+            cursor.copy_expert("COPY movie_genres (movie_id, genre_id) FROM STDIN", movie_genres)
+        connection.commit()
+    finally:
+        connection.close()
+    print(f"Catalog loaded: {scale.movies} movies, {scale.directors} directors, {scale.genres} genres ({round(time.monotonic() - started, 1)}s)")
+
+    # Every generated month gets its partition, so the COPY does not pile up in the default one
+    with Session(engine) as db:
+        created = RatingPartitionRepository(db).ensure_partitions(scale.until - timedelta(days=scale.days), scale.until)
+    if created:
+        print(f"Created {len(created)} rating partitions")
+
+    chunks = math.ceil(scale.ratings / RATING_CHUNK)
+    written = 0
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(scale,)) as pool:
+        for count in pool.imap_unordered(_copy_ratings_chunk, range(chunks)):
+            written += count
+            print(f"   ratings: {written}/{scale.ratings} ({round(time.monotonic() - started, 1)}s)")
+
+    # Imports here so worker processes do not load the app's engines
+    from app.db.session import SessionLocal
+    from app.repositories.movie_repository import MovieRepository
+    with SessionLocal() as db:
+        for table, last_id in (("directors", scale.directors), ("genres", scale.genres), ("movies", scale.movies), ("movie_ratings", scale.ratings)):
+            db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), :last, true)"), {"last": max(last_id, 1)})
+        db.commit()
+        MovieRepository(db).rebuild_rating_stats()
+        db.execute(text("ANALYZE"))
+        db.commit()
+    print(f"Aggregates rebuilt ({round(time.monotonic() - started, 1)}s)")
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = Scale()
+    parser.add_argument("--movies", type=int, default=defaults.movies)
+    parser.add_argument("--directors", type=int, default=defaults.directors)
+    parser.add_argument("--genres", type=int, default=defaults.genres)
+    parser.add_argument("--ratings", type=int, default=defaults.ratings)
+    parser.add_argument("--zipf", type=float, default=defaults.zipf, help="popularity exponent; 0 is uniform")
+    parser.add_argument("--days", type=int, default=defaults.days, help="spread rated_at over this many days")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--until", type=date.fromisoformat, default=date.today(), help="last rating day (YYYY-MM-DD), default today")
+
+
+def scale_from_args(args) -> Scale:
+    return Scale(args.movies, args.directors, args.genres, args.ratings, args.zipf, args.days, args.seed, args.until)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_scale_arguments(parser)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="parallel COPY processes")
+    parser.add_argument("--reset", action="store_true", help="truncate the catalog and rating tables first")
+    args = parser.parse_args()
+
+    scale = scale_from_args(args)
+    generate(scale, args.jobs, args.reset)
+
+    from scripts.seed_check import verify_seeding
+    return 0 if verify_seeding(scale) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
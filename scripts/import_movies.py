@@ -0,0 +1,44 @@
+"""
+Bulk import movies from an NDJSON or CSV file.
+
+Run from the project root:
+    python -m scripts.import_movies movies.ndjson
+    python -m scripts.import_movies movies.csv --format csv --batch-size 5000
+    cat movies.ndjson | python -m scripts.import_movies -
+
+NDJSON rows and CSV columns use the POST /movies fields:
+title, release_year, cast, description, director_id, genre_ids (CSV: "1|4|7").
+"""
+import argparse
+import sys
+from app.db.session import SessionLocal
+from app.services.import_service import MovieImportService, IMPORT_FORMATS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension, else ndjson")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    source = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+
+    try:
+        with SessionLocal() as db:
+            report = MovieImportService(db, batch_size=args.batch_size).import_lines(source, fmt)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(f"Imported {report.imported} movies, {report.failed} rows failed.")
+    for error in report.errors[:50]:
+        print(f"   - line {error['line']}: {error['error']}")
+    if report.failed > 50:
+        print(f"   ... and {report.failed - 50} more")
+    return 0 if report.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Maintain the monthly movie_ratings partitions and the per-movie monthly rollup.
+
+Run from the project root, e.g. daily from cron:
+    python -m scripts.rating_partitions create             # partitions through 3 months ahead, and for
+                                                           # any month stuck in the default partition
+    python -m scripts.rating_partitions create --from 2020-01
+    python -m scripts.rating_partitions rollup             # fold closed months into movie_rating_monthly
+    python -m scripts.rating_partitions status
+
+A month is closed once --grace-days have passed since it ended. Rolled-up months are read
+from movie_rating_monthly by the aggregate checks and rebuilds; late ratings for them are
+added to the rollup as they are written.
+"""
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+from app.db.session import SessionLocal
+from app.repositories import movie_queries as queries
+from app.repositories.rating_partition_repository import DEFAULT_PARTITION, RatingPartitionRepository
+
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def create(repo: RatingPartitionRepository, args) -> int:
+    current = date.today().replace(day=1)
+    # Without --from, start early enough to give ratings stranded in the default partition a home
+    start = args.start or min(current, repo.oldest_default_month() or current)
+    created = repo.ensure_partitions(start, queries.add_months(current, args.ahead))
+    print(f"Created {len(created)} partitions{': ' + ', '.join(created) if created else ''}")
+    return 0
+
+
+def rollup(repo: RatingPartitionRepository, args) -> int:
+    closed_before = (date.today() - timedelta(days=args.grace_days)).replace(day=1)
+    written = repo.rollup_closed(closed_before)
+    for month, rows in written.items():
+        print(f"   {month:%Y-%m}: {rows} movies")
+    print(f"Rolled up {len(written)} months; aggregates read raw ratings from {repo.rollup_watermark() or 'the start'}")
+    return 0
+
+
+def status(repo: RatingPartitionRepository, args) -> int:
+    partitions = repo.list_partitions()
+    for partition in partitions:
+        state = "rolled up" if partition["rolled_up"] else ""
+        print(f"   {partition['name']:28} ~{partition['rows']:>10} rows  {state}")
+    default = next((partition for partition in partitions if partition["name"] == DEFAULT_PARTITION), None)
+    if default and default["rows"]:
+        print(f"{DEFAULT_PARTITION} holds ratings outside every monthly partition; run create to move them")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    create_parser = commands.add_parser("create", help="create missing monthly partitions")
+    create_parser.add_argument("--ahead", type=int, default=3, help="months past the current one to create")
+    create_parser.add_argument("--from", dest="start", type=parse_month, help="first month (YYYY-MM), default the current one or the oldest in the default partition")
+    rollup_parser = commands.add_parser("rollup", help="roll up closed months")
+    rollup_parser.add_argument("--grace-days", type=int, default=1, help="days after a month ends before it is closed")
+    commands.add_parser("status", help="list partitions and their rollup state")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        return {"create": create, "rollup": rollup, "status": status}[args.command](RatingPartitionRepository(db), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Rebuild or verify the per-movie rating aggregates (movie_rating_stats).
+A rebuild also recomputes the per-day rollup (movie_rating_daily) and, for months already
+rolled up by scripts.rating_partitions, the per-month rollup (movie_rating_monthly); the
+per-genre daily rollup (genre_rating_daily) is recompacted from scratch.
+
+Run from the project root:
+    python -m scripts.rebuild_rating_stats           # recompute everything from movie_ratings
+    python -m scripts.rebuild_rating_stats --check   # only report drift, exit 1 if any
+"""
+import argparse
+import sys
+from app.db.session import SessionLocal
+from app.repositories.movie_repository import MovieRepository
+
+
+def check_stats(repo: MovieRepository) -> bool:
+    """Prints every movie whose stored aggregates differ from the raw ratings."""
+    drift = repo.find_rating_stats_drift()
+    if not drift:
+        print("Rating stats are consistent with movie_ratings.")
+        return True
+
+    print(f"Rating stats drift detected for {len(drift)} movies:")
+    for row in drift[:50]:
+        print(
+            f"   - movie {row.movie_id}: count {row.stored_count} (actual {row.actual_count}), "
+            f"sum {row.stored_sum} (actual {row.actual_sum})"
+        )
+    if len(drift) > 50:
+        print(f"   ... and {len(drift) - 50} more")
+    return False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only compare stored aggregates with the raw table")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        repo = MovieRepository(db)
+        if args.check:
+            return 0 if check_stats(repo) else 1
+
+        written = repo.rebuild_rating_stats()
+        print(f"Rebuilt rating stats for {written} movies.")
+        return 0 if check_stats(repo) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,7 @@ BEGIN;
 ------------------------------- 1. Cleanup Existing Data -----------------------------
 -- Delete existing data from final tables to ensure a clean run.
 DELETE FROM movie_ratings;
+DELETE FROM movie_rating_rollup_months;
 DELETE FROM movie_genres;
 DELETE FROM movies;
 DELETE FROM directors;
@@ -0,0 +1,33 @@
+"""
+Leaderboards are cached beside the movie cache and follow its enabled flag and clear().
+"""
+import pytest
+from app.services.movie_cache import get_leaderboard, leaderboard_key, movie_cache, put_leaderboard
+
+KEY = leaderboard_key("top_rated", 10, 5, 7)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    movie_cache.clear()
+    yield
+    movie_cache.clear()
+
+
+def test_leaderboards_follow_the_enabled_flag(monkeypatch):
+    monkeypatch.setattr(movie_cache, "enabled", True)
+    put_leaderboard(KEY, [])
+    assert get_leaderboard(KEY) == []
+
+    monkeypatch.setattr(movie_cache, "enabled", False)
+    assert get_leaderboard(KEY) is None
+    put_leaderboard(leaderboard_key("trending", 10, 0, 7), [])
+    monkeypatch.setattr(movie_cache, "enabled", True)
+    assert get_leaderboard(leaderboard_key("trending", 10, 0, 7)) is None
+
+
+def test_clear_drops_leaderboards(monkeypatch):
+    monkeypatch.setattr(movie_cache, "enabled", True)
+    put_leaderboard(KEY, [])
+    movie_cache.clear()
+    assert get_leaderboard(KEY) is None
@@ -0,0 +1,23 @@
+"""
+List cursors round-trip through parse_movie_cursor, including for a movie that has no stats row.
+"""
+import pytest
+from app.models.models import Movie, MovieRatingStats
+from app.services.movie_service import movie_cursor, parse_movie_cursor
+
+
+@pytest.mark.parametrize("sort", ["average_rating", "-average_rating", "ratings_count", "-ratings_count"])
+def test_stats_sort_cursor_without_stats_row(sort):
+    cursor = movie_cursor(Movie(id=7, title="No stats", release_year=2000), None, sort)
+    assert parse_movie_cursor(cursor, sort) == (0, 7)
+
+
+def test_stats_sort_cursor_uses_stats():
+    stats = MovieRatingStats(movie_id=7, ratings_count=3, ratings_sum=12, average_rating=4.0)
+    cursor = movie_cursor(Movie(id=7, title="Rated", release_year=2000), stats, "-ratings_count")
+    assert parse_movie_cursor(cursor, "-ratings_count") == (3, 7)
+
+
+def test_movie_column_cursor():
+    cursor = movie_cursor(Movie(id=7, title="Rated", release_year=2000), None, "title")
+    assert parse_movie_cursor(cursor, "title") == ("Rated", 7)
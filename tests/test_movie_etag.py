@@ -0,0 +1,79 @@
+"""
+Conditional GETs against a migrated database (DATABASE_URL); skipped when it cannot be reached.
+Writes are made through a separate engine, standing in for another API worker: they bypass
+this process's cache, which is exactly when a cached body could drift from its ETag.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.core.config import settings
+from app.main import app
+from app.services.movie_cache import movie_cache
+
+API = "/api/v1/movies"
+
+
+@pytest.fixture(scope="module")
+def other_worker():
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        engine.connect().close()
+    except OperationalError:
+        pytest.skip("database not reachable")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(movie_cache, "enabled", True)
+    movie_cache.clear()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def movie_id(client, other_worker):
+    with other_worker.connect() as connection:
+        director_id = connection.scalar(text("SELECT min(id) FROM directors"))
+        genre_id = connection.scalar(text("SELECT min(id) FROM genres"))
+    if director_id is None or genre_id is None:
+        pytest.skip("database has no directors or genres")
+    response = client.post(f"{API}/", json={"title": "ETag test", "release_year": 2000, "director_id": director_id, "genre_ids": [genre_id]})
+    assert response.status_code == 201
+    movie_id = response.json()["data"]["id"]
+    yield movie_id
+    client.delete(f"{API}/{movie_id}")
+
+
+def test_detail_body_matches_etag_after_write_elsewhere(client, other_worker, movie_id):
+    first = client.get(f"{API}/{movie_id}")
+    assert first.status_code == 200
+    # Served from this process's cache from now on
+    assert movie_cache.get_detail(movie_id, first.headers["etag"]) is not None
+
+    with other_worker.begin() as connection:
+        version = connection.scalar(
+            text("UPDATE movies SET title = 'Renamed elsewhere', version = version + 1 WHERE id = :id RETURNING version"), {"id": movie_id}
+        )
+
+    second = client.get(f"{API}/{movie_id}", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.headers["etag"] == f'"m-{movie_id}-{version}-0"'
+    assert second.json()["data"]["title"] == "Renamed elsewhere"
+
+    # The new pair revalidates; the body is served again from the cache under its own ETag
+    assert client.get(f"{API}/{movie_id}", headers={"If-None-Match": second.headers["etag"]}).status_code == 304
+    third = client.get(f"{API}/{movie_id}")
+    assert third.headers["etag"] == second.headers["etag"]
+    assert third.json()["data"]["title"] == "Renamed elsewhere"
+
+
+def test_streamed_ratings_match_etag(client, movie_id):
+    for score in (3, 7):
+        assert client.post(f"{API}/{movie_id}/ratings?score={score}").status_code in (201, 202)
+    response = client.get(f"{API}/{movie_id}/ratings?stream=true")
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert response.headers["etag"] == f'"r-{movie_id}-{len(lines)}"'
@@ -0,0 +1,53 @@
+"""
+The query-plan regression check (scripts.explain_check) as a test: every hot read path must use
+indexes on tables above the threshold. Needs a migrated, seeded Postgres database in
+DATABASE_URL, ideally at benchmark scale; skipped when there is none.
+"""
+import pytest
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+try:
+    from app.core.config import settings
+except ValueError:
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+if make_url(settings.DATABASE_URL).get_backend_name() != "postgresql":
+    pytest.skip("DATABASE_URL is not a Postgres database", allow_module_level=True)
+
+from app.db.session import SessionLocal
+from scripts import explain_check
+
+pytestmark = pytest.mark.postgres
+
+
+@pytest.fixture(scope="module")
+def db():
+    session = SessionLocal()
+    try:
+        session.connection()
+    except OperationalError:
+        session.close()
+        pytest.skip("database not reachable")
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="module")
+def seeded(db):
+    try:
+        ctx = explain_check.load_context(db)
+    except SystemExit:
+        pytest.skip("database has no movies")
+    return ctx, explain_check.load_table_rows(db)
+
+
+@pytest.mark.parametrize("name", list(explain_check.CASES))
+def test_plan_uses_indexes(db, seeded, name):
+    ctx, table_rows = seeded
+    try:
+        failures = explain_check.check_case(
+            db, name, explain_check.CASES[name], ctx, table_rows, explain_check.DEFAULT_THRESHOLD, verbose=False
+        )
+    finally:
+        db.rollback()
+    assert failures == []
@@ -0,0 +1,54 @@
+"""
+Read sessions on a replica that refuses connections move to the primary at their first
+statement. Needs the database in DATABASE_URL as the primary; skipped when it cannot be reached.
+"""
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.db.routing import ReplicaRouter
+from app.db.session import AsyncReadSessionLocal, ReadSessionLocal, _create_async_engine, _create_sync_engine, async_engine, engine
+
+DEAD_REPLICA = "postgresql://postgres@127.0.0.1:1/moviedb"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def primary():
+    try:
+        engine.connect().close()
+    except OperationalError:
+        pytest.skip("database not reachable")
+
+
+def test_sync_read_fails_over_to_primary():
+    replica = _create_sync_engine(DEAD_REPLICA, "test-dead-replica")
+    router = ReplicaRouter(engine, [replica], retry_after=60)
+    with ReadSessionLocal(bind=replica, info={"replica": True, "failover": (router, replica, engine)}) as db:
+        assert db.execute(text("SELECT 1")).scalar() == 1
+        assert db.info["replica"] is False
+    assert router.status() == [{"replica": 0, "up": False}]
+    assert router.candidates() == [engine]
+    replica.dispose()
+
+
+async def _async_read(router, replica):
+    async with AsyncReadSessionLocal(
+        bind=replica, info={"replica": True, "failover": (router, replica, async_engine.sync_engine)}
+    ) as db:
+        value = (await db.execute(text("SELECT 1"))).scalar()
+        return value, db.info["replica"]
+
+
+def test_async_read_fails_over_to_primary():
+    replica = _create_async_engine(DEAD_REPLICA, "test-dead-async-replica")
+    router = ReplicaRouter(async_engine, [replica], retry_after=60)
+
+    async def run():
+        try:
+            return await _async_read(router, replica)
+        finally:
+            await async_engine.dispose()
+            await replica.dispose()
+
+    assert asyncio.run(run()) == (1, False)
+    assert router.status() == [{"replica": 0, "up": False}]
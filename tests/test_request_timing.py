@@ -0,0 +1,41 @@
+"""
+Request timing covers a streamed body up to its last chunk, not just the time to the first byte.
+"""
+import time
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.core import metrics
+from app.core.middleware import RequestLoggingMiddleware
+
+CHUNK_DELAY = 0.05
+
+
+def _slow_body():
+    yield "first\n"
+    for _ in range(3):
+        time.sleep(CHUNK_DELAY)
+        yield "more\n"
+
+
+app = FastAPI()
+app.add_middleware(RequestLoggingMiddleware)
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(_slow_body(), media_type="text/plain")
+
+
+def test_streamed_response_is_timed_to_its_last_chunk(monkeypatch):
+    observed = []
+    monkeypatch.setattr(metrics.REQUEST_LATENCY, "observe", lambda value, *labels: observed.append((value, labels)))
+
+    with TestClient(app) as client:
+        response = client.get("/stream")
+
+    assert response.status_code == 200
+    assert response.text.count("\n") == 4
+    [(elapsed, labels)] = observed
+    assert labels == ("GET", "/stream", 200)
+    assert elapsed >= 3 * CHUNK_DELAY
@@ -0,0 +1,40 @@
+"""
+Both engines run their sessions in UTC, so the now() default of rated_at and the rating
+buffer's UTC stamps are the same clock. Skipped when DATABASE_URL cannot be reached.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.db.session import SESSION_TIMEZONE, SessionLocal, async_engine, engine
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    try:
+        engine.connect().close()
+    except OperationalError:
+        pytest.skip("database not reachable")
+
+
+def _assert_utc(timezone_name: str, now: datetime):
+    assert timezone_name == SESSION_TIMEZONE
+    # What a buffered rating would be stamped with at the same moment
+    assert abs(now - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(seconds=5)
+
+
+def test_sync_sessions_run_in_utc():
+    with SessionLocal() as db:
+        _assert_utc(db.scalar(text("SHOW timezone")), db.scalar(text("SELECT now()::timestamp")))
+
+
+def test_async_sessions_run_in_utc():
+    async def read():
+        try:
+            async with async_engine.connect() as connection:
+                return (await connection.scalar(text("SHOW timezone")), await connection.scalar(text("SELECT now()::timestamp")))
+        finally:
+            await async_engine.dispose()
+
+    _assert_utc(*asyncio.run(read()))
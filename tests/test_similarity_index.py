@@ -0,0 +1,37 @@
+"""
+SimilarityIndex.from_rows against feature rows that mention movies missing from the movie list,
+e.g. ones created between the reads.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.models.models import RATING_SCALE
+from app.services.similarity_service import SimilarityIndex
+
+
+def _histogram(score: int, count: int) -> list:
+    histogram = [0] * RATING_SCALE
+    histogram[score - 1] = count
+    return histogram
+
+
+MOVIES = [(2, 10), (5, None), (9, 10)]
+LINKS = [(2, 1), (5, 2), (9, 1), (9, 3)]
+RATINGS = [(2, 4, _histogram(8, 4)), (9, 1, _histogram(2, 1))]
+
+
+@pytest.mark.parametrize("unknown_movie_id", [1, 7, 12])
+def test_rows_of_unknown_movies_are_ignored(unknown_movie_id):
+    expected = SimilarityIndex.from_rows(MOVIES, LINKS, RATINGS)
+    index = SimilarityIndex.from_rows(
+        MOVIES,
+        LINKS + [(unknown_movie_id, 2), (unknown_movie_id, 4)],
+        RATINGS + [(unknown_movie_id, 3, _histogram(1, 3))],
+    )
+
+    # Genre 4 exists only on the unknown movie, so it does not even become a feature column
+    np.testing.assert_array_equal(index.features_t, expected.features_t)
+    np.testing.assert_array_equal(index.weighted, expected.weighted)
+    rows = np.arange(len(MOVIES))
+    np.testing.assert_array_equal(index.scores(rows), expected.scores(rows))